@@ -31,4 +31,9 @@ Document:
 {trimmed_content}
 """
 
-        return self.llm_provider.generate(full_prompt, options=llm_options)
\ No newline at end of file
+        options = dict(llm_options or {})
+        # Not an Ollama option: `cache=False` bypasses the LLM response cache, e.g. when a
+        # suggestion is regenerated and replaying the previous answers would be pointless.
+        if options.pop("cache", True) is False:
+            return self.llm_provider.generate(full_prompt, options=options, cache=False)
+        return self.llm_provider.generate(full_prompt, options=options)
\ No newline at end of file
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+
+# Lower value = admitted first.
+LLM_PRIORITY_INTERACTIVE = 0  # a user is waiting on the HTTP response (/revise, /knowledge-chat)
+LLM_PRIORITY_BACKGROUND = 5  # regeneration of a suggestion the user has opened
+LLM_PRIORITY_BULK = 10  # upload processing
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=LLM_PRIORITY_INTERACTIVE)
+
+
+class LlmOverloadedError(RuntimeError):
+    """Raised when an LLM request is rejected because the wait queue is full or too slow."""
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """Set the admission priority for LLM calls made in this context (e.g. a background job)."""
+
+    token = _current_priority.set(int(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_llm_priority() -> int:
+    return _current_priority.get()
+
+
+class _Waiter:
+    """A queued caller; `notify` is invoked (under the controller lock) once a slot is handed over."""
+
+    def __init__(self, notify: Callable[[], None]) -> None:
+        self.notify = notify
+        self.granted = False
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._callbacks: list[Callable[[], None]] = []
+
+    def add_done_callback(self, callback: Callable[[], None]) -> None:
+        # Called with the controller's flights lock held, like `finish`.
+        if self.done.is_set():
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def finish(self) -> None:
+        self.done.set()
+        for callback in self._callbacks:
+            callback()
+
+    def outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class LlmAdmissionController:
+    """Bounded concurrency for a single LLM backend.
+
+    At most `max_concurrent` calls run at once. Further callers wait in a priority
+    queue (FIFO within a priority) of at most `max_queue` entries and give up after
+    `queue_timeout_s`, so overload shows up as a fast, explicit rejection instead
+    of many requests timing out together inside Ollama.
+
+    Identical requests (same key) that arrive while one is in flight share its
+    result instead of queueing a second generation.
+
+    Threads (`slot`/`run`) and asyncio tasks (`aslot`/`arun`) share the same slots
+    and queue; a freed slot is handed directly to the next waiter, so async callers
+    wait without occupying a worker thread.
+    """
+
+    def __init__(self, *, max_concurrent: int = 2, max_queue: int = 32, queue_timeout_s: float = 300.0) -> None:
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout_s = max(0.0, float(queue_timeout_s))
+
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+
+        self._flights_lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._coalesced = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+    # -- slot bookkeeping (all under self._lock) --
+
+    def _try_admit_or_enqueue(self, priority: int, waiter: _Waiter) -> bool:
+        """True if admitted immediately; otherwise the waiter is queued (or LlmOverloadedError)."""
+
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            self._admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self._rejected += 1
+            raise LlmOverloadedError(f"LLM queue is full ({len(self._waiters)} waiting)")
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        return False
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._in_flight < self.max_concurrent:
+            _priority, _seq, waiter = heapq.heappop(self._waiters)
+            self._in_flight += 1
+            self._admitted += 1
+            waiter.granted = True
+            waiter.notify()
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Remove a waiter that stopped waiting. Returns True if it had been granted a slot meanwhile."""
+
+        if waiter.granted:
+            return True
+        self._waiters = [entry for entry in self._waiters if entry[2] is not waiter]
+        heapq.heapify(self._waiters)
+        return False
+
+    def _record_wait(self, started: float) -> float:
+        waited = time.monotonic() - started
+        with self._lock:
+            self._wait_total_s += waited
+            self._wait_max_s = max(self._wait_max_s, waited)
+        return waited
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    # -- threads --
+
+    @contextmanager
+    def slot(self, priority: Optional[int] = None) -> Iterator[float]:
+        """Hold one concurrency slot; yields the time spent waiting (seconds)."""
+
+        waited = self._acquire(current_llm_priority() if priority is None else int(priority))
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    def _acquire(self, priority: int) -> float:
+        started = time.monotonic()
+        event = threading.Event()
+        waiter = _Waiter(event.set)
+        with self._lock:
+            if self._try_admit_or_enqueue(priority, waiter):
+                return 0.0
+
+        if not event.wait(self.queue_timeout_s):
+            with self._lock:
+                if not self._abandon(waiter):
+                    self._timed_out += 1
+                    raise LlmOverloadedError(f"Timed out after {self.queue_timeout_s:.0f}s waiting for the LLM")
+        return self._record_wait(started)
+
+    def run(self, key: Optional[str], fn: Callable[[], Any], *, priority: Optional[int] = None) -> Any:
+        """Run `fn` inside a slot, coalescing concurrent calls that share `key`."""
+
+        if key is None:
+            with self.slot(priority):
+                return fn()
+
+        flight, leader = self._join_flight(key)
+        if not leader:
+            flight.done.wait()
+            return flight.outcome()
+
+        try:
+            with self.slot(priority):
+                flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._end_flight(key, flight)
+        return flight.result
+
+    # -- asyncio --
+
+    @asynccontextmanager
+    async def aslot(self, priority: Optional[int] = None) -> AsyncIterator[float]:
+        """Async variant of `slot`."""
+
+        waited = await self._aacquire(current_llm_priority() if priority is None else int(priority))
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    async def _aacquire(self, priority: int) -> float:
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def notify() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = _Waiter(notify)
+        with self._lock:
+            if self._try_admit_or_enqueue(priority, waiter):
+                return 0.0
+
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not self._abandon(waiter):
+                    self._timed_out += 1
+                    raise LlmOverloadedError(f"Timed out after {self.queue_timeout_s:.0f}s waiting for the LLM")
+        except BaseException:
+            # Cancelled (e.g. client disconnected): give back a slot that was handed over meanwhile.
+            with self._lock:
+                handed_over = self._abandon(waiter)
+            if handed_over:
+                self._release()
+            raise
+        return self._record_wait(started)
+
+    async def arun(self, key: Optional[str], fn: Callable[[], Awaitable[Any]], *, priority: Optional[int] = None) -> Any:
+        """Async variant of `run`; `fn` returns an awaitable."""
+
+        if key is None:
+            async with self.aslot(priority):
+                return await fn()
+
+        flight, leader = self._join_flight(key)
+        if not leader:
+            loop = asyncio.get_running_loop()
+            done = loop.create_future()
+            with self._flights_lock:
+                flight.add_done_callback(
+                    lambda: loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+                )
+            await done
+            return flight.outcome()
+
+        try:
+            async with self.aslot(priority):
+                flight.result = await fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._end_flight(key, flight)
+        return flight.result
+
+    # -- single-flight --
+
+    def _join_flight(self, key: str) -> tuple[_Flight, bool]:
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _end_flight(self, key: str, flight: _Flight) -> None:
+        with self._flights_lock:
+            self._flights.pop(key, None)
+            flight.finish()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "coalesced": self._coalesced,
+                "wait_avg_ms": round(1000.0 * self._wait_total_s / self._admitted, 1) if self._admitted else 0.0,
+                "wait_max_ms": round(1000.0 * self._wait_max_s, 1),
+            }
+
+
+_controllers: dict[str, LlmAdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_llm_admission_controller(endpoint: str) -> LlmAdmissionController:
+    """Shared controller per LLM endpoint, so every provider instance draws from the same slots."""
+
+    with _controllers_lock:
+        controller = _controllers.get(endpoint)
+        if controller is None:
+            controller = LlmAdmissionController(
+                max_concurrent=int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2")),
+                max_queue=int(os.getenv("OLLAMA_QUEUE_MAX", "32")),
+                queue_timeout_s=float(os.getenv("OLLAMA_QUEUE_TIMEOUT_S", "300")),
+            )
+            _controllers[endpoint] = controller
+        return controller
+
+
+def llm_admission_stats() -> dict[str, dict]:
+    with _controllers_lock:
+        controllers = dict(_controllers)
+    return {endpoint: controller.stats() for endpoint, controller in controllers.items()}
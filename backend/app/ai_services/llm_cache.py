@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.services.sqlite_cache import SqliteLruCache
+from app.workflow_db.config import get_repo_root
+
+
+_CACHES: Dict[Path, SqliteLruCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_llm_response_cache() -> Optional[SqliteLruCache]:
+    """Process-wide cache of deterministic (temperature 0) LLM responses, or None when disabled."""
+
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+    if max_entries <= 0:
+        return None
+
+    default = get_repo_root() / "databases" / "data" / "cache" / "llm_responses.sqlite3"
+    path = Path(os.getenv("LLM_CACHE_PATH", str(default)))
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = SqliteLruCache(
+                path,
+                max_entries=max_entries,
+                ttl_s=float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600))),
+            )
+            _CACHES[path] = cache
+        return cache
+
+
+def llm_cache_stats() -> dict:
+    cache = get_llm_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
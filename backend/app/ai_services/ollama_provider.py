@@ -1,6 +1,16 @@
+import asyncio
+import hashlib
+import json
 import os
+from typing import AsyncIterator, Iterator
+
+import httpx
 import requests
 
+from app.ai_services.llm_admission import get_llm_admission_controller
+from app.ai_services.llm_cache import get_llm_response_cache
+from app.services.async_http import get_async_http_client
+
 class OllamaProvider:
     def __init__(self, model: str = "llama3:8b"):
         self.model = os.getenv("OLLAMA_MODEL", model)
@@ -34,7 +44,7 @@ class OllamaProvider:
             self.max_num_predict = 16384
         self.max_num_predict = max(128, min(self.max_num_predict, 16384))
 
-    def _request_generate(self, prompt: str, options_override: dict | None = None) -> requests.Response:
+    def _generate_payload(self, prompt: str, options_override: dict | None, *, stream: bool) -> dict:
         options = {
             "temperature": 0,
             "num_predict": self.num_predict,
@@ -63,36 +73,223 @@ class OllamaProvider:
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": options,
         }
         if request_format is not None:
             payload["format"] = request_format
+        return payload
 
+    def _request_generate(
+        self,
+        prompt: str,
+        options_override: dict | None = None,
+        *,
+        stream: bool = False,
+    ) -> requests.Response:
         return requests.post(
             self.url,
-            json=payload,
+            json=self._generate_payload(prompt, options_override, stream=stream),
             timeout=(self.connect_timeout_s, self.timeout_s),
+            stream=stream,
         )
 
-    def generate(self, prompt: str, *, options: dict | None = None) -> str:
+    def _coalesce_key(self, prompt: str, options: dict | None) -> str:
+        raw = json.dumps([self.url, self.model, prompt, options or {}], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _response_cache(self, prompt: str, options: dict | None, cache: bool):
+        """Persistent response cache for this call, or None (opted out, disabled or non-deterministic)."""
+
+        if not cache:
+            return None
+        if self._generate_payload(prompt, options, stream=False)["options"].get("temperature") != 0:
+            return None
+        return get_llm_response_cache()
+
+    def _cache_lookup(self, key: str, prompt: str, options: dict | None, cache: bool):
+        """(response cache or None, cached response or None) for this call."""
+
+        store = self._response_cache(prompt, options, cache)
+        if store is None:
+            return None, None
+        hit = store.get(key)
+        return store, hit.decode("utf-8") if hit is not None else None
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        options: dict | None = None,
+        priority: int | None = None,
+        cache: bool = True,
+    ) -> str:
+        """Generate a completion.
+
+        Calls go through the shared admission controller for this endpoint (bounded
+        concurrency, priority queue, single-flight for identical requests). `priority`
+        defaults to the one set with `llm_priority(...)`, else interactive.
+
+        Deterministic (temperature 0) responses are served from / stored in the
+        persistent LLM response cache; pass `cache=False` to always call the model.
+        """
+
+        key = self._coalesce_key(prompt, options)
+        store, hit = self._cache_lookup(key, prompt, options, cache)
+        if hit is not None:
+            return hit
+
+        controller = get_llm_admission_controller(self.url)
+        result = controller.run(key, lambda: self._generate_uncoordinated(prompt, options), priority=priority)
+        if store is not None:
+            store.put(key, result.encode("utf-8"))
+        return result
+
+    def generate_stream(
+        self,
+        prompt: str,
+        *,
+        options: dict | None = None,
+        priority: int | None = None,
+        cache: bool = True,
+    ) -> Iterator[str]:
+        """Yield the completion in fragments as Ollama produces them.
+
+        Holds an admission slot until the stream is exhausted or closed. Streams are
+        not coalesced. With `timeout_s` as the read timeout, a stalled stream fails
+        between tokens instead of after the whole answer. A cached response is
+        yielded as a single fragment; completed streams are added to the cache.
+        """
+
+        key = self._coalesce_key(prompt, options)
+        store, hit = self._cache_lookup(key, prompt, options, cache)
+        if hit is not None:
+            yield hit
+            return
+
+        parts: list[str] = []
+        controller = get_llm_admission_controller(self.url)
+        with controller.slot(priority):
+            response = self._post_with_retries(prompt, options, stream=True)
+            with response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    fragment = chunk.get("response") or ""
+                    if fragment:
+                        parts.append(fragment)
+                        yield fragment
+                    if chunk.get("done"):
+                        if store is not None:
+                            store.put(key, "".join(parts).encode("utf-8"))
+                        break
+
+    def _post_with_retries(self, prompt: str, options: dict | None, *, stream: bool = False) -> requests.Response:
         last_error = None
         for _attempt in range(self.max_retries + 1):
             try:
-                response = self._request_generate(prompt, options_override=options)
-                break
+                return self._request_generate(prompt, options_override=options, stream=stream)
             except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as exc:
                 last_error = exc
-                response = None
-        else:
-            raise last_error  # pragma: no cover
+        raise last_error
 
-        if response is None:
-            raise RuntimeError("Ollama generation request did not produce a response")
+    def _generate_uncoordinated(self, prompt: str, options: dict | None) -> str:
+        response = self._post_with_retries(prompt, options)
 
         if self.debug:
             print("STATUS:", response.status_code)
             print("BODY:", response.text)
 
         response.raise_for_status()
-        return response.json()["response"]
\ No newline at end of file
+        return response.json()["response"]
+
+    # -- async variants (for async routes; no worker thread is held while waiting) --
+
+    def _async_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout_s, connect=self.connect_timeout_s)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        *,
+        options: dict | None = None,
+        priority: int | None = None,
+        cache: bool = True,
+    ) -> str:
+        """Async variant of `generate` (same admission controller, coalescing and cache).
+
+        The response cache is SQLite, so its reads and writes run in a worker thread.
+        """
+
+        key = self._coalesce_key(prompt, options)
+        store, hit = await asyncio.to_thread(self._cache_lookup, key, prompt, options, cache)
+        if hit is not None:
+            return hit
+
+        controller = get_llm_admission_controller(self.url)
+        result = await controller.arun(key, lambda: self._agenerate_uncoordinated(prompt, options), priority=priority)
+        if store is not None:
+            await asyncio.to_thread(store.put, key, result.encode("utf-8"))
+        return result
+
+    async def _agenerate_uncoordinated(self, prompt: str, options: dict | None) -> str:
+        client = get_async_http_client()
+        payload = self._generate_payload(prompt, options, stream=False)
+        response = await self._apost_with_retries(lambda: client.post(self.url, json=payload, timeout=self._async_timeout()))
+        response.raise_for_status()
+        return response.json()["response"]
+
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        *,
+        options: dict | None = None,
+        priority: int | None = None,
+        cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """Async variant of `generate_stream`."""
+
+        key = self._coalesce_key(prompt, options)
+        store, hit = await asyncio.to_thread(self._cache_lookup, key, prompt, options, cache)
+        if hit is not None:
+            yield hit
+            return
+
+        parts: list[str] = []
+        controller = get_llm_admission_controller(self.url)
+        client = get_async_http_client()
+        payload = self._generate_payload(prompt, options, stream=True)
+        async with controller.aslot(priority):
+            request = client.build_request("POST", self.url, json=payload, timeout=self._async_timeout())
+            response = await self._apost_with_retries(lambda: client.send(request, stream=True))
+            try:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    fragment = chunk.get("response") or ""
+                    if fragment:
+                        parts.append(fragment)
+                        yield fragment
+                    if chunk.get("done"):
+                        if store is not None:
+                            await asyncio.to_thread(store.put, key, "".join(parts).encode("utf-8"))
+                        break
+            finally:
+                await response.aclose()
+
+    async def _apost_with_retries(self, send) -> httpx.Response:
+        last_error = None
+        for _attempt in range(self.max_retries + 1):
+            try:
+                return await send()
+            except (httpx.TimeoutException, httpx.ConnectError) as exc:
+                last_error = exc
+        raise last_error
@@ -1,24 +1,40 @@
 import os
+from pathlib import Path
+from typing import Union
+
 from app.document_processing.txt_parser import txt_parser
 from app.document_processing.pdf_parser import pdf_parser
 from app.document_processing.docx_parser import docx_parser
 
 
+# Raw bytes, or a path to the file on disk (preferred for large uploads: parsers read
+# from the file instead of holding the whole document in memory).
+DocumentSource = Union[bytes, str, os.PathLike]
+
+
 PARSERS = {
     '.txt': txt_parser,
     '.pdf': pdf_parser,
     '.docx': docx_parser,
 }
 
-def parse_document(filename: str, content: bytes) :
-    extension = os.path.splitext(filename.lower())[1]
+def document_extension(filename: str) -> str:
+    """Lower-case extension of `filename`; ValueError if no parser supports it."""
 
+    extension = os.path.splitext(filename.lower())[1]
     if extension not in PARSERS:
         supported = ", ".join(sorted(PARSERS.keys()))
         raise ValueError(f"Unsupported file type '{extension}'. Supported types: {supported}")
+    return extension
+
+
+def parse_document(filename: str, content: DocumentSource) :
+    extension = document_extension(filename)
     
     parser = PARSERS[extension]
  
     if extension == ".txt":
+        if not isinstance(content, bytes):
+            content = Path(content).read_bytes()
         return parser(content.decode("utf-8"))
     return parser(content)
\ No newline at end of file
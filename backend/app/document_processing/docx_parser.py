@@ -6,13 +6,15 @@ from docx.table import Table
 from docx.text.paragraph import Paragraph
 
 
-def docx_parser(content: bytes) -> str:
-    """Extract plain text from a DOCX file.
+# Bump when extract_docx_blocks changes, so cached extractions are not reused.
+DOCX_EXTRACTOR_VERSION = "1"
 
-    Preserves paragraph breaks to keep the original document readable when shown as text.
+
+def extract_docx_blocks(content) -> list[str]:
+    """Paragraphs and table rows of a DOCX file (bytes or a path), in document order.
 
     Important: many handbooks store critical procedures/limits in tables. We therefore
-    extract both paragraphs and table cells (in document order).
+    extract both paragraphs and table cells.
     """
 
     def iter_block_items(doc: Document):
@@ -24,7 +26,7 @@ def docx_parser(content: bytes) -> str:
             elif tag.endswith("}tbl"):
                 yield Table(child, doc)
 
-    doc = Document(io.BytesIO(content))
+    doc = Document(io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else str(content))
     paragraphs: list[str] = []
 
     def clean_line(text: str) -> str:
@@ -60,4 +62,17 @@ def docx_parser(content: bytes) -> str:
                 seen_table_rows.add(row_key)
                 paragraphs.append(row_key)
 
-    return "\n\n".join(paragraphs).strip()
+    return paragraphs
+
+
+def join_docx_blocks(blocks: list[str]) -> str:
+    return "\n\n".join(blocks).strip()
+
+
+def docx_parser(content) -> str:
+    """Extract plain text from a DOCX file (bytes or a path).
+
+    Preserves paragraph breaks to keep the original document readable when shown as text.
+    """
+
+    return join_docx_blocks(extract_docx_blocks(content))
@@ -0,0 +1,94 @@
+"""Classification of extracted-text lines (TOC entry, page number, heading, noise, ...).
+
+Text cleanup looks at the same lines several times: noise stripping, TOC detection and
+removal, TOC entry extraction and the deterministic fallback/expansion all ask what a
+line is. `classify_line` runs the precompiled patterns once per distinct line and
+caches the result, so every later consumer gets the kind for the price of a lookup.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+
+BLANK = "blank"
+# Repository/licensing banners added by PDF download portals (IEEE Xplore etc.).
+NOISE = "noise"
+# "Page 12" or a bare number with 3+ digits.
+PAGE_NUMBER = "page_number"
+# Other bare numbers and number labels: "12", "3.2", "12/4".
+NUMBER = "number"
+# "Innhold", "Innholdsfortegnelse", "Contents", "Table of contents".
+TOC_HEADING = "toc_heading"
+# A table-of-contents entry: "1.2 Farlige stoffer 2" or "3 Innledning iv".
+TOC = "toc"
+# A numbered heading without page number: "2.1 Utslippskrav for anlegget".
+HEADING = "heading"
+CONTENT = "content"
+
+TOC_HEADING_RE = re.compile(r"^(innhold|innholdsfortegnelse|contents|table\s+of\s+contents)\b", re.IGNORECASE)
+_TOC_LINE_RE = re.compile(r"\d+(?:\.\d+)*\s+\S+.*\s+(?:\d{1,4}|(?i:[ivxlcdm]{1,6}))\s*$")
+_PAGE_NUMBER_RE = re.compile(r"page\s*\d+|\d{3,}", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\d+(?:[./]\d+)*")
+_HEADING_RE = re.compile(r"\d+(?:\.\d+)*\s+\S+(?:\s+\S+){0,10}")
+_TRAILING_PAGE_RE = re.compile(r"\s+[0-9]{1,4}\s*$")
+_TRAILING_ROMAN_PAGE_RE = re.compile(r"\s+[ivxlcdm]{1,6}\s*$", re.IGNORECASE)
+
+
+def _is_noise(lower: str) -> bool:
+    return (
+        "authorized licensed use" in lower
+        or ("downloaded on" in lower and "from ieee xplore" in lower)
+        or "restrictions apply" in lower
+    )
+
+
+@lru_cache(maxsize=16384)
+def classify_line(line: str) -> str:
+    """Kind of one line; surrounding whitespace is ignored.
+
+    Kinds are checked in the order NOISE, PAGE_NUMBER, NUMBER, TOC_HEADING, TOC, HEADING,
+    so a line gets exactly one kind.
+    """
+
+    s = line.strip()
+    if not s:
+        return BLANK
+    if _is_noise(s.lower()):
+        return NOISE
+    if s[0].isdigit() or s[0] in "Pp":
+        if _PAGE_NUMBER_RE.fullmatch(s):
+            return PAGE_NUMBER
+        if _NUMBER_RE.fullmatch(s):
+            return NUMBER
+    if TOC_HEADING_RE.match(s):
+        return TOC_HEADING
+    if s[0].isdigit():
+        if _TOC_LINE_RE.match(s):
+            return TOC
+        if _HEADING_RE.fullmatch(s):
+            return HEADING
+    return CONTENT
+
+
+def classify_lines(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """(kind, stripped line) for each line, lazily, so callers can stop early."""
+
+    for line in lines:
+        yield classify_line(line), line.strip()
+
+
+# Last characters a page marker can end with (IGNORECASE also folds "İ"/"ı" to "i").
+_PAGE_MARKER_END = frozenset("0123456789ivxlcdmIVXLCDMİı")
+
+
+def strip_page_marker(line: str) -> str:
+    """Remove a trailing page number or roman numeral ("Farlige stoffer 12" -> "Farlige stoffer")."""
+
+    tail = line.rstrip()
+    if not tail or tail[-1] not in _PAGE_MARKER_END:
+        return tail.lstrip()
+    s = _TRAILING_PAGE_RE.sub("", line).strip()
+    return _TRAILING_ROMAN_PAGE_RE.sub("", s).strip()
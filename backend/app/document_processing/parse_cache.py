@@ -0,0 +1,123 @@
+"""Persistent cache of raw per-page (PDF) / per-block (DOCX) extracted text.
+
+Entries are keyed by file sha256 and extractor version and hold the text *before*
+normalization, so re-parsing the same bytes or changing the normalization does not
+run pdfplumber/python-docx again. Bumping PDF_EXTRACTOR_VERSION/DOCX_EXTRACTOR_VERSION
+makes old entries unreachable; purge them with:
+
+    python -m app.document_processing.parse_cache --purge-stale
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from app.document_processing.docx_parser import DOCX_EXTRACTOR_VERSION, join_docx_blocks
+from app.document_processing.pdf_parser import PDF_EXTRACTOR_VERSION, join_pdf_pages
+from app.services.sqlite_cache import SqliteLruCache
+from app.workflow_db.config import get_repo_root
+
+
+logger = logging.getLogger(__name__)
+
+# extension -> (key prefix, joins cached pages/blocks into the parser's output)
+_EXTRACTORS: Dict[str, tuple[str, Callable[[list[str]], str]]] = {
+    ".pdf": (f"pdf:{PDF_EXTRACTOR_VERSION}:", join_pdf_pages),
+    ".docx": (f"docx:{DOCX_EXTRACTOR_VERSION}:", join_docx_blocks),
+}
+
+_CACHES: Dict[Path, SqliteLruCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_parse_cache() -> Optional[SqliteLruCache]:
+    """Process-wide parse cache (one entry per document), or None when disabled."""
+
+    max_entries = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "500"))
+    if max_entries <= 0:
+        return None
+
+    default = get_repo_root() / "databases" / "data" / "cache" / "parsed_pages.sqlite3"
+    path = Path(os.getenv("PARSE_CACHE_PATH", str(default)))
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = SqliteLruCache(path, max_entries=max_entries)
+            _CACHES[path] = cache
+        return cache
+
+
+def is_cacheable(extension: str) -> bool:
+    return extension in _EXTRACTORS
+
+
+def join_pages(extension: str, pages: list[str]) -> str:
+    return _EXTRACTORS[extension][1](pages)
+
+
+def cached_pages(extension: str, content_sha256: str) -> Optional[list[str]]:
+    cache = get_parse_cache()
+    if cache is None or extension not in _EXTRACTORS:
+        return None
+    try:
+        value = cache.get(_EXTRACTORS[extension][0] + content_sha256)
+        return json.loads(zlib.decompress(value).decode("utf-8")) if value is not None else None
+    except Exception:
+        logger.exception("Parse cache lookup failed for %s", content_sha256)
+        return None
+
+
+def store_pages(extension: str, content_sha256: str, pages: list[str]) -> None:
+    cache = get_parse_cache()
+    if cache is None or extension not in _EXTRACTORS:
+        return
+    value = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"), 6)
+    try:
+        cache.put(_EXTRACTORS[extension][0] + content_sha256, value)
+    except Exception:
+        logger.exception("Failed to store parsed pages for %s", content_sha256)
+
+
+def purge_stale_parse_cache() -> int:
+    """Delete entries written by other extractor versions; returns the number removed."""
+
+    cache = get_parse_cache()
+    if cache is None:
+        return 0
+    return cache.delete_except_prefixes(prefix for prefix, _join in _EXTRACTORS.values())
+
+
+def parse_cache_stats() -> dict:
+    cache = get_parse_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or purge the document parse cache.")
+    parser.add_argument("--purge-stale", action="store_true", help="remove entries from old extractor versions")
+    parser.add_argument("--clear", action="store_true", help="remove all entries")
+    args = parser.parse_args()
+
+    cache = get_parse_cache()
+    if cache is None:
+        print("Parse cache is disabled (PARSE_CACHE_MAX_ENTRIES=0)")
+        return
+    if args.clear:
+        cache.clear()
+        print("Cleared parse cache")
+    elif args.purge_stale:
+        print(f"Removed {purge_stale_parse_cache()} stale entries")
+    print(json.dumps(parse_cache_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
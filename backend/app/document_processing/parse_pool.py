@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.document_processing.document_parsing import DocumentSource, document_extension, parse_document
+from app.document_processing.docx_parser import extract_docx_blocks
+from app.document_processing.parse_cache import cached_pages, is_cacheable, join_pages, store_pages
+from app.document_processing.pdf_parser import extract_pdf_pages, pdf_page_count
+
+
+logger = logging.getLogger(__name__)
+
+
+class ParseFailedError(RuntimeError):
+    """Raised when a parser process crashed or did not finish in time."""
+
+
+class ParseTimeoutError(ParseFailedError):
+    pass
+
+
+_PDF_MIN_PAGES_PER_TASK = 8
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_timeout_s() -> float:
+    return float(os.getenv("PARSE_TIMEOUT_S", "120"))
+
+
+def _parse_workers() -> int:
+    return max(1, int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 2))))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            workers = _parse_workers()
+            # spawn: the API process runs threads (job workers, Chroma), which fork does not copy safely.
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Kill the worker processes of `executor` (a stuck parse cannot be cancelled any other way)."""
+
+    global _executor
+
+    with _lock:
+        if _executor is not executor:
+            return
+        _executor = None
+    # ProcessPoolExecutor has no public way to kill a busy worker.
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        try:
+            process.terminate()
+        except Exception:
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_calls(calls: list[tuple[Callable[..., Any], tuple[Any, ...]]], timeout_s: Optional[float]) -> list[Any]:
+    """Run picklable `fn(*args)` calls in the parser process pool; results in call order.
+
+    All calls share one deadline. A timeout replaces the whole pool; calls from other
+    callers that were running in it are resubmitted once to the new pool instead of failing.
+    """
+
+    timeout_s = _parse_timeout_s() if timeout_s is None else float(timeout_s)
+    deadline = time.monotonic() + timeout_s
+    for attempt in range(2):
+        executor = _get_executor()
+        futures = []
+        try:
+            futures = [executor.submit(fn, *args) for fn, args in calls]
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeoutError:
+            logger.warning("Parser process timed out after %.0fs; restarting the parse pool", timeout_s)
+            _discard_executor(executor)
+            raise ParseTimeoutError(f"Parsing did not finish within {timeout_s:.0f}s")
+        except BrokenProcessPool:
+            with _lock:
+                replaced = _executor is not executor
+            if replaced and attempt == 0:
+                # Killed because of another caller's timeout; our own parse was fine.
+                continue
+            _discard_executor(executor)
+            raise ParseFailedError("Parser process crashed")
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    raise ParseFailedError("Parser process crashed")
+
+
+def run_in_parse_pool(fn: Callable[..., Any], *args: Any, timeout_s: Optional[float] = None) -> Any:
+    """Run a picklable `fn(*args)` in the parser process pool and wait at most `timeout_s`."""
+
+    return _run_calls([(fn, args)], timeout_s)[0]
+
+
+def _page_ranges(page_count: int) -> list[tuple[int, int]]:
+    # A few ranges per worker evens out pages that are much slower than others (scans, tables).
+    chunk = max(_PDF_MIN_PAGES_PER_TASK, -(-page_count // (_parse_workers() * 2)))
+    return [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+
+
+def _extract_pdf_pages_in_pool(source: DocumentSource, timeout_s: float) -> list[str]:
+    parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+    if isinstance(source, (bytes, bytearray)) or parallel_min_pages <= 0 or _parse_workers() <= 1:
+        return run_in_parse_pool(extract_pdf_pages, source, timeout_s=timeout_s)
+
+    started = time.monotonic()
+    page_count = run_in_parse_pool(pdf_page_count, source, timeout_s=timeout_s)
+    remaining_s = max(0.0, timeout_s - (time.monotonic() - started))
+    if page_count < parallel_min_pages:
+        return run_in_parse_pool(extract_pdf_pages, source, timeout_s=remaining_s)
+    parts = _run_calls(
+        [(extract_pdf_pages, (source, start, stop)) for start, stop in _page_ranges(page_count)],
+        remaining_s,
+    )
+    return [text for part in parts for text in part]
+
+
+def parse_document_in_pool(
+    filename: str,
+    source: DocumentSource,
+    *,
+    content_sha256: Optional[str] = None,
+    timeout_s: Optional[float] = None,
+) -> str:
+    """`parse_document` in separate processes, so CPU-heavy PDFs use other cores and cannot block the API.
+
+    Long PDFs on disk are split into page ranges that are extracted in parallel,
+    each worker opening the file itself. With `content_sha256`, extracted PDF pages and
+    DOCX blocks are read from / written to the parse cache.
+    """
+
+    timeout_s = _parse_timeout_s() if timeout_s is None else float(timeout_s)
+    extension = document_extension(filename)
+    if not is_cacheable(extension):
+        return run_in_parse_pool(parse_document, filename, source, timeout_s=timeout_s)
+
+    pages = cached_pages(extension, content_sha256) if content_sha256 else None
+    if pages is None:
+        if extension == ".pdf":
+            pages = _extract_pdf_pages_in_pool(source, timeout_s)
+        else:
+            pages = run_in_parse_pool(extract_docx_blocks, source, timeout_s=timeout_s)
+        if content_sha256:
+            store_pages(extension, content_sha256, pages)
+    return join_pages(extension, pages)
+
+
+def shutdown_parse_pool() -> None:
+    global _executor
+
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,22 @@
 import io
 import re
+from typing import Optional
 
 import pdfplumber
 
 
 _PUA_RE = re.compile(r"[\uE000-\uF8FF]")
+_PUA_URL_FIXES = (
+    (re.compile(r"h[\uE000-\uF8FF]ps://", re.IGNORECASE), "https://"),
+    (re.compile(r"h[\uE000-\uF8FF]p://", re.IGNORECASE), "http://"),
+    (re.compile(r"www\.[\uE000-\uF8FF]", re.IGNORECASE), "www."),
+)
+_HYPHENATED_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_INLINE_WHITESPACE_RE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_NEWLINES_RE = re.compile(r"\n+")
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 
 def _space_ratio(s: str) -> float:
@@ -19,7 +31,7 @@ def _looks_like_glued_text(s: str) -> bool:
     if not s:
         return False
 
-    sample = re.sub(r"\s+", " ", s).strip()
+    sample = _WHITESPACE_RE.sub(" ", s).strip()
     if len(sample) < 400:
         return False
 
@@ -40,66 +52,104 @@ def _normalize_pdf_text(text: str) -> str:
     s = text.replace("\r\n", "\n")
 
     # Fix common private-use glyph issues in URLs like "hps" -> "https".
-    s = re.sub(r"h[\uE000-\uF8FF]ps://", "https://", s, flags=re.IGNORECASE)
-    s = re.sub(r"h[\uE000-\uF8FF]p://", "http://", s, flags=re.IGNORECASE)
-    s = re.sub(r"www\.[\uE000-\uF8FF]", "www.", s, flags=re.IGNORECASE)
-    s = _PUA_RE.sub("", s)
+    if _PUA_RE.search(s):
+        for pattern, replacement in _PUA_URL_FIXES:
+            s = pattern.sub(replacement, s)
+        s = _PUA_RE.sub("", s)
 
     # De-hyphenate when a word is broken across a line break.
-    s = re.sub(r"(\w)-\n(\w)", r"\1\2", s)
+    if "-\n" in s:
+        s = _HYPHENATED_BREAK_RE.sub(r"\1\2", s)
 
     # Normalize whitespace while preserving paragraph breaks.
-    s = re.sub(r"[ \t\f\v]+", " ", s)
-    s = re.sub(r"\n{3,}", "\n\n", s)
+    s = _INLINE_WHITESPACE_RE.sub(" ", s)
+    s = _BLANK_LINES_RE.sub("\n\n", s)
 
     blocks = [b.strip() for b in s.split("\n\n") if b.strip()]
     cleaned_blocks: list[str] = []
     for b in blocks:
         # Within a paragraph, turn single newlines into spaces.
-        b2 = re.sub(r"\n+", " ", b)
-        b2 = re.sub(r"\s{2,}", " ", b2).strip()
+        b2 = _NEWLINES_RE.sub(" ", b)
+        b2 = _MULTI_SPACE_RE.sub(" ", b2).strip()
         if b2:
             cleaned_blocks.append(b2)
 
     return "\n\n".join(cleaned_blocks).strip()
 
 
-def pdf_parser(content: bytes) -> str:
-    pages_text: list[str] = []
+# Bump when page extraction (not _normalize_pdf_text) changes, so cached pages are not reused.
+PDF_EXTRACTOR_VERSION = "2"
+
+# Tried in order; later ones only when the previous result is empty or "glued".
+_TEXT_STRATEGIES = (
+    {"x_tolerance": 2, "y_tolerance": 3},
+    {},
+    {"layout": True},
+)
+
+
+def _open_pdf(content):
+    source = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else str(content)
+    return pdfplumber.open(source)
+
+
+def _extract_page_text(page) -> str:
+    extracted = ""
+    # Different PDFs respond to different params, but most pages are fine with the first
+    # strategy; escalate only when it gives nothing usable, keeping the longest result.
+    for kwargs in _TEXT_STRATEGIES:
+        try:
+            t = page.extract_text(**kwargs) or ""
+        except TypeError:
+            # Older pdfplumber/pdfminer versions might not support some kwargs.
+            continue
+        if len(t) > len(extracted):
+            extracted = t
+        if extracted.strip() and not _looks_like_glued_text(extracted):
+            break
+
+    # If the extractor returns “glued” text, fall back to word extraction.
+    if not extracted or _looks_like_glued_text(extracted):
+        try:
+            words = page.extract_words(
+                keep_blank_chars=False,
+                use_text_flow=True,
+            )
+            extracted = " ".join((w.get("text") or "").strip() for w in words if (w.get("text") or "").strip())
+        except Exception:
+            # Keep the original extracted (even if empty); downstream can still handle.
+            pass
+
+    return extracted.strip()
+
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
-        for page in pdf.pages:
-            extracted_candidates: list[str] = []
-            # Try a few extraction strategies; different PDFs respond to different params.
-            for kwargs in (
-                {"x_tolerance": 2, "y_tolerance": 3},
-                {},
-                {"layout": True},
-            ):
-                try:
-                    t = page.extract_text(**kwargs) if kwargs else page.extract_text()
-                except TypeError:
-                    # Older pdfplumber/pdfminer versions might not support some kwargs.
-                    continue
-                if t:
-                    extracted_candidates.append(t)
-
-            extracted = max(extracted_candidates, key=len, default="")
-
-            # If the extractor returns “glued” text, fall back to word extraction.
-            if not extracted or _looks_like_glued_text(extracted):
-                try:
-                    words = page.extract_words(
-                        keep_blank_chars=False,
-                        use_text_flow=True,
-                    )
-                    extracted = " ".join((w.get("text") or "").strip() for w in words if (w.get("text") or "").strip())
-                except Exception:
-                    # Keep the original extracted (even if empty); downstream can still handle.
-                    pass
-
-            extracted = extracted.strip()
+def pdf_page_count(content) -> int:
+    with _open_pdf(content) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(content, start: int = 0, stop: Optional[int] = None) -> list[str]:
+    """Raw text of pages [start, stop); empty pages are dropped.
+
+    Each call opens the document itself, so page ranges can be extracted in separate processes.
+    """
+
+    pages_text: list[str] = []
+    with _open_pdf(content) as pdf:
+        for page in pdf.pages[start:stop]:
+            extracted = _extract_page_text(page)
+            # Drop pdfminer's cached layout objects; they add up on long manuals.
+            page.close()
             if extracted:
                 pages_text.append(extracted)
+    return pages_text
+
+
+def join_pdf_pages(pages_text: list[str]) -> str:
+    return _normalize_pdf_text("\n\n".join(pages_text))
+
+
+def pdf_parser(content) -> str:
+    """Extract text from a PDF given as bytes or as a path (a path is read lazily, page by page)."""
 
-    return _normalize_pdf_text("\n\n".join(pages_text))
\ No newline at end of file
+    return join_pdf_pages(extract_pdf_pages(content))
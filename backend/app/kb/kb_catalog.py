@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from .kb_reader import doc_metadata, iter_kb_markdown_files, kb_raw_root, read_text_best_effort, split_front_matter
+
+
+@dataclass(frozen=True)
+class KbCatalogEntry:
+    kb_path: str
+    path: Path
+    title: str
+    category: str
+    author: str
+    date: str
+    size: int
+    mtime_ns: int
+    body_hash: str
+
+
+class KbCatalog:
+    """Cached metadata for every KB markdown file.
+
+    Files are only re-read when their size/mtime changed since the last refresh;
+    walking the tree (stat only) happens at most every `refresh_interval_s` seconds
+    unless `invalidate()` was called, e.g. after the API wrote or deleted a file.
+    `version` is bumped whenever an entry is added, changed or removed so derived
+    indexes can tell when they need to resync.
+    """
+
+    def __init__(
+        self,
+        *,
+        root: Callable[[], Path] = kb_raw_root,
+        refresh_interval_s: float = 2.0,
+    ) -> None:
+        self._root = root
+        self.refresh_interval_s = max(0.0, float(refresh_interval_s))
+        self._lock = threading.Lock()
+        self._entries: dict[str, KbCatalogEntry] = {}
+        self._last_refresh = 0.0
+        self._stale = True
+        self.version = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stale = True
+
+    def entries(self, *, category: Optional[str] = None) -> list[KbCatalogEntry]:
+        """Catalog entries sorted by path; `category` ('All'/None = no filter) is exact-match."""
+
+        self._refresh_if_needed()
+        with self._lock:
+            items = sorted(self._entries.values(), key=lambda e: e.kb_path.lower())
+        wanted = (category or "").strip()
+        if wanted and wanted != "All":
+            items = [e for e in items if e.category == wanted]
+        return items
+
+    def get(self, kb_path: str) -> Optional[KbCatalogEntry]:
+        self._refresh_if_needed()
+        with self._lock:
+            return self._entries.get(kb_path)
+
+    def _refresh_if_needed(self) -> None:
+        with self._lock:
+            if self._stale or time.monotonic() - self._last_refresh >= self.refresh_interval_s:
+                self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        root = self._root().resolve()
+        current: dict[str, KbCatalogEntry] = {}
+        changed = False
+
+        for p in iter_kb_markdown_files(root):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            kb_path = p.resolve().relative_to(root).as_posix()
+
+            previous = self._entries.get(kb_path)
+            if previous is not None and previous.size == st.st_size and previous.mtime_ns == st.st_mtime_ns:
+                current[kb_path] = previous
+                continue
+
+            entry = _load_entry(p, kb_path=kb_path, size=st.st_size, mtime_ns=st.st_mtime_ns)
+            if entry is None:
+                continue
+            current[kb_path] = entry
+            changed = True
+
+        if changed or current.keys() != self._entries.keys():
+            self.version += 1
+        self._entries = current
+        self._last_refresh = time.monotonic()
+        self._stale = False
+
+
+def _load_entry(path: Path, *, kb_path: str, size: int, mtime_ns: int) -> Optional[KbCatalogEntry]:
+    try:
+        raw = read_text_best_effort(path)
+    except OSError:
+        return None
+
+    title, category, author, date = doc_metadata(raw, kb_path=kb_path)
+    _, body = split_front_matter(raw)
+    return KbCatalogEntry(
+        kb_path=kb_path,
+        path=path,
+        title=title,
+        category=category,
+        author=author,
+        date=date,
+        size=size,
+        mtime_ns=mtime_ns,
+        body_hash=hashlib.sha256((body or "").encode("utf-8")).hexdigest(),
+    )
+
+
+_catalog: Optional[KbCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_kb_catalog() -> KbCatalog:
+    global _catalog
+
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = KbCatalog(refresh_interval_s=float(os.getenv("KB_CATALOG_REFRESH_S", "2")))
+        return _catalog
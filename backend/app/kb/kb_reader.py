@@ -44,8 +44,8 @@ def resolve_kb_path(kb_path: str) -> Path:
     return full
 
 
-def iter_kb_markdown_files() -> list[Path]:
-    root = kb_raw_root()
+def iter_kb_markdown_files(root: Optional[Path] = None) -> list[Path]:
+    root = root or kb_raw_root()
     if not root.exists():
         return []
 
@@ -140,7 +140,7 @@ def _normalize_category(value: str) -> str:
     return v[:1].upper() + v[1:]
 
 
-def doc_metadata(markdown: str, *, kb_path: str) -> tuple[str, str, str, str, str]:
+def doc_metadata(markdown: str, *, kb_path: str) -> tuple[str, str, str, str]:
     front, body = split_front_matter(markdown)
 
     title = ""
@@ -198,86 +198,42 @@ def get_kb_doc(kb_path: str) -> KbDoc:
 
 
 def kb_stats(categories: Optional[list[str]] = None) -> tuple[int, dict[str, int]]:
-    files = iter_kb_markdown_files()
-    by_cat: dict[str, int] = {}
-    total = 0
+    from .kb_catalog import get_kb_catalog
 
-    for p in files:
-        total += 1
-        rel = p.resolve().relative_to(kb_raw_root().resolve()).as_posix()
-        try:
-            raw = read_text_best_effort(p, max_chars=60_000)
-        except OSError:
-            continue
-        _, cat, _, _ = doc_metadata(raw, kb_path=rel)
-        by_cat[cat] = by_cat.get(cat, 0) + 1
+    entries = get_kb_catalog().entries()
+    by_cat: dict[str, int] = {}
+    for entry in entries:
+        by_cat[entry.category] = by_cat.get(entry.category, 0) + 1
 
     if categories:
         filtered = {cat: by_cat.get(cat, 0) for cat in categories}
-        return total, filtered
-
-    return total, by_cat
+        return len(entries), filtered
 
-
-def _tokenize(text: str, *, max_tokens: int = 128) -> list[str]:
-    tokens = _WORD_RE.findall((text or "").lower())
-    if len(tokens) > max_tokens:
-        tokens = tokens[:max_tokens]
-    return tokens
+    return len(entries), by_cat
 
 
 def search_kb(query: str, *, category: Optional[str] = None, limit: int = 3) -> list[KbDoc]:
-    q_tokens = _tokenize(query)
-    if not q_tokens:
-        return []
+    """Lexical (BM25) search over KB titles and bodies."""
 
-    wanted_cat = _normalize_category(category) if category and category != "All" else ""
+    from .kb_search_index import get_kb_search_index
 
-    scored: list[tuple[int, KbDoc]] = []
-    root = kb_raw_root().resolve()
+    wanted_cat = _normalize_category(category) if category and category != "All" else ""
+    hits = get_kb_search_index().search(query, category=wanted_cat or None, limit=limit)
 
-    for p in iter_kb_markdown_files():
+    docs: list[KbDoc] = []
+    for hit in hits:
         try:
-            raw = read_text_best_effort(p, max_chars=200_000)
-        except OSError:
-            continue
-
-        rel = p.resolve().relative_to(root).as_posix()
-        title, cat, author, date = doc_metadata(raw, kb_path=rel)
-        if wanted_cat and cat != wanted_cat:
+            raw = read_text_best_effort(resolve_kb_path(hit.kb_path), max_chars=200_000)
+        except (OSError, ValueError):
             continue
-
-        front, body = split_front_matter(raw)
-        hay = f"{title}\n\n{body}" if isinstance(front, dict) else raw
-        hay_low = hay.lower()
-
-        score = 0
-        for tok in q_tokens:
-            if not tok:
-                continue
-            if tok in (title or "").lower():
-                score += 6
-            # cheap term match count in a limited window
-            score += min(10, hay_low.count(tok))
-
-        if score <= 0:
-            continue
-
-        snippet = (body or "").strip()[:1200]
-        content = raw
-        scored.append(
-            (
-                score,
-                KbDoc(
-                    kb_path=rel,
-                    title=title,
-                    category=cat,
-                    author=author,
-                    date=date,
-                    content=content,
-                ),
+        docs.append(
+            KbDoc(
+                kb_path=hit.kb_path,
+                title=hit.title,
+                category=hit.category,
+                author=hit.author,
+                date=hit.date,
+                content=raw,
             )
         )
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [doc for _, doc in scored[: max(1, limit)]]
+    return docs
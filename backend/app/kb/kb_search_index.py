@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.vector_store.config import _repo_root_from_here
+
+from .kb_catalog import KbCatalog, KbCatalogEntry, get_kb_catalog
+from .kb_reader import _WORD_RE, read_text_best_effort, split_front_matter
+
+
+# Title matches used to add a flat bonus in the old linear scan; in BM25 terms we
+# count each title token this many times.
+_TITLE_WEIGHT = 3
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+@dataclass(frozen=True)
+class _IndexedDoc:
+    kb_path: str
+    body_hash: str
+    title: str
+    category: str
+    author: str
+    date: str
+    length: int
+
+
+@dataclass(frozen=True)
+class KbSearchHit:
+    kb_path: str
+    title: str
+    category: str
+    author: str
+    date: str
+    score: float
+
+
+def tokenize(text: str) -> list[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def _doc_terms(entry: KbCatalogEntry) -> Optional[Counter]:
+    try:
+        raw = read_text_best_effort(entry.path)
+    except OSError:
+        return None
+    _, body = split_front_matter(raw)
+    terms = Counter(tokenize(body or ""))
+    for tok in tokenize(entry.title):
+        terms[tok] += _TITLE_WEIGHT
+    return terms
+
+
+class KbSearchIndex:
+    """BM25 inverted index over KB titles and bodies.
+
+    Postings live in memory; per-document term frequencies are persisted in SQLite
+    so a restart does not have to re-read the KB. The index follows the KB catalog
+    and only re-tokenizes documents whose body hash or metadata changed.
+    """
+
+    def __init__(self, path: Path, *, catalog: Optional[KbCatalog] = None) -> None:
+        self.path = Path(path)
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._docs: dict[str, _IndexedDoc] = {}
+        self._terms: dict[str, dict[str, int]] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+        self._synced_version: Optional[int] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lexical_docs (
+                kb_path TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                title TEXT NOT NULL,
+                category TEXT NOT NULL,
+                author TEXT NOT NULL,
+                date TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                terms BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._load()
+
+    @property
+    def catalog(self) -> KbCatalog:
+        return self._catalog or get_kb_catalog()
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT kb_path, body_hash, title, category, author, date, length, terms FROM lexical_docs"
+        ).fetchall()
+        for kb_path, body_hash, title, category, author, date, length, blob in rows:
+            try:
+                terms = json.loads(zlib.decompress(blob).decode("utf-8"))
+            except (zlib.error, ValueError):
+                continue
+            self._add(_IndexedDoc(kb_path, body_hash, title, category, author, date, int(length)), terms)
+
+    def _add(self, doc: _IndexedDoc, terms: dict[str, int]) -> None:
+        self._docs[doc.kb_path] = doc
+        self._terms[doc.kb_path] = terms
+        self._total_length += doc.length
+        for tok, tf in terms.items():
+            self._postings.setdefault(tok, {})[doc.kb_path] = tf
+
+    def _remove(self, kb_path: str) -> None:
+        doc = self._docs.pop(kb_path, None)
+        terms = self._terms.pop(kb_path, None) or {}
+        if doc is not None:
+            self._total_length -= doc.length
+        for tok in terms:
+            postings = self._postings.get(tok)
+            if postings is None:
+                continue
+            postings.pop(kb_path, None)
+            if not postings:
+                del self._postings[tok]
+
+    def sync(self) -> None:
+        """Bring the index in line with the KB catalog (cheap when nothing changed)."""
+
+        catalog = self.catalog
+        entries = catalog.entries()
+        version = catalog.version
+        with self._lock:
+            if self._synced_version == version:
+                return
+
+            seen: set[str] = set()
+            upserts: list[tuple] = []
+            for entry in entries:
+                seen.add(entry.kb_path)
+                doc = self._docs.get(entry.kb_path)
+                if doc is not None and (doc.body_hash, doc.title, doc.category, doc.author, doc.date) == (
+                    entry.body_hash,
+                    entry.title,
+                    entry.category,
+                    entry.author,
+                    entry.date,
+                ):
+                    continue
+
+                terms = _doc_terms(entry)
+                if terms is None:
+                    continue
+                self._remove(entry.kb_path)
+                new_doc = _IndexedDoc(
+                    kb_path=entry.kb_path,
+                    body_hash=entry.body_hash,
+                    title=entry.title,
+                    category=entry.category,
+                    author=entry.author,
+                    date=entry.date,
+                    length=sum(terms.values()),
+                )
+                self._add(new_doc, dict(terms))
+                blob = zlib.compress(json.dumps(dict(terms), ensure_ascii=False).encode("utf-8"))
+                upserts.append(
+                    (
+                        new_doc.kb_path,
+                        new_doc.body_hash,
+                        new_doc.title,
+                        new_doc.category,
+                        new_doc.author,
+                        new_doc.date,
+                        new_doc.length,
+                        sqlite3.Binary(blob),
+                    )
+                )
+
+            removed = [p for p in self._docs if p not in seen]
+            for kb_path in removed:
+                self._remove(kb_path)
+
+            if upserts:
+                self._conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO lexical_docs (kb_path, body_hash, title, category, author, date, length, terms)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    upserts,
+                )
+            if removed:
+                self._conn.executemany("DELETE FROM lexical_docs WHERE kb_path = ?", [(p,) for p in removed])
+            self._conn.commit()
+            self._synced_version = version
+
+    def search(self, query: str, *, category: Optional[str] = None, limit: int = 3) -> list[KbSearchHit]:
+        q_tokens = list(dict.fromkeys(tokenize(query)[:128]))
+        if not q_tokens:
+            return []
+
+        self.sync()
+
+        with self._lock:
+            n_docs = len(self._docs)
+            if n_docs == 0:
+                return []
+            avg_len = (self._total_length / n_docs) or 1.0
+
+            scores: dict[str, float] = {}
+            for tok in q_tokens:
+                postings = self._postings.get(tok)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for kb_path, tf in postings.items():
+                    doc = self._docs[kb_path]
+                    if category and doc.category != category:
+                        continue
+                    norm = _BM25_K1 * (1.0 - _BM25_B + _BM25_B * doc.length / avg_len)
+                    scores[kb_path] = scores.get(kb_path, 0.0) + idf * tf * (_BM25_K1 + 1.0) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[: max(1, limit)]
+            return [
+                KbSearchHit(
+                    kb_path=kb_path,
+                    title=self._docs[kb_path].title,
+                    category=self._docs[kb_path].category,
+                    author=self._docs[kb_path].author,
+                    date=self._docs[kb_path].date,
+                    score=score,
+                )
+                for kb_path, score in ranked
+            ]
+
+
+_index: Optional[KbSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def _default_index_path() -> Path:
+    default = Path(_repo_root_from_here()) / "databases" / "knowledge_base" / "index" / "lexical_index.sqlite3"
+    return Path(os.getenv("KB_LEXICAL_INDEX_PATH", str(default)))
+
+
+def get_kb_search_index() -> KbSearchIndex:
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = KbSearchIndex(_default_index_path())
+        return _index
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from .kb_reader import _WORD_RE, split_front_matter
+
+
+MINHASH_PERMUTATIONS = 128
+# 64 bands x 2 rows: documents with Jaccard >= ~0.12 become candidates with high probability.
+LSH_BANDS = 64
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# MinHash banding only finds pairs with a high Jaccard similarity, which a short text
+# contained in a long document does not have. For containment every shingle whose hash
+# is divisible by the rate is kept as a sample: a contained text shares all of its
+# samples with the document, however long the document is.
+CONTAINMENT_SAMPLE_RATE = 8
+# Minimum share of the query's samples a document must contain to become a candidate.
+CONTAINMENT_MIN_SHARE = 0.1
+
+# Fixed seed so signatures stay comparable across processes and persisted indexes.
+_rng = np.random.default_rng(0x5EED_4B42)
+_MINHASH_A = _rng.integers(1, 2**63, size=MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_MINHASH_B = _rng.integers(0, 2**63, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_EMPTY_SIGNATURE = np.full(MINHASH_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+
+def tokenize_for_similarity(text: str, *, max_tokens: int = 6000) -> list[str]:
+    tokens = _WORD_RE.findall((text or "").lower())
+    if len(tokens) > max_tokens:
+        tokens = tokens[:max_tokens]
+    return tokens
+
+
+# "rolling" (default): vectorized polynomial hash over per-token hashes.
+# "blake2b": legacy per-window blake2b of the joined tokens (identical values to older releases).
+SHINGLE_HASH_MODE = os.getenv("SIMILARITY_SHINGLE_HASH", "rolling").strip().lower() or "rolling"
+# Part of every persisted cache key that contains shingle hashes or signatures.
+SHINGLE_VERSION = f"5gram-{SHINGLE_HASH_MODE}-v1"
+
+_ROLLING_BASE = np.uint64(0x100000001B3)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer; spreads the polynomial hash over all 64 bits.
+    with np.errstate(over="ignore"):
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xBF58476D1CE4E5B9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def _first_unique(values: np.ndarray, max_shingles: int) -> np.ndarray:
+    """Unique values in order of first occurrence, capped like the original set-building loop."""
+
+    uniq, first_idx = np.unique(values, return_index=True)
+    if uniq.size <= max_shingles:
+        return uniq
+    keep = np.sort(first_idx)[:max_shingles]
+    return values[keep]
+
+
+def _rolling_shingle_hashes(tokens: list[str], n: int) -> np.ndarray:
+    vocab: dict[str, int] = {}
+    ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int64, count=len(tokens))
+    token_hashes = np.fromiter((_token_hash(t) for t in vocab), dtype=np.uint64, count=len(vocab))[ids]
+
+    windows = len(tokens) - n + 1
+    acc = np.zeros(windows, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(n):
+            acc = acc * _ROLLING_BASE + token_hashes[j : j + windows]
+    return _mix64(acc)
+
+
+def _blake2b_shingle_hashes(tokens: list[str], n: int, max_shingles: int) -> np.ndarray:
+    out: dict[int, None] = {}
+    for i in range(0, len(tokens) - n + 1):
+        sh = " ".join(tokens[i : i + n])
+        h = hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest()
+        out[int.from_bytes(h, "big")] = None
+        if len(out) >= max_shingles:
+            break
+    return np.fromiter(out, dtype=np.uint64, count=len(out))
+
+
+def shingle_hashes(
+    tokens: list[str],
+    *,
+    n: int = 5,
+    max_shingles: int = 20000,
+    mode: Optional[str] = None,
+) -> np.ndarray:
+    """Unique 64-bit hashes of the `n`-token windows of `tokens` (at most `max_shingles`)."""
+
+    if n <= 0:
+        raise ValueError("n must be >= 1")
+    if len(tokens) < n:
+        return np.empty(0, dtype=np.uint64)
+
+    if (mode or SHINGLE_HASH_MODE) == "blake2b":
+        return _blake2b_shingle_hashes(tokens, n, max_shingles)
+    return _first_unique(_rolling_shingle_hashes(tokens, n), max_shingles)
+
+
+def shingles(tokens: list[str], *, n: int = 5, max_shingles: int = 20000, mode: Optional[str] = None) -> set[int]:
+    return set(shingle_hashes(tokens, n=n, max_shingles=max_shingles, mode=mode).tolist())
+
+
+def overlap_metrics(new_set: set[int], existing_set: set[int]) -> tuple[float, float, float]:
+    """Return (jaccard, coverage_new, coverage_existing) for two shingle sets."""
+
+    if not new_set or not existing_set:
+        return 0.0, 0.0, 0.0
+
+    inter = len(new_set & existing_set)
+    union = len(new_set | existing_set)
+    jaccard = inter / union if union else 0.0
+    coverage_new = inter / len(new_set) if new_set else 0.0
+    coverage_existing = inter / len(existing_set) if existing_set else 0.0
+    return jaccard, coverage_new, coverage_existing
+
+
+def shingle_array(text: str) -> np.ndarray:
+    """Shingles of `text` as a sorted, unique uint64 array (compact form used by the caches)."""
+
+    return np.sort(shingle_hashes(tokenize_for_similarity(text)))
+
+
+def overlap_metrics_sorted(new_arr: np.ndarray, existing_arr: np.ndarray) -> tuple[float, float, float]:
+    """Same as `overlap_metrics` for sorted unique uint64 arrays."""
+
+    if new_arr.size == 0 or existing_arr.size == 0:
+        return 0.0, 0.0, 0.0
+
+    inter = int(np.intersect1d(new_arr, existing_arr, assume_unique=True).size)
+    union = int(new_arr.size + existing_arr.size - inter)
+    jaccard = inter / union if union else 0.0
+    return jaccard, inter / new_arr.size, inter / existing_arr.size
+
+
+def similarity_metrics(new_text: str, existing_text: str) -> tuple[float, float, float]:
+    return overlap_metrics_sorted(shingle_array(new_text), shingle_array(existing_text))
+
+
+def similarity_text(markdown: str) -> tuple[Optional[str], str]:
+    """Return (title, text) used for similarity: front matter title/id followed by the body."""
+
+    front, body = split_front_matter(markdown)
+    title = None
+    if isinstance(front, dict):
+        maybe_title = front.get("title") or front.get("id")
+        if isinstance(maybe_title, str) and maybe_title.strip():
+            title = maybe_title.strip()
+    return title, (title + "\n\n" if title else "") + (body or "")
+
+
+def minhash_signature(shingle_hashes: Union[np.ndarray, Iterable[int]], *, chunk_size: int = 4096) -> np.ndarray:
+    """MinHash signature over 64-bit shingle hashes (multiply-shift hashing, wraps mod 2**64)."""
+
+    if isinstance(shingle_hashes, np.ndarray):
+        values = shingle_hashes.astype(np.uint64, copy=False)
+    else:
+        values = np.fromiter(shingle_hashes, dtype=np.uint64)
+    if values.size == 0:
+        return _EMPTY_SIGNATURE.copy()
+
+    signature = _EMPTY_SIGNATURE.copy()
+    with np.errstate(over="ignore"):
+        for start in range(0, values.size, chunk_size):
+            part = values[start : start + chunk_size]
+            hashed = _MINHASH_A[:, None] * part[None, :] + _MINHASH_B[:, None]
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+    return signature
+
+
+def lsh_band_keys(signature: np.ndarray) -> list[bytes]:
+    """One bucket key per band; the band index is part of the key."""
+
+    bands = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [i.to_bytes(2, "big") + bands[i].tobytes() for i in range(LSH_BANDS)]
+
+
+def containment_samples(shingle_arr: np.ndarray) -> np.ndarray:
+    """The shingles of a sorted shingle array that are kept for containment lookups (still sorted)."""
+
+    return shingle_arr[shingle_arr % np.uint64(CONTAINMENT_SAMPLE_RATE) == 0]
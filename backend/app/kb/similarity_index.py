@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.vector_store.config import _repo_root_from_here
+
+from .kb_catalog import KbCatalog, KbCatalogEntry, get_kb_catalog
+from .kb_reader import read_text_best_effort
+from .similarity import (
+    CONTAINMENT_MIN_SHARE,
+    CONTAINMENT_SAMPLE_RATE,
+    MINHASH_PERMUTATIONS,
+    containment_samples,
+    lsh_band_keys,
+    minhash_signature,
+    SHINGLE_VERSION,
+    overlap_metrics_sorted,
+    shingle_array,
+    similarity_text,
+)
+
+
+@dataclass(frozen=True)
+class SimilarityResult:
+    kb_path: str
+    title: Optional[str]
+    jaccard: float
+    coverage_new: float
+    coverage_existing: float
+
+
+@dataclass(frozen=True)
+class _SignatureRecord:
+    kb_path: str
+    body_hash: str
+    title: Optional[str]
+    signature: np.ndarray
+    samples: np.ndarray
+
+
+def _shingles_for_entry(entry: KbCatalogEntry) -> Optional[tuple[Optional[str], np.ndarray]]:
+    try:
+        raw = read_text_best_effort(entry.path)
+    except OSError:
+        return None
+    title, text = similarity_text(raw)
+    return title, shingle_array(text)
+
+
+class KbSimilarityIndex:
+    """MinHash/LSH index for near-duplicate detection against the KB.
+
+    Signatures are persisted in SQLite and kept in sync with the KB catalog. A query
+    uses LSH banding (near duplicates) and a lookup of sampled shingles (documents that
+    contain most of the query, see `CONTAINMENT_SAMPLE_RATE`) to find candidate documents
+    and then computes exact shingle overlap only for those. Small KBs (<= `exact_max_docs`) are compared exhaustively
+    so low-overlap matches are not lost where a full scan is cheap anyway.
+
+    Exact shingle sets are stored alongside as sorted uint64 arrays keyed by content
+    hash, with the most recently used `shingle_cache_size` arrays kept in memory, so
+    KB files are only tokenized when they change.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        catalog: Optional[KbCatalog] = None,
+        exact_max_docs: int = 300,
+        shingle_cache_size: int = 2000,
+    ) -> None:
+        self.path = Path(path)
+        self.exact_max_docs = max(0, int(exact_max_docs))
+        self.shingle_cache_size = max(0, int(shingle_cache_size))
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._records: dict[str, _SignatureRecord] = {}
+        self._buckets: dict[bytes, set[str]] = {}
+        self._shingle_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        # (sorted sample hashes, owning path index per hash, paths); rebuilt lazily after changes.
+        self._sample_lookup: Optional[tuple[np.ndarray, np.ndarray, list[str]]] = None
+        self._synced_version: Optional[int] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS minhash_signatures (
+                kb_path TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                title TEXT,
+                signature BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shingle_sets (
+                content_hash TEXT PRIMARY KEY,
+                shingles BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS containment_samples (
+                content_hash TEXT PRIMARY KEY,
+                rate INTEGER NOT NULL,
+                samples BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._load()
+
+    @property
+    def catalog(self) -> KbCatalog:
+        return self._catalog or get_kb_catalog()
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            """
+            SELECT m.kb_path, m.body_hash, m.title, m.signature, c.samples
+            FROM minhash_signatures m
+            LEFT JOIN containment_samples c ON c.content_hash = m.body_hash AND c.rate = ?
+            """,
+            (CONTAINMENT_SAMPLE_RATE,),
+        ).fetchall()
+        for kb_path, body_hash, title, blob, samples in rows:
+            signature = np.frombuffer(blob, dtype=np.uint64)
+            # Without samples (older index or another rate) the next sync rebuilds the record.
+            if signature.size != MINHASH_PERMUTATIONS or samples is None:
+                continue
+            self._add(_SignatureRecord(kb_path, body_hash, title, signature, np.frombuffer(samples, dtype=np.uint64)))
+
+    def _add(self, record: _SignatureRecord) -> None:
+        self._records[record.kb_path] = record
+        self._sample_lookup = None
+        for key in lsh_band_keys(record.signature):
+            self._buckets.setdefault(key, set()).add(record.kb_path)
+
+    def _remove(self, kb_path: str) -> None:
+        record = self._records.pop(kb_path, None)
+        if record is None:
+            return
+        self._sample_lookup = None
+        for key in lsh_band_keys(record.signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.discard(kb_path)
+            if not bucket:
+                del self._buckets[key]
+
+    def sync(self) -> None:
+        catalog = self.catalog
+        entries = catalog.entries()
+        version = catalog.version
+        with self._lock:
+            if self._synced_version == version:
+                return
+
+            seen: set[str] = set()
+            upserts: list[tuple] = []
+            shingle_rows: list[tuple] = []
+            sample_rows: list[tuple] = []
+            for entry in entries:
+                seen.add(entry.kb_path)
+                record = self._records.get(entry.kb_path)
+                # The catalog body hash does not cover the front matter title.
+                if record is not None and record.body_hash == _record_hash(entry):
+                    continue
+
+                loaded = _shingles_for_entry(entry)
+                if loaded is None:
+                    continue
+                title, shingle_arr = loaded
+                record = _SignatureRecord(
+                    entry.kb_path,
+                    _record_hash(entry),
+                    title,
+                    minhash_signature(shingle_arr),
+                    containment_samples(shingle_arr),
+                )
+                self._remove(entry.kb_path)
+                self._add(record)
+                self._remember_shingles(record.body_hash, shingle_arr)
+                upserts.append((record.kb_path, record.body_hash, record.title, sqlite3.Binary(record.signature.tobytes())))
+                shingle_rows.append((record.body_hash, sqlite3.Binary(shingle_arr.tobytes())))
+                sample_rows.append((record.body_hash, CONTAINMENT_SAMPLE_RATE, sqlite3.Binary(record.samples.tobytes())))
+
+            removed = [p for p in self._records if p not in seen]
+            for kb_path in removed:
+                self._remove(kb_path)
+
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO minhash_signatures (kb_path, body_hash, title, signature) VALUES (?, ?, ?, ?)",
+                    upserts,
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO shingle_sets (content_hash, shingles) VALUES (?, ?)",
+                    shingle_rows,
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO containment_samples (content_hash, rate, samples) VALUES (?, ?, ?)",
+                    sample_rows,
+                )
+            if removed:
+                self._conn.executemany("DELETE FROM minhash_signatures WHERE kb_path = ?", [(p,) for p in removed])
+            if upserts or removed:
+                self._conn.execute(
+                    "DELETE FROM shingle_sets WHERE content_hash NOT IN (SELECT body_hash FROM minhash_signatures)"
+                )
+                self._conn.execute(
+                    "DELETE FROM containment_samples WHERE content_hash NOT IN (SELECT body_hash FROM minhash_signatures)"
+                )
+            self._conn.commit()
+            self._synced_version = version
+
+    def _remember_shingles(self, content_hash: str, shingle_arr: np.ndarray) -> None:
+        if self.shingle_cache_size <= 0:
+            return
+        self._shingle_cache[content_hash] = shingle_arr
+        self._shingle_cache.move_to_end(content_hash)
+        while len(self._shingle_cache) > self.shingle_cache_size:
+            self._shingle_cache.popitem(last=False)
+
+    def _cached_shingles(self, kb_path: str) -> Optional[tuple[Optional[str], np.ndarray]]:
+        with self._lock:
+            record = self._records.get(kb_path)
+            if record is None:
+                return None
+            cached = self._shingle_cache.get(record.body_hash)
+            if cached is not None:
+                self._shingle_cache.move_to_end(record.body_hash)
+                return record.title, cached
+
+            row = self._conn.execute(
+                "SELECT shingles FROM shingle_sets WHERE content_hash = ?",
+                (record.body_hash,),
+            ).fetchone()
+            if row is None:
+                return None
+            shingle_arr = np.frombuffer(row[0], dtype=np.uint64)
+            self._remember_shingles(record.body_hash, shingle_arr)
+            return record.title, shingle_arr
+
+    def _containment_candidates(self, samples: np.ndarray) -> set[str]:
+        # Caller holds the lock.
+        if self._sample_lookup is None:
+            paths = list(self._records)
+            parts = [self._records[p].samples for p in paths]
+            keys = np.concatenate(parts) if parts else np.empty(0, dtype=np.uint64)
+            owners = np.repeat(np.arange(len(paths), dtype=np.int32), [part.size for part in parts])
+            order = np.argsort(keys, kind="stable")
+            self._sample_lookup = (keys[order], owners[order], paths)
+        keys, owners, paths = self._sample_lookup
+        if keys.size == 0:
+            return set()
+
+        # All positions of every query sample in the sorted keys, then hits per document.
+        left = np.searchsorted(keys, samples, side="left")
+        counts = np.searchsorted(keys, samples, side="right") - left
+        total = int(counts.sum())
+        if total == 0:
+            return set()
+        starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+        hits = np.bincount(owners[starts + np.arange(total)], minlength=len(paths))
+        min_hits = max(1, int(np.ceil(CONTAINMENT_MIN_SHARE * samples.size)))
+        return {paths[i] for i in np.flatnonzero(hits >= min_hits)}
+
+    def candidates(self, signature: np.ndarray, samples: Optional[np.ndarray] = None) -> set[str]:
+        """Candidate documents for a query's MinHash signature and (optionally) containment samples."""
+
+        with self._lock:
+            if len(self._records) <= self.exact_max_docs:
+                return set(self._records)
+            found: set[str] = set()
+            for key in lsh_band_keys(signature):
+                found.update(self._buckets.get(key, ()))
+            if samples is not None and samples.size:
+                found |= self._containment_candidates(samples)
+            return found
+
+    def find_similar(
+        self,
+        new_text: str,
+        *,
+        limit: int = 5,
+        min_coverage_new: float = 0.0,
+        exclude_kb_path: Optional[str] = None,
+    ) -> list[SimilarityResult]:
+        new_arr = shingle_array(new_text)
+        if new_arr.size == 0:
+            return []
+
+        self.sync()
+        candidate_paths = self.candidates(minhash_signature(new_arr), containment_samples(new_arr))
+        candidate_paths.discard(exclude_kb_path or "")
+        if not candidate_paths:
+            return []
+
+        results: list[SimilarityResult] = []
+        for kb_path in sorted(candidate_paths):
+            loaded = self._cached_shingles(kb_path)
+            if loaded is None:
+                entry = self.catalog.get(kb_path)
+                loaded = _shingles_for_entry(entry) if entry is not None else None
+            if loaded is None:
+                continue
+            title, existing_arr = loaded
+
+            jaccard, coverage_new, coverage_existing = overlap_metrics_sorted(new_arr, existing_arr)
+            if coverage_new <= 0.0 or coverage_new < min_coverage_new:
+                continue
+            results.append(
+                SimilarityResult(
+                    kb_path=kb_path,
+                    title=title,
+                    jaccard=jaccard,
+                    coverage_new=coverage_new,
+                    coverage_existing=coverage_existing,
+                )
+            )
+
+        results.sort(key=lambda m: (m.coverage_new, m.jaccard, m.kb_path), reverse=True)
+        return results[:limit]
+
+
+def _record_hash(entry: KbCatalogEntry) -> str:
+    return hashlib.sha256(f"{SHINGLE_VERSION}\n{entry.body_hash}\n{entry.title}".encode("utf-8")).hexdigest()
+
+
+_index: Optional[KbSimilarityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_kb_similarity_index() -> KbSimilarityIndex:
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            default = Path(_repo_root_from_here()) / "databases" / "knowledge_base" / "index" / "similarity_index.sqlite3"
+            _index = KbSimilarityIndex(
+                Path(os.getenv("KB_SIMILARITY_INDEX_PATH", str(default))),
+                exact_max_docs=int(os.getenv("KB_SIMILARITY_EXACT_MAX_DOCS", "300")),
+            )
+        return _index
@@ -6,8 +6,13 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from .ai_services.llm_admission import LlmOverloadedError
+from .document_processing.parse_pool import shutdown_parse_pool
 from .routers import ai_agent, api_activities, api_auth, api_documents, documents, health, workflow, vector_search
-from .workflow_db.db import init_db
+from .services.async_http import aclose_async_http_client
+from .services.job_queue import start_job_workers, stop_job_workers
+from .vector_store.runtime import close_vector_runtime, init_vector_runtime
+from .workflow_db.db import close_connection_pools, init_db
 
 
 logger = logging.getLogger(__name__)
@@ -16,7 +21,17 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(_: FastAPI):
 	init_db()
-	yield
+	init_vector_runtime()
+	# Resumes jobs left queued (or with expired leases) by a previous process.
+	start_job_workers()
+	try:
+		yield
+	finally:
+		stop_job_workers()
+		shutdown_parse_pool()
+		close_vector_runtime()
+		await aclose_async_http_client()
+		close_connection_pools()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -58,6 +73,7 @@ async def _http_exception_handler(_: Request, exc: HTTPException) -> JSONRespons
 		403: "FORBIDDEN",
 		404: "NOT_FOUND",
 		409: "CONFLICT",
+		413: "PAYLOAD_TOO_LARGE",
 		422: "BAD_REQUEST",
 		500: "INTERNAL_ERROR",
 	}
@@ -75,6 +91,12 @@ async def _validation_exception_handler(_: Request, exc: RequestValidationError)
 		details={"issues": exc.errors()},
 	)
 
+@app.exception_handler(LlmOverloadedError)
+async def _llm_overloaded_handler(_: Request, exc: LlmOverloadedError) -> JSONResponse:
+	response = _error_response(status_code=503, code="LLM_BUSY", message=str(exc))
+	response.headers["Retry-After"] = "30"
+	return response
+
 app.include_router(health.router)
 app.include_router(documents.router)
 app.include_router(api_documents.router)
@@ -1,12 +1,17 @@
+import json
 import re
 import logging
-from typing import Literal, Optional
+from typing import AsyncIterator, Literal, Optional
 from pathlib import Path
 
 from fastapi import APIRouter, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.ai_services.agent_service import AgentService
+from app.ai_services.llm_admission import LlmOverloadedError, llm_admission_stats
+from app.ai_services.llm_cache import llm_cache_stats
 from app.ai_services.ollama_provider import OllamaProvider
 from app.agents.structuring_agents import STRUCTURING_AGENT_PROMPT
 from app.routers.workflow_helpers import _require_authenticated_user, _require_expert_user
@@ -132,6 +137,19 @@ llm = OllamaProvider()
 agent = AgentService(llm)
 
 
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    # X-Accel-Buffering: stop reverse proxies from buffering the stream.
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 _KB_CHAT_PROMPT = """
 Du er en KI-assistent for en intern kunnskapsbank.
 
@@ -511,25 +529,27 @@ def _kb_rel_path_from_vector_meta(meta: dict) -> Optional[str]:
         return None
 
 
-def _vector_retrieve(msg: str, category: Optional[str], *, limit: int = 3) -> tuple[list[KnowledgeSource], list[str], Optional[str]]:
+def _vector_retrieve(
+    msg: str,
+    category: Optional[str],
+    *,
+    limit: int = 3,
+    query_embedding: Optional[list[float]] = None,
+    embed_error: Optional[str] = None,
+) -> tuple[list[KnowledgeSource], list[str], Optional[str]]:
+    if embed_error is not None:
+        return [], [], embed_error
+
     try:
-        from app.vector_store.chroma_store import ChromaVectorStore
-        from app.vector_store.config import load_vector_store_config
-        from app.vector_store.ollama_embeddings import OllamaEmbeddingClient
+        from app.vector_store.runtime import get_embedder, get_vector_store
         from app.kb.kb_reader import get_kb_doc
     except Exception as exc:
         return [], [], f"Vector search unavailable: {exc}"
 
     try:
-        cfg = load_vector_store_config()
-        store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
-        embedder = OllamaEmbeddingClient(
-            base_url=cfg.ollama_base_url,
-            model=cfg.ollama_embed_model,
-            timeout_s=cfg.ollama_embed_timeout_s,
-        )
-
-        query_embedding = embedder.embed_text(msg)
+        store = get_vector_store()
+        if query_embedding is None:
+            query_embedding = get_embedder().embed_text(msg)
         res = store.query(query_embedding=query_embedding, n_results=max(3, min(limit * 3, 12)))
         docs = res.get("documents", [[]])[0]
         metas = res.get("metadatas", [[]])[0]
@@ -594,13 +614,7 @@ def process_document(request: DocumentRequest):
     return {"result": result}
 
 
-@router.post("/revise", response_model=ReviseResponse)
-def revise_document(
-    request: ReviseRequest,
-    authorization: Optional[str] = Header(default=None, alias="Authorization"),
-) -> ReviseResponse:
-    _require_expert_user(authorization)
-
+def _revision_prompt(request: ReviseRequest) -> str:
     rewrite_hint = (
         "\n\nMERK: Instruksjonen ber om en ny/alternativ versjon. Du skal omskrive hele dokumentet.\n"
         if _instruction_requests_rewrite(request.instruction)
@@ -620,13 +634,16 @@ def revise_document(
     )
 
     # Use tags instead of label prefixes to reduce the chance of the model echoing the wrapper.
-    prompt = (
+    return (
         f"{_REVISION_PROMPT}{rewrite_hint}{readability_hint}{glued_pdf_hint}\n\n"
         f"<INSTRUCTION>\n{request.instruction}\n</INSTRUCTION>\n\n"
         f"<DOCUMENT>\n{request.document}\n</DOCUMENT>"
     )
 
-    output = llm.generate(prompt)
+
+def _finalize_revision(request: ReviseRequest, output: str) -> ReviseResponse:
+    """Parse the raw model output and apply the language/echo/chattiness guards."""
+
     message, updated_document = _parse_revision_output(output, fallback_document=request.document)
     updated_document = _sanitize_updated_document(updated_document, request.instruction)
 
@@ -656,53 +673,101 @@ def revise_document(
     return ReviseResponse(message=message, updated_document=updated_document)
 
 
-@router.post("/knowledge-chat", response_model=KnowledgeChatResponse)
-def knowledge_chat(
-    request: KnowledgeChatRequest,
+@router.post("/revise", response_model=ReviseResponse)
+async def revise_document(
+    request: ReviseRequest,
     authorization: Optional[str] = Header(default=None, alias="Authorization"),
-) -> KnowledgeChatResponse:
-    _require_authenticated_user(authorization, allowed_roles={"employee", "expert", "admin"})
+) -> ReviseResponse:
+    # Auth reads the workflow DB; keep it off the event loop.
+    await run_in_threadpool(_require_expert_user, authorization)
+
+    output = await llm.agenerate(_revision_prompt(request))
+    return _finalize_revision(request, output)
+
 
-    """Chat/Q&A for the knowledge bank.
+@router.post("/revise/stream")
+async def revise_document_stream(
+    request: ReviseRequest,
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> StreamingResponse:
+    """SSE variant of /revise: `token` events with raw model output, then `done` with the guarded result.
 
-    Retrieval is dependency-free: simple lexical matching over KB markdown files.
+    The streamed tokens are a preview only; clients must replace them with the `done` payload.
     """
 
-    from app.kb.kb_reader import search_kb, split_front_matter
+    await run_in_threadpool(_require_expert_user, authorization)
+    prompt = _revision_prompt(request)
+
+    async def events() -> AsyncIterator[str]:
+        parts: list[str] = []
+        try:
+            async for fragment in llm.agenerate_stream(prompt):
+                parts.append(fragment)
+                yield _sse_event("token", {"text": fragment})
+        except LlmOverloadedError as exc:
+            yield _sse_event("error", {"code": "LLM_BUSY", "message": str(exc)})
+            return
+        except Exception as exc:
+            logger.exception("Streaming revision failed")
+            yield _sse_event("error", {"code": "LLM_ERROR", "message": str(exc)})
+            return
+        yield _sse_event("done", _finalize_revision(request, "".join(parts)).model_dump())
+
+    return _sse_response(events())
+
+
+def _is_kb_doc_count_question(text: str) -> bool:
+    t = (text or "").strip().lower()
+    if not t:
+        return False
+    # Norwegian + a bit of English phrasing.
+    patterns = [
+        r"\bhvor\s+mange\s+dokument(er|er\s+har\s+du)?\b",
+        r"\bhvor\s+mange\s+filer\b",
+        r"\bantall\s+dokument\b",
+        r"\bantall\s+filer\b",
+        r"\bhow\s+many\s+documents\b",
+        r"\bnumber\s+of\s+documents\b",
+    ]
+    return any(re.search(p, t) for p in patterns)
 
-    def _is_kb_doc_count_question(text: str) -> bool:
-        t = (text or "").strip().lower()
-        if not t:
-            return False
-        # Norwegian + a bit of English phrasing.
-        patterns = [
-            r"\bhvor\s+mange\s+dokument(er|er\s+har\s+du)?\b",
-            r"\bhvor\s+mange\s+filer\b",
-            r"\bantall\s+dokument\b",
-            r"\bantall\s+filer\b",
-            r"\bhow\s+many\s+documents\b",
-            r"\bnumber\s+of\s+documents\b",
-        ]
-        return any(re.search(p, t) for p in patterns)
-
-    def _is_kb_doc_list_question(text: str) -> bool:
-        t = (text or "").strip().lower()
-        if not t:
-            return False
-
-        # Keep this conservative to avoid hijacking regular informational questions.
-        patterns = [
-            r"\bhvilke\s+dokument(er)?\s+har\s+du\b",
-            r"\bhvilke\s+filer\s+har\s+du\b",
-            r"\bhva\s+slags\s+dokument(er)?\s+har\s+du\b",
-            r"\bkan\s+du\s+liste\s+(opp\s+)?dokument(ene|er)\b",
-            r"\bkan\s+du\s+liste\s+(opp\s+)?fil(ene|er)\b",
-            r"\bvis\s+(meg\s+)?(alle\s+)?dokument(ene|er)\b",
-            r"\bvis\s+(meg\s+)?(alle\s+)?fil(ene|er)\b",
-            r"\blist\s+(all\s+)?documents\b",
-            r"\bwhich\s+documents\s+do\s+you\s+have\b",
-        ]
-        return any(re.search(p, t) for p in patterns)
+def _is_kb_doc_list_question(text: str) -> bool:
+    t = (text or "").strip().lower()
+    if not t:
+        return False
+
+    # Keep this conservative to avoid hijacking regular informational questions.
+    patterns = [
+        r"\bhvilke\s+dokument(er)?\s+har\s+du\b",
+        r"\bhvilke\s+filer\s+har\s+du\b",
+        r"\bhva\s+slags\s+dokument(er)?\s+har\s+du\b",
+        r"\bkan\s+du\s+liste\s+(opp\s+)?dokument(ene|er)\b",
+        r"\bkan\s+du\s+liste\s+(opp\s+)?fil(ene|er)\b",
+        r"\bvis\s+(meg\s+)?(alle\s+)?dokument(ene|er)\b",
+        r"\bvis\s+(meg\s+)?(alle\s+)?fil(ene|er)\b",
+        r"\blist\s+(all\s+)?documents\b",
+        r"\bwhich\s+documents\s+do\s+you\s+have\b",
+    ]
+    return any(re.search(p, t) for p in patterns)
+
+
+def _prepare_knowledge_chat(
+    request: KnowledgeChatRequest,
+    *,
+    query_embedding: Optional[list[float]] = None,
+    embed_error: Optional[str] = None,
+) -> tuple[Optional[KnowledgeChatResponse], list[KnowledgeSource], str]:
+    """Retrieval and prompt building for the knowledge chat.
+
+    Returns (direct_response, sources, prompt). `direct_response` is set when the question is
+    answered without the LLM (empty message, KB inventory questions).
+
+    Retrieval prefers the vector store and falls back to BM25 lexical search over KB markdown files.
+    `query_embedding`/`embed_error` come from `_aprepare_knowledge_chat`, which embeds the
+    question with the async client; without them the question is embedded here.
+    """
+
+    from app.kb.kb_reader import search_kb, split_front_matter
 
     def _kb_doc_count_answer(category: Optional[str]) -> str:
         from app.kb.kb_reader import kb_stats
@@ -711,14 +776,12 @@ def knowledge_chat(
             """Count unique documents in the vector DB (grouped by metadata.path)."""
 
             try:
-                from app.vector_store.chroma_store import ChromaVectorStore
-                from app.vector_store.config import load_vector_store_config
+                from app.vector_store.runtime import get_vector_store
             except Exception:
                 return None
 
             try:
-                cfg = load_vector_store_config()
-                store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
+                store = get_vector_store()
                 by_path: set[str] = set()
                 batch_size = 5000
                 cursor = 0
@@ -766,24 +829,16 @@ def knowledge_chat(
 
     def _kb_doc_list_answer(category: Optional[str]) -> str:
         # Import locally to avoid startup costs if endpoint isn't used.
-        from app.kb.kb_reader import iter_kb_markdown_files, doc_metadata, read_text_best_effort, kb_raw_root
+        from app.kb.kb_catalog import get_kb_catalog
 
         wanted = (category or "").strip()
         wanted_norm = wanted if wanted and wanted != "All" else ""
 
-        root = kb_raw_root().resolve()
-        items: list[tuple[str, str, str]] = []  # (title, kb_path, category)
-
-        for p in iter_kb_markdown_files():
-            try:
-                raw = read_text_best_effort(p, max_chars=60_000)
-            except OSError:
-                continue
-            kb_path = p.resolve().relative_to(root).as_posix()
-            title, cat, _author, _date, _body = doc_metadata(raw, kb_path=kb_path)
-            if wanted_norm and cat != wanted_norm:
-                continue
-            items.append((title, kb_path, cat))
+        # (title, kb_path, category)
+        items: list[tuple[str, str, str]] = [
+            (entry.title, entry.kb_path, entry.category)
+            for entry in get_kb_catalog().entries(category=wanted_norm or None)
+        ]
 
         total = len(items)
         # Lowkey: show only a small sample.
@@ -810,16 +865,18 @@ def knowledge_chat(
 
     msg = (request.message or "").strip()
     if not msg:
-        return KnowledgeChatResponse(answer="Skriv et spørsmål, så kan jeg prøve å finne svaret i kunnskapsbanken.", sources=[])
+        return KnowledgeChatResponse(answer="Skriv et spørsmål, så kan jeg prøve å finne svaret i kunnskapsbanken.", sources=[]), [], ""
 
     # Deterministic handling of meta-questions to avoid hallucinating KB inventory.
     if _is_kb_doc_count_question(msg):
-        return KnowledgeChatResponse(answer=_kb_doc_count_answer(request.category), sources=[])
+        return KnowledgeChatResponse(answer=_kb_doc_count_answer(request.category), sources=[]), [], ""
 
     if _is_kb_doc_list_question(msg):
-        return KnowledgeChatResponse(answer=_kb_doc_list_answer(request.category), sources=[])
+        return KnowledgeChatResponse(answer=_kb_doc_list_answer(request.category), sources=[]), [], ""
 
-    vector_sources, vector_excerpts, vector_error = _vector_retrieve(msg, request.category, limit=3)
+    vector_sources, vector_excerpts, vector_error = _vector_retrieve(
+        msg, request.category, limit=3, query_embedding=query_embedding, embed_error=embed_error
+    )
 
     sources: list[KnowledgeSource] = []
     excerpts: list[str] = []
@@ -883,17 +940,120 @@ def knowledge_chat(
         f"KILDER (markdown-utdrag):\n{context_block}\n\n"
         "Svar nå."
     )
+    return None, sources, prompt
 
-    try:
-        answer = llm.generate(prompt).strip()
-    except Exception as exc:
-        logger.exception("Knowledge chat generation failed")
-        answer = "Jeg fikk ikke kontakt med språkmodellen akkurat nå. Prøv igjen."
 
+async def _aprepare_knowledge_chat(
+    request: KnowledgeChatRequest,
+) -> tuple[Optional[KnowledgeChatResponse], list[KnowledgeSource], str]:
+    """Async counterpart of `_prepare_knowledge_chat`.
+
+    The question is embedded with the async client; the rest of the retrieval (Chroma, file
+    reads) runs in the threadpool.
+    """
+
+    msg = (request.message or "").strip()
+    query_embedding: Optional[list[float]] = None
+    embed_error: Optional[str] = None
+    if msg and not _is_kb_doc_count_question(msg) and not _is_kb_doc_list_question(msg):
+        try:
+            from app.vector_store.runtime import get_embedder
+
+            # Creating the client (first request or changed config) blocks.
+            embedder = await run_in_threadpool(get_embedder)
+            query_embedding = await embedder.aembed_text(msg)
+        except Exception as exc:
+            embed_error = f"Vector retrieval failed: {exc}"
+
+    return await run_in_threadpool(
+        _prepare_knowledge_chat, request, query_embedding=query_embedding, embed_error=embed_error
+    )
+
+
+_KB_CHAT_BUSY_ANSWER = "Språkmodellen er opptatt med andre forespørsler akkurat nå. Prøv igjen om litt."
+_KB_CHAT_ERROR_ANSWER = "Jeg fikk ikke kontakt med språkmodellen akkurat nå. Prøv igjen."
+
+
+def _finalize_chat_answer(answer: str) -> str:
+    answer = (answer or "").strip()
     if not answer:
         answer = "Jeg fikk ikke et svar fra modellen akkurat nå. Prøv igjen."
 
     # Enforce Norwegian for the chat-visible answer.
-    answer = _force_norwegian_message(answer, default="Jeg fant ikke et sikkert svar i kildene i kunnskapsbanken.")
+    return _force_norwegian_message(answer, default="Jeg fant ikke et sikkert svar i kildene i kunnskapsbanken.")
+
 
-    return KnowledgeChatResponse(answer=answer, sources=sources)
\ No newline at end of file
+@router.post("/knowledge-chat", response_model=KnowledgeChatResponse)
+async def knowledge_chat(
+    request: KnowledgeChatRequest,
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> KnowledgeChatResponse:
+    """Chat/Q&A for the knowledge bank."""
+
+    await run_in_threadpool(_require_authenticated_user, authorization, allowed_roles={"employee", "expert", "admin"})
+
+    direct, sources, prompt = await _aprepare_knowledge_chat(request)
+    if direct is not None:
+        return direct
+
+    try:
+        answer = await llm.agenerate(prompt)
+    except LlmOverloadedError:
+        logger.warning("Knowledge chat rejected: LLM queue is full")
+        answer = _KB_CHAT_BUSY_ANSWER
+    except Exception:
+        logger.exception("Knowledge chat generation failed")
+        answer = _KB_CHAT_ERROR_ANSWER
+
+    return KnowledgeChatResponse(answer=_finalize_chat_answer(answer), sources=sources)
+
+
+@router.post("/knowledge-chat/stream")
+async def knowledge_chat_stream(
+    request: KnowledgeChatRequest,
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> StreamingResponse:
+    """SSE variant of /knowledge-chat.
+
+    Events: `sources` (list of KnowledgeSource), `token` ({"text": ...}) while the model
+    generates, and `done` with the final KnowledgeChatResponse. The final answer has passed
+    the language guard and may differ from the streamed text.
+    """
+
+    await run_in_threadpool(_require_authenticated_user, authorization, allowed_roles={"employee", "expert", "admin"})
+
+    async def events() -> AsyncIterator[str]:
+        direct, sources, prompt = await _aprepare_knowledge_chat(request)
+        if direct is not None:
+            yield _sse_event("done", direct.model_dump())
+            return
+
+        yield _sse_event("sources", [src.model_dump() for src in sources])
+        parts: list[str] = []
+        try:
+            async for fragment in llm.agenerate_stream(prompt):
+                parts.append(fragment)
+                yield _sse_event("token", {"text": fragment})
+            answer = "".join(parts)
+        except LlmOverloadedError:
+            logger.warning("Knowledge chat rejected: LLM queue is full")
+            answer = _KB_CHAT_BUSY_ANSWER
+        except Exception:
+            logger.exception("Knowledge chat generation failed")
+            # Keep a partial answer if the stream broke midway.
+            answer = "".join(parts) or _KB_CHAT_ERROR_ANSWER
+
+        final = KnowledgeChatResponse(answer=_finalize_chat_answer(answer), sources=sources)
+        yield _sse_event("done", final.model_dump())
+
+    return _sse_response(events())
+
+
+@router.get("/llm-metrics")
+def llm_metrics(
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> dict:
+    """Concurrency/queue counters of the LLM admission controller per Ollama endpoint, and response cache stats."""
+
+    _require_expert_user(authorization)
+    return {"endpoints": llm_admission_stats(), "response_cache": llm_cache_stats()}
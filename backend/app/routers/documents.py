@@ -1,28 +1,38 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
 import mimetypes
 import os
 import re
-import threading
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO
+
 import yaml
 from yaml import YAMLError
 
-from fastapi import APIRouter, File, Form, Header, HTTPException, UploadFile
+from fastapi import APIRouter, File, Form, Header, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
 from app.ai_services.agent_service import AgentService
+from app.ai_services.llm_admission import LLM_PRIORITY_BULK, llm_priority
 from app.ai_services.ollama_provider import OllamaProvider
-from app.document_processing.document_parsing import parse_document
+from app.document_processing.document_parsing import document_extension, parse_document
+from app.document_processing.parse_cache import get_parse_cache, parse_cache_stats, purge_stale_parse_cache
+from app.document_processing.parse_pool import ParseTimeoutError, parse_document_in_pool
 from app.services.revised_suggestion import (
     fallback_structured_document_short,
     generate_revised_suggestion,
     is_effectively_empty,
+    parsing_in_progress_message,
+    unparseable_document_message,
     unreadable_pdf_message,
 )
 from app.routers.workflow_helpers import _require_expert_user
+from app.services.job_queue import enqueue_job, register_job_handler
 from app.workflow_db.config import get_repo_root
 from app.workflow_db.db import get_connection
 
@@ -34,6 +44,15 @@ _STRUCTURING_PROMPT_VERSION = os.getenv("STRUCTURING_PROMPT_VERSION", "2026-04-1
 llm_provider = OllamaProvider()
 agent = AgentService(llm_provider)
 
+GENERATE_SUGGESTION_JOB = "generate_suggestion"
+PARSE_DOCUMENT_JOB = "parse_document"
+
+# Cheap enough to parse while handling the upload; everything else goes to the parser processes.
+_INLINE_PARSE_EXTENSIONS = {".txt"}
+
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 _FILENAME_SAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
 _UPLOAD_CATEGORY_MAP = {
     "sikkerhet": "Sikkerhet",
@@ -46,10 +65,6 @@ _UPLOAD_CATEGORY_MAP = {
 }
 
 
-def _sha256_bytes(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
-
-
 def _sha256_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
@@ -136,13 +151,47 @@ def _insert_activity(
     )
 
 
+def _cached_generation(normalized_sha256: str, model: str) -> str | None:
+    with get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT suggestion_text
+            FROM suggestion_generation_cache
+            WHERE normalized_sha256 = ? AND prompt_version = ? AND model = ?
+            """,
+            (normalized_sha256, _STRUCTURING_PROMPT_VERSION, model),
+        ).fetchone()
+    return row["suggestion_text"] if row else None
+
+
+def _store_generation(normalized_sha256: str, model: str, suggestion_text: str, suggestion_id: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO suggestion_generation_cache (
+                normalized_sha256, prompt_version, model, suggestion_text, source_suggestion_id
+            )
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (normalized_sha256, _STRUCTURING_PROMPT_VERSION, model, suggestion_text, suggestion_id),
+        )
+
+
 def _generate_suggestion_async(
     suggestion_id: str,
     original_filename: str,
     processed_text: str,
     selected_category: str | None = None,
+    *,
+    use_cache: bool = True,
 ) -> None:
-    """Generate revised suggestion in background and update the existing row."""
+    """Generate revised suggestion in background and update the existing row.
+
+    A previous successful (non-fallback) result for the same normalized text, prompt
+    version and model is reused instead of running the LLM pipeline again. With
+    `use_cache=False` (regeneration) neither that result nor cached LLM responses are
+    reused.
+    """
 
     try:
         with get_connection() as conn:
@@ -153,6 +202,7 @@ def _generate_suggestion_async(
                     generation_started_at = COALESCE(generation_started_at, datetime('now')),
                     generation_error = NULL,
                     generation_reason = NULL,
+                    generation_diagnostics = NULL,
                     generation_attempts = COALESCE(generation_attempts, 0) + 1
                 WHERE suggestion_id = ?
                 """,
@@ -165,18 +215,40 @@ def _generate_suggestion_async(
     fallback_used = 1
     generation_reason: str | None = None
     generation_error: str | None = None
+    generation_diagnostics: str | None = None
+
+    text_sha256 = _sha256_text(processed_text)
+    cached_text: str | None = None
+    if use_cache:
+        try:
+            cached_text = _cached_generation(text_sha256, llm_provider.model)
+        except Exception:
+            logger.exception("Suggestion cache lookup failed for %s", suggestion_id)
 
     try:
-        suggestion_text, diag = generate_revised_suggestion(
-            agent=agent,
-            original_filename=original_filename,
-            extracted_text=processed_text,
-            llm_options={},
-        )
-        suggestion_text = _apply_selected_category(suggestion_text, selected_category)
-        fallback_used = int(bool(diag.get("fallback_used")))
-        generation_reason = diag.get("reason")
-        generation_error = diag.get("error")
+        if cached_text is not None:
+            suggestion_text = _apply_selected_category(cached_text, selected_category)
+            fallback_used = 0
+            generation_reason = "cached_generation"
+        else:
+            raw_text, diag = generate_revised_suggestion(
+                agent=agent,
+                original_filename=original_filename,
+                extracted_text=processed_text,
+                llm_options={} if use_cache else {"cache": False},
+            )
+            suggestion_text = _apply_selected_category(raw_text, selected_category)
+            fallback_used = int(bool(diag.get("fallback_used")))
+            generation_reason = diag.get("reason")
+            generation_error = diag.get("error")
+            # Per-stage timing/attempts, to see where slow or failed generations spent their budget.
+            stage_diag = {key: diag[key] for key in ("pipeline", "map_reduce") if diag.get(key)}
+            generation_diagnostics = json.dumps(stage_diag, ensure_ascii=False) if stage_diag else None
+            if not fallback_used and not generation_error:
+                try:
+                    _store_generation(text_sha256, llm_provider.model, raw_text, suggestion_id)
+                except Exception:
+                    logger.exception("Failed to cache generated suggestion for %s", suggestion_id)
     except Exception as exc:
         logger.exception("Background suggestion generation failed for %s", suggestion_id)
         suggestion_text = fallback_structured_document_short(original_filename, processed_text)
@@ -197,7 +269,8 @@ def _generate_suggestion_async(
                     generation_fallback_used = ?,
                     generation_finished_at = datetime('now'),
                     generation_reason = COALESCE(?, generation_reason),
-                    generation_error = COALESCE(?, generation_error)
+                    generation_error = COALESCE(?, generation_error),
+                    generation_diagnostics = ?
                 WHERE suggestion_id = ?
                 """,
                 (
@@ -208,6 +281,7 @@ def _generate_suggestion_async(
                     int(bool(fallback_used)),
                     generation_reason,
                     generation_error,
+                    generation_diagnostics,
                     suggestion_id,
                 ),
             )
@@ -222,66 +296,335 @@ def _generate_suggestion_async(
         logger.exception("Failed to persist background suggestion for %s", suggestion_id)
 
 
-def _start_daemon_task(*, target, args: tuple, name: str) -> None:
-    # Daemon threads allow Ctrl+C to stop the server immediately in dev.
-    thread = threading.Thread(target=target, args=args, name=name, daemon=True)
-    thread.start()
+def _blobs_root() -> Path:
+    return get_repo_root() / "databases" / "data" / "uploads" / "blobs"
 
 
-@router.post("/upload")
-async def upload_document(
-    file: UploadFile = File(...),
-    category: str | None = Form(default=None),
-    authorization: str | None = Header(default=None, alias="Authorization"),
-):
-    _require_expert_user(authorization)
+def _upload_max_bytes() -> int:
+    return int(os.getenv("UPLOAD_MAX_BYTES", str(256 * 1024 * 1024)))
 
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Missing filename")
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file")
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)} MB)")
+
+
+def _open_spool_file() -> tuple[Path, BinaryIO]:
+    tmp_dir = _blobs_root() / ".incoming"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = tmp_dir / f"{uuid.uuid4().hex}.part"
+    return tmp_path, tmp_path.open("wb")
+
+
+def _write_spool_chunk(out: BinaryIO, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def _spool_upload(file: UploadFile, max_bytes: int) -> tuple[Path, str, int]:
+    """Copy the upload to a temp file in fixed-size chunks, hashing as we go.
+
+    Returns (temp_path, sha256, size). Memory use is one chunk regardless of file size;
+    the temp file lives next to the blobs so it can be moved into place without copying.
+    Disk writes and hashing run in the threadpool so a large upload does not stall the event loop.
+    """
+
+    tmp_path, out = await run_in_threadpool(_open_spool_file)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(_UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            await run_in_threadpool(_write_spool_chunk, out, digest, chunk)
+        await run_in_threadpool(out.close)
+    except BaseException:
+        # Also reached on cancellation, where a further await would not complete; keep the cleanup synchronous.
+        out.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+
+def _store_upload_blob(spooled_path: Path, content_sha256: str, original_filename: str) -> Path:
+    """Move a spooled upload into content-addressed storage (one copy per sha256) and return the path.
+
+    The extension is kept because converters (e.g. LibreOffice for .docx) detect the format from it.
+    """
+
+    suffix = Path(_sanitize_filename(original_filename)).suffix.lower()
+    blob_dir = _blobs_root() / content_sha256[:2]
+    blob_path = blob_dir / f"{content_sha256}{suffix}"
+    if blob_path.is_file():
+        spooled_path.unlink(missing_ok=True)
+        return blob_path
+
+    blob_dir.mkdir(parents=True, exist_ok=True)
+    # Atomic rename, so concurrent uploads of the same file never see a partial blob.
+    os.replace(spooled_path, blob_path)
+    return blob_path
+
+
+def _previous_normalized_text(content_sha256: str, original_filename: str) -> str | None:
+    """Extracted text of an earlier upload with identical bytes (and the same file type), if any."""
+
+    suffix = Path(original_filename).suffix.lower()
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT u.original_filename, n.text
+            FROM uploads u
+            JOIN normalized_documents n ON n.upload_id = u.upload_id
+            WHERE u.sha256 = ?
+            ORDER BY n.created_at DESC
+            """,
+            (content_sha256,),
+        ).fetchall()
+    for row in rows:
+        # Parsing is chosen by extension, so only reuse text extracted by the same parser.
+        if Path(row["original_filename"] or "").suffix.lower() == suffix:
+            return row["text"]
+    return None
+
+
+@dataclass(frozen=True)
+class _InitialDraft:
+    suggestion_text: str
+    generation_status: str
+    generation_fallback_used: int = 1  # the first draft is always a fallback
+    generation_reason: str | None = None
+    generation_finished: bool = False
+
+
+def _initial_draft(
+    original_filename: str,
+    processed_text: str,
+    selected_category: str | None,
+    model: str | None,
+) -> _InitialDraft:
+    """Draft shown right after parsing: a cached LLM result if one exists, otherwise a fallback."""
+
+    if is_effectively_empty(processed_text):
+        return _InitialDraft(
+            suggestion_text=_apply_selected_category(unreadable_pdf_message(original_filename), selected_category),
+            generation_status="skipped",
+            generation_reason="no_extractable_text",
+        )
+
+    # Same text, prompt version and model as a finished run: return that suggestion right away.
+    cached_text = None
+    if model:
+        try:
+            cached_text = _cached_generation(_sha256_text(processed_text), model)
+        except Exception:
+            logger.exception("Suggestion cache lookup failed for %s", original_filename)
+    if cached_text is not None:
+        return _InitialDraft(
+            suggestion_text=_apply_selected_category(cached_text, selected_category),
+            generation_status="succeeded",
+            generation_fallback_used=0,
+            generation_reason="cached_generation",
+            generation_finished=True,
+        )
+
+    return _InitialDraft(
+        suggestion_text=_apply_selected_category(
+            fallback_structured_document_short(original_filename, processed_text), selected_category
+        ),
+        generation_status="queued",
+    )
+
+
+def _insert_normalized_text(conn, upload_id: str, processed_text: str) -> None:
+    conn.execute(
+        """
+        INSERT INTO normalized_documents (normalized_id, upload_id, text, sha256)
+        VALUES (?, ?, ?, ?)
+        """,
+        (str(uuid.uuid4()), upload_id, processed_text, _sha256_text(processed_text)),
+    )
+
+
+def _enqueue_generation(suggestion_id: str, original_filename: str, selected_category: str | None) -> None:
+    try:
+        enqueue_job(
+            GENERATE_SUGGESTION_JOB,
+            {
+                "suggestion_id": suggestion_id,
+                "original_filename": original_filename,
+                "selected_category": selected_category,
+            },
+            lane="bulk",
+            dedupe_key=f"suggestion:{suggestion_id}",
+        )
+    except Exception:
+        # The fallback draft is already stored; generation can be retried via the suggestion view.
+        logger.exception("Failed to enqueue suggestion generation for %s", suggestion_id)
+
+
+def _run_parse_document_job(payload: dict) -> None:
+    """Job handler: extract text from an uploaded PDF/DOCX in the parser process pool."""
+
+    suggestion_id = payload["suggestion_id"]
+    original_filename = payload.get("original_filename") or "document"
+    selected_category = payload.get("selected_category")
+
+    with get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT s.upload_id, s.model, s.generation_status, u.stored_path, u.sha256
+            FROM suggestions s
+            JOIN uploads u ON u.upload_id = s.upload_id
+            WHERE s.suggestion_id = ?
+            """,
+            (suggestion_id,),
+        ).fetchone()
+    if row is None or row["generation_status"] != "parsing":
+        # Deleted while queued, or already handled by an earlier attempt.
+        return
+
+    try:
+        processed_text = parse_document_in_pool(
+            original_filename,
+            row["stored_path"],
+            content_sha256=row["sha256"],
+        )
+    except Exception as exc:
+        # Parse errors and timeouts are properties of the file; retrying would not help.
+        logger.warning("Parsing failed for upload %s: %s", row["upload_id"], exc)
+        with get_connection() as conn:
+            conn.execute(
+                """
+                UPDATE suggestions
+                SET suggestion_json = ?,
+                    generation_status = 'failed',
+                    generation_reason = ?,
+                    generation_error = ?,
+                    generation_finished_at = datetime('now')
+                WHERE suggestion_id = ? AND generation_status = 'parsing'
+                """,
+                (
+                    _apply_selected_category(unparseable_document_message(original_filename, str(exc)), selected_category),
+                    "parse_timeout" if isinstance(exc, ParseTimeoutError) else "parse_failed",
+                    f"{type(exc).__name__}: {exc}",
+                    suggestion_id,
+                ),
+            )
+        return
+
+    draft = _initial_draft(original_filename, processed_text, selected_category, row["model"])
+    with get_connection() as conn:
+        updated = conn.execute(
+            """
+            UPDATE suggestions
+            SET suggestion_json = ?,
+                generation_status = ?,
+                generation_fallback_used = ?,
+                generation_reason = ?,
+                generation_finished_at = CASE WHEN ? THEN datetime('now') END
+            WHERE suggestion_id = ? AND generation_status = 'parsing'
+            """,
+            (
+                draft.suggestion_text,
+                draft.generation_status,
+                draft.generation_fallback_used,
+                draft.generation_reason,
+                int(draft.generation_finished),
+                suggestion_id,
+            ),
+        ).rowcount
+        if not updated:
+            return
+        _insert_normalized_text(conn, row["upload_id"], processed_text)
+
+    if draft.generation_status == "queued":
+        _enqueue_generation(suggestion_id, original_filename, selected_category)
+
+
+def _run_generate_suggestion_job(payload: dict) -> None:
+    """Job handler: load the newest normalized text for the suggestion and generate it."""
+
+    suggestion_id = payload["suggestion_id"]
+    with get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT n.text
+            FROM suggestions s
+            JOIN normalized_documents n ON n.upload_id = s.upload_id
+            WHERE s.suggestion_id = ?
+            ORDER BY n.created_at DESC
+            LIMIT 1
+            """,
+            (suggestion_id,),
+        ).fetchone()
+    if row is None:
+        # Suggestion was deleted while the job was queued.
+        return
+
+    # Keep the text as stored so its hash matches `normalized_documents.sha256` (generation cache key).
+    processed_text = row["text"] or ""
+    min_words = int(payload.get("min_words") or 0)
+    if min_words and len(re.findall(r"\b\w+\b", processed_text)) < min_words:
+        return
+
+    with llm_priority(int(payload.get("llm_priority", LLM_PRIORITY_BULK))):
+        _generate_suggestion_async(
+            suggestion_id,
+            payload.get("original_filename") or "document",
+            processed_text,
+            payload.get("selected_category"),
+            use_cache=bool(payload.get("use_cache", True)),
+        )
+
+
+register_job_handler(GENERATE_SUGGESTION_JOB, _run_generate_suggestion_job)
+register_job_handler(PARSE_DOCUMENT_JOB, _run_parse_document_job)
+
+
+def _register_upload(
+    spooled_path: Path,
+    *,
+    content_sha256: str,
+    size_bytes: int,
+    original_filename: str,
+    declared_content_type: str | None,
+    extension: str,
+    category: str | None,
+) -> dict:
+    """Store a spooled upload, record it in the workflow DB and schedule parsing/generation."""
 
     upload_id = str(uuid.uuid4())
-    original_filename = file.filename
-    safe_filename = _sanitize_filename(original_filename)
-    content_sha256 = _sha256_bytes(content)
 
     guessed_type, _ = mimetypes.guess_type(original_filename)
-    content_type = file.content_type
+    content_type = declared_content_type
     if not content_type or content_type == "application/octet-stream":
         content_type = guessed_type or "application/octet-stream"
 
-    repo_root = get_repo_root()
-    uploads_root = repo_root / "databases" / "data" / "uploads" / upload_id
-    uploads_root.mkdir(parents=True, exist_ok=True)
-    stored_path = uploads_root / safe_filename
-    stored_path.write_bytes(content)
+    stored_path = _store_upload_blob(spooled_path, content_sha256, original_filename)
 
-    try:
-        processed_text = parse_document(original_filename, content)
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+    # Re-uploads of the same bytes reuse the earlier extraction instead of parsing again.
+    processed_text = _previous_normalized_text(content_sha256, original_filename)
+    if processed_text is None and extension in _INLINE_PARSE_EXTENSIONS:
+        try:
+            processed_text = parse_document(original_filename, stored_path)
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
 
-    extracted_is_empty = is_effectively_empty(processed_text)
     selected_category = _normalize_selected_category(category)
-
-    normalized_id = str(uuid.uuid4())
-    normalized_sha256 = _sha256_text(processed_text)
     suggestion_id = str(uuid.uuid4())
-
-    fallback_suggestion = (
-        unreadable_pdf_message(original_filename)
-        if extracted_is_empty
-        else fallback_structured_document_short(original_filename, processed_text)
-    )
-    fallback_suggestion = _apply_selected_category(fallback_suggestion, selected_category)
-
     initial_model = (llm_provider.model or "").strip() or None
-    generation_status = "queued" if not extracted_is_empty else "skipped"
-    generation_fallback_used = 1  # upload always returns a fallback draft first
-    generation_reason = None if not extracted_is_empty else "no_extractable_text"
+
+    if processed_text is not None:
+        draft = _initial_draft(original_filename, processed_text, selected_category, initial_model)
+    else:
+        # PDF/DOCX: parsed by a background job in the parser process pool.
+        draft = _InitialDraft(
+            suggestion_text=_apply_selected_category(parsing_in_progress_message(original_filename), selected_category),
+            generation_status="parsing",
+        )
 
     try:
         with get_connection() as conn:
@@ -294,18 +637,13 @@ async def upload_document(
                     upload_id,
                     original_filename,
                     content_type,
-                    len(content),
+                    size_bytes,
                     content_sha256,
                     str(stored_path.as_posix()),
                 ),
             )
-            conn.execute(
-                """
-                INSERT INTO normalized_documents (normalized_id, upload_id, text, sha256)
-                VALUES (?, ?, ?, ?)
-                """,
-                (normalized_id, upload_id, processed_text, normalized_sha256),
-            )
+            if processed_text is not None:
+                _insert_normalized_text(conn, upload_id, processed_text)
             conn.execute(
                 """
                 INSERT INTO suggestions (
@@ -318,21 +656,23 @@ async def upload_document(
                     generation_status,
                     generation_fallback_used,
                     generation_attempts,
-                    generation_reason
+                    generation_reason,
+                    generation_finished_at
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CASE WHEN ? THEN datetime('now') END)
                 """,
                 (
                     suggestion_id,
                     upload_id,
-                    fallback_suggestion,
+                    draft.suggestion_text,
                     initial_model,
                     _STRUCTURING_PROMPT_VERSION,
                     "draft",
-                    generation_status,
-                    generation_fallback_used,
+                    draft.generation_status,
+                    draft.generation_fallback_used,
                     0,
-                    generation_reason,
+                    draft.generation_reason,
+                    int(draft.generation_finished),
                 ),
             )
             _insert_activity(
@@ -344,34 +684,120 @@ async def upload_document(
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to persist workflow data: {exc}")
 
-    if not extracted_is_empty:
-        _start_daemon_task(
-            target=_generate_suggestion_async,
-            args=(
-                suggestion_id,
-                original_filename,
-                processed_text,
-                selected_category,
-            ),
-            name=f"upload-gen-{suggestion_id[:8]}",
-        )
-
-    processing = not extracted_is_empty
+    if draft.generation_status == "parsing":
+        try:
+            job_id = enqueue_job(
+                PARSE_DOCUMENT_JOB,
+                {
+                    "suggestion_id": suggestion_id,
+                    "upload_id": upload_id,
+                    "original_filename": original_filename,
+                    "selected_category": selected_category,
+                },
+                lane="parse",
+                dedupe_key=f"parse:{upload_id}",
+            )
+            if job_id is None:
+                # A new upload id cannot have an active parse job; nothing was scheduled.
+                raise RuntimeError(f"parse job for upload {upload_id} was not enqueued")
+        except Exception:
+            logger.exception("Failed to enqueue parsing for upload %s", upload_id)
+            raise HTTPException(status_code=500, detail="Failed to schedule document parsing")
+    elif draft.generation_status == "queued":
+        _enqueue_generation(suggestion_id, original_filename, selected_category)
+
+    generation_status = draft.generation_status
+    processing = generation_status in {"parsing", "queued"}
+    if draft.generation_finished:
+        llm_error = None
+    elif generation_status == "parsing":
+        llm_error = "Document parsing in progress"
+    elif processing:
+        llm_error = "Background generation in progress"
+    else:
+        llm_error = "No extractable text; skipped background generation"
 
     return {
         "upload_id": upload_id,
         "suggestion_id": suggestion_id,
-        "structured_draft": fallback_suggestion,
+        "structured_draft": draft.suggestion_text,
         "suggestion_addon": "",
-        "suggestions": fallback_suggestion,
+        "suggestions": draft.suggestion_text,
         "status": "draft",
         "model": initial_model,
         "prompt_version": _STRUCTURING_PROMPT_VERSION,
         "processing": processing,
-        "llm_fallback_used": True,
-        "llm_error": "Background generation in progress" if processing else "No extractable text; skipped background generation",
+        "llm_fallback_used": not draft.generation_finished,
+        "llm_error": llm_error,
         "generation_status": generation_status,
-        "generation_fallback_used": generation_fallback_used,
+        "generation_fallback_used": draft.generation_fallback_used,
         "generation_attempts": 0,
-        "generation_reason": generation_reason,
+        "generation_reason": draft.generation_reason,
     }
+
+
+@router.post("/upload")
+async def upload_document(
+    request: Request,
+    file: UploadFile = File(...),
+    category: str | None = Form(default=None),
+    authorization: str | None = Header(default=None, alias="Authorization"),
+):
+    await run_in_threadpool(_require_expert_user, authorization)
+
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="Missing filename")
+    try:
+        extension = document_extension(file.filename)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    max_bytes = _upload_max_bytes()
+    # Cheap early reject; the multipart body is slightly larger than the file itself.
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + _MULTIPART_OVERHEAD_BYTES:
+        raise _too_large(max_bytes)
+
+    spooled_path, content_sha256, size_bytes = await _spool_upload(file, max_bytes)
+    if size_bytes == 0:
+        await run_in_threadpool(spooled_path.unlink, missing_ok=True)
+        raise HTTPException(status_code=400, detail="Empty file")
+
+    # Blob move, dedup lookup, inline parsing and the SQLite writes are all blocking.
+    return await run_in_threadpool(
+        _register_upload,
+        spooled_path,
+        content_sha256=content_sha256,
+        size_bytes=size_bytes,
+        original_filename=file.filename,
+        declared_content_type=file.content_type,
+        extension=extension,
+        category=category,
+    )
+
+
+@router.get("/parse-cache")
+def parse_cache_status(
+    authorization: str | None = Header(default=None, alias="Authorization"),
+):
+    _require_expert_user(authorization)
+    return parse_cache_stats()
+
+
+@router.post("/parse-cache/purge")
+def purge_parse_cache(
+    all_entries: bool = Query(default=False, alias="all"),
+    authorization: str | None = Header(default=None, alias="Authorization"),
+):
+    """Remove parse cache entries from old extractor versions (or everything with `?all=true`)."""
+
+    _require_expert_user(authorization)
+    cache = get_parse_cache()
+    removed = 0
+    if cache is not None:
+        if all_entries:
+            removed = int(cache.stats()["entries"])
+            cache.clear()
+        else:
+            removed = purge_stale_parse_cache()
+    return {"removed": removed, **parse_cache_stats()}
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from app.vector_store.config import load_vector_store_config
 from app.routers.workflow_helpers import _require_expert_user
@@ -20,9 +21,8 @@ def _load_vector_deps():
     """
 
     try:
-        from app.vector_store.chroma_store import ChromaVectorStore
         from app.vector_store.kb_indexer import index_kb
-        from app.vector_store.ollama_embeddings import OllamaEmbeddingClient
+        from app.vector_store.runtime import get_embedder, get_vector_store
     except ModuleNotFoundError as exc:
         # Most common on Windows when running minimal requirements.
         raise HTTPException(
@@ -35,7 +35,7 @@ def _load_vector_deps():
             detail=f"Vector search is disabled (optional dependencies failed to load: {exc}).",
         ) from exc
 
-    return ChromaVectorStore, index_kb, OllamaEmbeddingClient
+    return get_vector_store, index_kb, get_embedder
 
 
 def _repo_root() -> Path:
@@ -83,9 +83,9 @@ def list_vector_db_documents(
     limit = max(1, min(limit, 2000))
     offset = max(0, offset)
 
-    ChromaVectorStore, _index_kb, _OllamaEmbeddingClient = _load_vector_deps()
+    get_vector_store, _index_kb, _get_embedder = _load_vector_deps()
     cfg = load_vector_store_config()
-    store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
+    store = get_vector_store()
 
     # Iterate metadatas in batches to avoid loading full documents.
     batch_size = 5000
@@ -161,9 +161,8 @@ def delete_vector_db_document(
     if not (kb_path or "").strip():
         raise HTTPException(status_code=400, detail="Query param 'kb_path' is required")
 
-    ChromaVectorStore, _index_kb, _OllamaEmbeddingClient = _load_vector_deps()
-    cfg = load_vector_store_config()
-    store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
+    get_vector_store, _index_kb, _get_embedder = _load_vector_deps()
+    store = get_vector_store()
 
     # Validate & normalize kb_path without requiring the file to exist.
     try:
@@ -184,48 +183,64 @@ def delete_vector_db_document(
 
 
 @router.post("/index/kb")
-def index_knowledge_base(authorization: Optional[str] = Header(default=None, alias="Authorization")) -> dict:
+def index_knowledge_base(
+    full: bool = False,
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> dict:
+    """Index the KB into Chroma.
+
+    By default only new/changed files are embedded (based on the stored `doc_hash`).
+    Use `full=true` to drop and rebuild the whole collection, e.g. after changing the
+    embedding model. Vectors for unchanged chunk text still come from the embedding cache.
+    """
+
     _require_expert_user(authorization)
 
-    ChromaVectorStore, index_kb, OllamaEmbeddingClient = _load_vector_deps()
+    get_vector_store, index_kb, get_embedder = _load_vector_deps()
     cfg = load_vector_store_config()
-    store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
-    embedder = OllamaEmbeddingClient(
-        base_url=cfg.ollama_base_url,
-        model=cfg.ollama_embed_model,
-        timeout_s=cfg.ollama_embed_timeout_s,
-    )
+    store = get_vector_store()
+    embedder = get_embedder()
 
     try:
-        stats = index_kb(store=store, embedder=embedder)
-        return {"status": "ok", "indexed": stats, "persist_dir": str(cfg.persist_dir)}
+        stats = index_kb(
+            store=store,
+            embedder=embedder,
+            incremental=not full,
+            embed_workers=cfg.index_embed_workers,
+        )
+        return {
+            "status": "ok",
+            "mode": "full" if full else "incremental",
+            "indexed": stats,
+            "persist_dir": str(cfg.persist_dir),
+        }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+def _search_runtime():
+    get_vector_store, _index_kb, get_embedder = _load_vector_deps()
+    return get_vector_store(), get_embedder()
+
+
 @router.get("/search")
-def search(
+async def search(
     q: str,
     k: int = 5,
     authorization: Optional[str] = Header(default=None, alias="Authorization"),
 ) -> dict:
-    _require_expert_user(authorization)
+    await run_in_threadpool(_require_expert_user, authorization)
 
     if not q.strip():
         raise HTTPException(status_code=400, detail="Query 'q' cannot be empty")
 
-    ChromaVectorStore, _index_kb, OllamaEmbeddingClient = _load_vector_deps()
-    cfg = load_vector_store_config()
-    store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
-    embedder = OllamaEmbeddingClient(
-        base_url=cfg.ollama_base_url,
-        model=cfg.ollama_embed_model,
-        timeout_s=cfg.ollama_embed_timeout_s,
-    )
+    # Creating the Chroma client / embedder (first request or changed config) blocks.
+    store, embedder = await run_in_threadpool(_search_runtime)
 
     try:
-        query_embedding = embedder.embed_text(q)
-        res = store.query(query_embedding=query_embedding, n_results=max(1, min(k, 20)))
+        query_embedding = await embedder.aembed_text(q)
+        # Chroma is an in-process, blocking client.
+        res = await run_in_threadpool(store.query, query_embedding=query_embedding, n_results=max(1, min(k, 20)))
         # Chroma returns lists per query; we sent one query.
         return {
             "query": q,
@@ -241,3 +256,20 @@ def search(
         }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/embedding-cache")
+def embedding_cache_stats(
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> dict:
+    """Hit/miss counters and size of the persistent embedding cache."""
+
+    _require_expert_user(authorization)
+
+    from app.vector_store.embedding_cache import get_embedding_cache
+
+    cfg = load_vector_store_config()
+    cache = get_embedding_cache(cfg)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "model": cfg.ollama_embed_model, **cache.stats()}
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
 import mimetypes
 import os
@@ -21,28 +22,27 @@ from pydantic import BaseModel, Field
 import yaml
 from yaml import YAMLError
 
-from app.workflow_db.db import get_connection
+from app.ai_services.llm_admission import LLM_PRIORITY_BACKGROUND
+from app.workflow_db.db import connection_pool_stats, get_connection
 from app.vector_store.config import _repo_root_from_here
-from app.vector_store.config import load_vector_store_config
+from app.kb.kb_catalog import get_kb_catalog
 from app.kb.kb_reader import get_kb_doc, kb_stats
+from app.kb.similarity_index import get_kb_similarity_index
+from app.services.evidence_index import EvidenceIndex, quotes_in
+from app.services.job_queue import active_job_count, enqueue_job
 from app.routers.workflow_helpers import (
     _api_error,
     _external_status,
-    _iter_kb_markdown_files,
     _kb_raw_root,
     _looks_like_non_norwegian,
     _mark_reindex_scheduled,
     _next_available_kb_path,
-    _read_text_best_effort,
     _reindex_kb_to_chroma,
     _require_authenticated_user,
     _require_expert_user,
     _resolve_kb_path,
-    _shingles,
-    _similarity_metrics,
     _slugify,
     _split_front_matter,
-    _tokenize_for_similarity,
     get_reindex_status_snapshot,
 )
 
@@ -52,9 +52,6 @@ router = APIRouter(prefix="/workflow", tags=["workflow"])
 logger = logging.getLogger(__name__)
 _STRUCTURING_PROMPT_VERSION = os.getenv("STRUCTURING_PROMPT_VERSION", "2026-04-14-rs4").strip() or "2026-04-14-rs4"
 
-_fallback_regen_lock = threading.Lock()
-_fallback_regen_inflight: set[str] = set()
-
 
 def _insert_activity(
     conn,
@@ -171,6 +168,17 @@ class KbDeleteResponse(BaseModel):
     indexed_delete_error: Optional[str] = None
 
 
+class ReindexStageProgress(BaseModel):
+    done: int = 0
+    total: int = 0
+
+
+class ReindexProgress(BaseModel):
+    read: ReindexStageProgress
+    embed: ReindexStageProgress
+    write: ReindexStageProgress
+
+
 class ReindexStatusResponse(BaseModel):
     state: str
     current_run_id: Optional[str] = None
@@ -181,6 +189,11 @@ class ReindexStatusResponse(BaseModel):
     last_error: Optional[str] = None
     last_indexed_files: Optional[int] = None
     last_indexed_chunks: Optional[int] = None
+    last_mode: Optional[Literal["incremental", "full"]] = None
+    last_embedded_chunks: Optional[int] = None
+    last_unchanged_files: Optional[int] = None
+    last_removed_files: Optional[int] = None
+    progress: Optional[ReindexProgress] = None
 
 
 class ReviewRequest(BaseModel):
@@ -210,56 +223,45 @@ class SuggestionResponse(BaseModel):
     generation_finished_at: Optional[str] = None
     generation_reason: Optional[str] = None
     generation_error: Optional[str] = None
+    generation_diagnostics: Optional[dict] = None
 
 
-def _schedule_fallback_regeneration(*, suggestion_id: str, upload_id: str, original_filename: str) -> None:
-    with _fallback_regen_lock:
-        # Throttle: regenerating a suggestion is expensive (LLM call). The frontend may fetch
-        # many suggestions in parallel on page load, so we keep this strictly bounded.
-        if len(_fallback_regen_inflight) >= 1:
-            return
-        if suggestion_id in _fallback_regen_inflight:
-            return
-        _fallback_regen_inflight.add(suggestion_id)
-
-    # Run as a daemon thread so server shutdown is not blocked by long LLM calls.
-    thread = threading.Thread(
-        target=_regenerate_suggestion_in_background,
-        args=(suggestion_id, upload_id, original_filename),
-        name=f"regen-{suggestion_id[:8]}",
-        daemon=True,
-    )
-    thread.start()
-
-
-def _regenerate_suggestion_in_background(suggestion_id: str, upload_id: str, original_filename: str) -> None:
+def _generation_diagnostics(raw: Optional[str]) -> Optional[dict]:
+    if not raw:
+        return None
     try:
-        with get_connection() as conn:
-            row = conn.execute(
-                """
-                SELECT text
-                FROM normalized_documents
-                WHERE upload_id = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-                """,
-                (upload_id,),
-            ).fetchone()
-        if row is None:
-            return
-
-        processed_text = (row["text"] or "").strip()
-        # Mirror upload-time threshold (best-effort guard).
-        if len(re.findall(r"\b\w+\b", processed_text)) < 40:
-            return
+        value = json.loads(raw)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
 
-        # Reuse the same structuring pipeline used by /documents/upload.
-        from app.routers.documents import _generate_suggestion_async  # local import avoids import cycles
 
-        _generate_suggestion_async(suggestion_id, original_filename, processed_text)
-    finally:
-        with _fallback_regen_lock:
-            _fallback_regen_inflight.discard(suggestion_id)
+def _schedule_fallback_regeneration(*, suggestion_id: str, upload_id: str, original_filename: str) -> None:
+    # Throttle: regenerating a suggestion is expensive (LLM call). The frontend may fetch
+    # many suggestions in parallel on page load, so we keep this strictly bounded.
+    if active_job_count("interactive") >= 1:
+        return
+
+    # Reuse the same structuring pipeline used by /documents/upload.
+    from app.routers.documents import GENERATE_SUGGESTION_JOB  # local import avoids import cycles
+
+    # The interactive lane is claimed before queued bulk uploads; the dedupe key
+    # is shared with the upload job so a suggestion is never generated twice at once.
+    enqueue_job(
+        GENERATE_SUGGESTION_JOB,
+        {
+            "suggestion_id": suggestion_id,
+            "upload_id": upload_id,
+            "original_filename": original_filename,
+            # Mirror upload-time threshold (best-effort guard).
+            "min_words": 40,
+            "llm_priority": LLM_PRIORITY_BACKGROUND,
+            # The cached result/LLM responses are what produced the fallback.
+            "use_cache": False,
+        },
+        lane="interactive",
+        dedupe_key=f"suggestion:{suggestion_id}",
+    )
 
 
 class SuggestionListItem(BaseModel):
@@ -272,11 +274,18 @@ class SuggestionListItem(BaseModel):
     generation_fallback_used: Optional[int] = None
 
 
+class EvidenceSpan(BaseModel):
+    quote: str
+    start: Optional[int] = Field(default=None, description="Offset of the quote in `text`; null if it was not found")
+    end: Optional[int] = None
+
+
 class OriginalDocumentResponse(BaseModel):
     suggestion_id: str
     upload_id: str
     original_filename: Optional[str] = None
     text: str
+    evidence: list[EvidenceSpan] = Field(default_factory=list, description="KILDE quotes of the suggestion, located in `text`")
 
 
 class ApplyRequest(BaseModel):
@@ -363,7 +372,8 @@ def get_suggestion(
                    generation_started_at,
                    generation_finished_at,
                    generation_reason,
-                   generation_error
+                   generation_error,
+                   generation_diagnostics
             FROM suggestions
             WHERE suggestion_id = ?
             """,
@@ -393,7 +403,7 @@ def get_suggestion(
 
     if (
         needs_regen
-        and generation_status not in {"queued", "running"}
+        and generation_status not in {"parsing", "queued", "running"}
         and row["upload_id"]
         and prompt_version != _STRUCTURING_PROMPT_VERSION
     ):
@@ -428,6 +438,7 @@ def get_suggestion(
         generation_finished_at=row["generation_finished_at"],
         generation_reason=row["generation_reason"],
         generation_error=row["generation_error"],
+        generation_diagnostics=_generation_diagnostics(row["generation_diagnostics"]),
     )
 
 
@@ -461,7 +472,8 @@ def update_suggestion(
                    generation_started_at,
                    generation_finished_at,
                    generation_reason,
-                   generation_error
+                   generation_error,
+                   generation_diagnostics
             FROM suggestions
             WHERE suggestion_id = ?
             """,
@@ -497,9 +509,43 @@ def update_suggestion(
         generation_finished_at=row["generation_finished_at"],
         generation_reason=row["generation_reason"],
         generation_error=row["generation_error"],
+        generation_diagnostics=_generation_diagnostics(row["generation_diagnostics"]),
     )
 
 
+def _find_similar_kb_documents(
+    new_text: str,
+    *,
+    limit: int,
+    min_coverage_new: float,
+    exclude_kb_path: Optional[str],
+) -> list[SimilarityMatch]:
+    excluded_rel: Optional[str] = None
+    if exclude_kb_path:
+        try:
+            excluded_full = _resolve_kb_path(exclude_kb_path)
+            excluded_rel = excluded_full.resolve().relative_to(_kb_raw_root().resolve()).as_posix()
+        except Exception:
+            raise HTTPException(status_code=400, detail="exclude_kb_path is invalid")
+
+    results = get_kb_similarity_index().find_similar(
+        new_text,
+        limit=limit,
+        min_coverage_new=min_coverage_new,
+        exclude_kb_path=excluded_rel,
+    )
+    return [
+        SimilarityMatch(
+            kb_path=r.kb_path,
+            title=r.title,
+            jaccard=r.jaccard,
+            coverage_new=r.coverage_new,
+            coverage_existing=r.coverage_existing,
+        )
+        for r in results
+    ]
+
+
 @router.get("/suggestions/{suggestion_id}/similarity", response_model=SimilarityResponse)
 def get_suggestion_similarity(
     suggestion_id: str,
@@ -531,66 +577,13 @@ def get_suggestion_similarity(
     suggestion_title = suggestion_front.get("title") if isinstance(suggestion_front, dict) else None
 
     new_text = (str(suggestion_title) + "\n\n" if suggestion_title else "") + (suggestion_body or "")
-    new_tokens = _tokenize_for_similarity(new_text)
-    new_set = _shingles(new_tokens)
-
-    kb_root = _kb_raw_root()
-    kb_files = _iter_kb_markdown_files()
-    if exclude_kb_path:
-        try:
-            excluded_full = _resolve_kb_path(exclude_kb_path)
-        except Exception:
-            raise HTTPException(status_code=400, detail="exclude_kb_path is invalid")
-        kb_files = [p for p in kb_files if p.resolve() != excluded_full.resolve()]
-
-    if not new_set or not kb_files:
-        return SimilarityResponse(suggestion_id=suggestion_id, matches=[])
-
-    matches: list[SimilarityMatch] = []
-    for p in kb_files:
-        try:
-            existing_raw = _read_text_best_effort(p)
-        except OSError:
-            continue
-
-        front, body = _split_front_matter(existing_raw)
-        title = None
-        if isinstance(front, dict):
-            maybe_title = front.get("title") or front.get("id")
-            if isinstance(maybe_title, str) and maybe_title.strip():
-                title = maybe_title.strip()
-
-        existing_text = (title + "\n\n" if title else "") + (body or "")
-        existing_tokens = _tokenize_for_similarity(existing_text)
-        existing_set = _shingles(existing_tokens)
-        if not existing_set:
-            continue
-
-        inter = len(new_set & existing_set)
-        if inter == 0:
-            continue
-
-        union = len(new_set | existing_set)
-        jaccard = inter / union if union else 0.0
-        coverage_new = inter / len(new_set) if new_set else 0.0
-        coverage_existing = inter / len(existing_set) if existing_set else 0.0
-
-        if coverage_new < min_coverage_new:
-            continue
-
-        rel = p.resolve().relative_to(kb_root.resolve())
-        matches.append(
-            SimilarityMatch(
-                kb_path=rel.as_posix(),
-                title=title,
-                jaccard=jaccard,
-                coverage_new=coverage_new,
-                coverage_existing=coverage_existing,
-            )
-        )
-
-    matches.sort(key=lambda m: (m.coverage_new, m.jaccard, m.kb_path), reverse=True)
-    return SimilarityResponse(suggestion_id=suggestion_id, matches=matches[:limit])
+    matches = _find_similar_kb_documents(
+        new_text,
+        limit=limit,
+        min_coverage_new=min_coverage_new,
+        exclude_kb_path=exclude_kb_path,
+    )
+    return SimilarityResponse(suggestion_id=suggestion_id, matches=matches)
 
 
 @router.post("/similarity-check", response_model=SimilarityCheckResponse)
@@ -617,66 +610,13 @@ def check_similarity_for_document(
     title = front.get("title") if isinstance(front, dict) else None
     new_text = (str(title) + "\n\n" if title else "") + (body or "")
 
-    new_tokens = _tokenize_for_similarity(new_text)
-    new_set = _shingles(new_tokens)
-
-    kb_root = _kb_raw_root()
-    kb_files = _iter_kb_markdown_files()
-    if exclude_kb_path:
-        try:
-            excluded_full = _resolve_kb_path(exclude_kb_path)
-        except Exception:
-            raise HTTPException(status_code=400, detail="exclude_kb_path is invalid")
-        kb_files = [p for p in kb_files if p.resolve() != excluded_full.resolve()]
-
-    if not new_set or not kb_files:
-        return SimilarityCheckResponse(matches=[])
-
-    matches: list[SimilarityMatch] = []
-    for p in kb_files:
-        try:
-            existing_raw = _read_text_best_effort(p)
-        except OSError:
-            continue
-
-        existing_front, existing_body = _split_front_matter(existing_raw)
-        existing_title = None
-        if isinstance(existing_front, dict):
-            maybe_title = existing_front.get("title") or existing_front.get("id")
-            if isinstance(maybe_title, str) and maybe_title.strip():
-                existing_title = maybe_title.strip()
-
-        existing_text = (existing_title + "\n\n" if existing_title else "") + (existing_body or "")
-        existing_tokens = _tokenize_for_similarity(existing_text)
-        existing_set = _shingles(existing_tokens)
-        if not existing_set:
-            continue
-
-        inter = len(new_set & existing_set)
-        if inter == 0:
-            continue
-
-        union = len(new_set | existing_set)
-        jaccard = inter / union if union else 0.0
-        coverage_new = inter / len(new_set) if new_set else 0.0
-        coverage_existing = inter / len(existing_set) if existing_set else 0.0
-
-        if coverage_new < min_coverage_new:
-            continue
-
-        rel = p.resolve().relative_to(kb_root.resolve())
-        matches.append(
-            SimilarityMatch(
-                kb_path=rel.as_posix(),
-                title=existing_title,
-                jaccard=jaccard,
-                coverage_new=coverage_new,
-                coverage_existing=coverage_existing,
-            )
-        )
-
-    matches.sort(key=lambda m: (m.coverage_new, m.jaccard, m.kb_path), reverse=True)
-    return SimilarityCheckResponse(matches=matches[:limit])
+    matches = _find_similar_kb_documents(
+        new_text,
+        limit=limit,
+        min_coverage_new=min_coverage_new,
+        exclude_kb_path=exclude_kb_path,
+    )
+    return SimilarityCheckResponse(matches=matches)
 
 
 @router.get("/kb/stats", response_model=KbStatsResponse)
@@ -695,6 +635,14 @@ def get_kb_reindex_status(authorization: Optional[str] = Header(default=None, al
     return ReindexStatusResponse(**snapshot)
 
 
+@router.get("/db-pool")
+def get_db_pool_stats(authorization: Optional[str] = Header(default=None, alias="Authorization")) -> dict:
+    """Size, usage and wait-time counters of the workflow DB connection pool."""
+
+    _require_expert_user(authorization)
+    return {"pools": connection_pool_stats()}
+
+
 @router.get("/kb/document", response_model=KbDocumentResponse)
 def get_kb_document(
     kb_path: str = Query(..., description="Relative path under databases/knowledge_base/raw (e.g. 'procedures/pump-a.md')."),
@@ -730,34 +678,19 @@ def list_kb_documents(
 
     _require_authenticated_user(authorization, allowed_roles={"employee", "expert", "admin"})
 
-    from app.kb.kb_reader import iter_kb_markdown_files, doc_metadata, read_text_best_effort, kb_raw_root
-
     wanted = (category or "").strip()
     wanted_norm = wanted if wanted and wanted != "All" else ""
 
-    root = kb_raw_root().resolve()
-    docs: list[KbDocumentListItem] = []
-
-    for p in iter_kb_markdown_files():
-        try:
-            raw = read_text_best_effort(p, max_chars=60_000)
-        except OSError:
-            continue
-
-        rel = p.resolve().relative_to(root).as_posix()
-        title, cat, author, date = doc_metadata(raw, kb_path=rel)
-        if wanted_norm and cat != wanted_norm:
-            continue
-
-        docs.append(
-            KbDocumentListItem(
-                kb_path=rel,
-                title=title,
-                author=author,
-                date=date,
-                category=cat,
-            )
+    docs = [
+        KbDocumentListItem(
+            kb_path=entry.kb_path,
+            title=entry.title,
+            author=entry.author,
+            date=entry.date,
+            category=entry.category,
         )
+        for entry in get_kb_catalog().entries(category=wanted_norm or None)
+    ]
 
     docs.sort(key=lambda d: ((d.title or "").lower(), (d.kb_path or "").lower()))
     total = len(docs)
@@ -850,6 +783,7 @@ def delete_kb_document(
         full.unlink()
     except OSError as exc:
         raise HTTPException(status_code=500, detail=f"Failed to delete KB document: {exc}")
+    get_kb_catalog().invalidate()
 
     # Best-effort cleanup of empty directories under KB raw root.
     try:
@@ -870,12 +804,9 @@ def delete_kb_document(
 
     if delete_indexed:
         try:
-            from app.vector_store.chroma_store import ChromaVectorStore
-            from app.vector_store.config import load_vector_store_config
+            from app.vector_store.runtime import get_vector_store
 
-            cfg = load_vector_store_config()
-            store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
-            store.delete(where={"path": str(full.resolve().as_posix())})
+            get_vector_store().delete(where={"path": str(full.resolve().as_posix())})
             deleted_indexed = True
         except Exception as exc:
             indexed_delete_error = str(exc)
@@ -898,7 +829,7 @@ def get_suggestion_original(
     with get_connection() as conn:
         row = conn.execute(
             """
-            SELECT s.suggestion_id, s.upload_id, u.original_filename, n.text
+            SELECT s.suggestion_id, s.upload_id, s.suggestion_json, u.original_filename, n.text
             FROM suggestions s
             LEFT JOIN uploads u ON u.upload_id = s.upload_id
             LEFT JOIN normalized_documents n ON n.upload_id = s.upload_id
@@ -921,6 +852,7 @@ def get_suggestion_original(
         upload_id=row["upload_id"],
         original_filename=row["original_filename"],
         text=text,
+        evidence=[EvidenceSpan(**span) for span in EvidenceIndex(text).spans(quotes_in(row["suggestion_json"]))],
     )
 
 
@@ -1384,6 +1316,7 @@ def apply_suggestion(
         )
 
     kb_file.write_text(suggestion_text_for_kb.rstrip() + "\n", encoding="utf-8")
+    get_kb_catalog().invalidate()
 
     change_id = str(uuid.uuid4())
 
@@ -14,6 +14,7 @@ import yaml
 from fastapi import HTTPException, status
 from yaml import YAMLError
 
+from app.kb.similarity import shingles, similarity_metrics, tokenize_for_similarity
 from app.vector_store.config import _repo_root_from_here, load_vector_store_config
 from app.workflow_db.db import get_connection
 
@@ -31,6 +32,11 @@ _reindex_status: dict[str, object | None] = {
     "last_error": None,
     "last_indexed_files": None,
     "last_indexed_chunks": None,
+    "last_mode": None,
+    "last_embedded_chunks": None,
+    "last_unchanged_files": None,
+    "last_removed_files": None,
+    "progress": None,
 }
 
 
@@ -74,6 +80,10 @@ def _mark_reindex_scheduled(reason: str) -> str:
         last_finished_at=None,
         last_indexed_files=None,
         last_indexed_chunks=None,
+        last_embedded_chunks=None,
+        last_unchanged_files=None,
+        last_removed_files=None,
+        progress=None,
     )
     return run_id
 
@@ -174,7 +184,7 @@ def _require_expert_user(authorization: Optional[str]) -> str:
     return username
 
 
-def _reindex_kb_to_chroma(run_id: Optional[str] = None) -> None:
+def _reindex_kb_to_chroma(run_id: Optional[str] = None, *, incremental: bool = True) -> None:
     if not _reindex_lock.acquire(blocking=False):
         logger.info("KB re-index already in progress; skipping duplicate request")
         _set_reindex_status(
@@ -188,18 +198,22 @@ def _reindex_kb_to_chroma(run_id: Optional[str] = None) -> None:
     _set_reindex_status(
         state="in_progress",
         current_run_id=active_run_id,
+        last_mode="incremental" if incremental else "full",
         last_started_at=_utc_now_iso(),
         last_finished_at=None,
         last_error=None,
         last_indexed_files=None,
         last_indexed_chunks=None,
+        last_embedded_chunks=None,
+        last_unchanged_files=None,
+        last_removed_files=None,
+        progress=None,
     )
 
     try:
         try:
-            from app.vector_store.chroma_store import ChromaVectorStore
             from app.vector_store.kb_indexer import index_kb
-            from app.vector_store.ollama_embeddings import OllamaEmbeddingClient
+            from app.vector_store.runtime import get_embedder, get_vector_store
         except Exception as exc:
             logger.info("Vector search disabled (chromadb not installed); skipping KB re-index")
             _set_reindex_status(
@@ -211,19 +225,25 @@ def _reindex_kb_to_chroma(run_id: Optional[str] = None) -> None:
             return
 
         cfg = load_vector_store_config()
-        store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
-        embedder = OllamaEmbeddingClient(
-            base_url=cfg.ollama_base_url,
-            model=cfg.ollama_embed_model,
-            timeout_s=cfg.ollama_embed_timeout_s,
-        )
+        store = get_vector_store()
+        embedder = get_embedder()
 
         try:
-            stats = index_kb(store=store, embedder=embedder)
+            stats = index_kb(
+                store=store,
+                embedder=embedder,
+                incremental=incremental,
+                embed_workers=cfg.index_embed_workers,
+                progress=lambda snapshot: _set_reindex_status(progress=snapshot),
+            )
             logger.info(
-                "KB re-index completed: files=%s chunks=%s persist_dir=%s",
+                "KB re-index completed: mode=%s files=%s chunks=%s embedded=%s unchanged=%s removed=%s persist_dir=%s",
+                "incremental" if incremental else "full",
                 stats.get("files"),
                 stats.get("chunks"),
+                stats.get("embedded_chunks"),
+                stats.get("unchanged_files"),
+                stats.get("removed_files"),
                 str(cfg.persist_dir),
             )
             _set_reindex_status(
@@ -233,6 +253,9 @@ def _reindex_kb_to_chroma(run_id: Optional[str] = None) -> None:
                 last_error=None,
                 last_indexed_files=stats.get("files"),
                 last_indexed_chunks=stats.get("chunks"),
+                last_embedded_chunks=stats.get("embedded_chunks"),
+                last_unchanged_files=stats.get("unchanged_files"),
+                last_removed_files=stats.get("removed_files"),
             )
         except Exception as exc:
             logger.exception("KB re-index failed")
@@ -347,72 +370,7 @@ def _next_available_kb_path(base_name: str, suggestion_id: str) -> Path:
     raise HTTPException(status_code=409, detail="Could not allocate unique KB file path")
 
 
-_WORD_RE = re.compile(r"[0-9A-Za-zÀ-ÖØ-öø-ÿ]+", re.UNICODE)
-
-
-def _tokenize_for_similarity(text: str, *, max_tokens: int = 6000) -> list[str]:
-    tokens = _WORD_RE.findall((text or "").lower())
-    if len(tokens) > max_tokens:
-        tokens = tokens[:max_tokens]
-    return tokens
-
-
-def _shingles(tokens: list[str], *, n: int = 5, max_shingles: int = 20000) -> set[int]:
-    if n <= 0:
-        raise ValueError("n must be >= 1")
-    if len(tokens) < n:
-        return set()
-
-    out: set[int] = set()
-    for i in range(0, len(tokens) - n + 1):
-        sh = " ".join(tokens[i : i + n])
-        h = hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest()
-        out.add(int.from_bytes(h, "big"))
-        if len(out) >= max_shingles:
-            break
-    return out
-
-
-def _similarity_metrics(new_text: str, existing_text: str) -> tuple[float, float, float]:
-    new_tokens = _tokenize_for_similarity(new_text)
-    existing_tokens = _tokenize_for_similarity(existing_text)
-
-    new_set = _shingles(new_tokens)
-    existing_set = _shingles(existing_tokens)
-    if not new_set or not existing_set:
-        return 0.0, 0.0, 0.0
-
-    inter = len(new_set & existing_set)
-    union = len(new_set | existing_set)
-    jaccard = inter / union if union else 0.0
-    coverage_new = inter / len(new_set) if new_set else 0.0
-    coverage_existing = inter / len(existing_set) if existing_set else 0.0
-    return jaccard, coverage_new, coverage_existing
-
-
-def _iter_kb_markdown_files() -> list[Path]:
-    root = _kb_raw_root()
-    if not root.exists():
-        return []
-
-    files: list[Path] = []
-    for p in root.rglob("*.md"):
-        name = p.name.lower()
-        if name in {"readme.md", "_template.md"}:
-            continue
-        if p.name.startswith("_"):
-            continue
-        files.append(p)
-
-    files.sort(key=lambda x: str(x).lower())
-    return files
-
-
-def _read_text_best_effort(path: Path, *, max_chars: int = 300_000) -> str:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        text = path.read_text(encoding="utf-8", errors="replace")
-    if len(text) > max_chars:
-        return text[:max_chars]
-    return text
+# Similarity helpers live in app.kb.similarity; kept under the old names for callers here.
+_tokenize_for_similarity = tokenize_for_similarity
+_shingles = shingles
+_similarity_metrics = similarity_metrics
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Optional
+
+import httpx
+
+
+_lock = threading.Lock()
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive AsyncClient for calls to Ollama from async routes.
+
+    An httpx client is bound to the event loop it was first used on; a new one is
+    created if the running loop changes (e.g. a new TestClient in tests).
+    """
+
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if _client is None or _client_loop is not loop or _client.is_closed:
+            max_connections = int(os.getenv("OLLAMA_HTTP_MAX_CONNECTIONS", "20"))
+            _client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                # Callers pass per-request timeouts; this is only the fallback.
+                timeout=httpx.Timeout(60.0),
+            )
+            _client_loop = loop
+        return _client
+
+
+async def aclose_async_http_client() -> None:
+    global _client, _client_loop
+
+    with _lock:
+        client, _client, _client_loop = _client, None, None
+    if client is not None:
+        await client.aclose()
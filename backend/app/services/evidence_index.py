@@ -0,0 +1,121 @@
+"""Lookup of evidence quotes (KILDE: "...") in a source text.
+
+Quotes written by the LLM rarely match the extracted text byte for byte: whitespace
+and line breaks differ, and dashes/quotes are often swapped for their ASCII forms.
+Both sides are therefore normalized before matching. `EvidenceIndex` normalizes the
+source once, so the same index can be shared by every validation stage of a
+generation, and maps matches back to offsets in the original text for highlighting.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from typing import Iterable, Optional
+
+
+_CHAR_MAP = str.maketrans(
+    {
+        "\u2013": "-",  # en dash
+        "\u2014": "-",  # em dash
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2018": "'",
+        "\u2019": "'",
+    }
+)
+_RUN_RE = re.compile(r"\S+")
+# No space is kept in front of these (e.g. "trykk ," -> "trykk,").
+_NO_SPACE_BEFORE = frozenset(",.;:)")
+
+# Evidence markers anywhere in a rendered suggestion (one per bullet).
+QUOTE_RE = re.compile(r"\(KILDE:\s*\"([^\"]{8,220})\"\)")
+
+
+def normalize_for_evidence(text: str) -> str:
+    """Collapse whitespace and map typographic dashes/quotes to ASCII.
+
+    Keep conservative: everything else must match the source exactly.
+    """
+
+    out: list[str] = []
+    for run in _RUN_RE.findall((text or "").translate(_CHAR_MAP)):
+        if out and run[0] not in _NO_SPACE_BEFORE:
+            out.append(" ")
+        out.append(run)
+    return "".join(out)
+
+
+class EvidenceIndex:
+    """Normalized source text for repeated quote lookups.
+
+    The normalized text is built once from runs of non-whitespace characters; only the
+    start of each run is stored to map a match back to the original text, so building
+    the index is a single regex pass even for very long sources.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text or ""
+        parts: list[str] = []
+        norm_starts: list[int] = []
+        orig_starts: list[int] = []
+        pos = 0
+        for m in _RUN_RE.finditer(self.text.translate(_CHAR_MAP)):
+            run = m.group()
+            if parts and run[0] not in _NO_SPACE_BEFORE:
+                parts.append(" ")
+                pos += 1
+            norm_starts.append(pos)
+            orig_starts.append(m.start())
+            parts.append(run)
+            pos += len(run)
+        self.normalized = "".join(parts)
+        self._norm_starts = norm_starts
+        self._orig_starts = orig_starts
+        self._spans: dict[str, Optional[tuple[int, int]]] = {}
+
+    def _to_original(self, norm_pos: int) -> int:
+        # Positions inside a run map 1:1; translate() never changes the length.
+        i = bisect_right(self._norm_starts, norm_pos) - 1
+        return self._orig_starts[i] + (norm_pos - self._norm_starts[i])
+
+    def find(self, quote: str) -> Optional[tuple[int, int]]:
+        """(start, end) of `quote` in the original text, or None if it does not occur."""
+
+        if quote in self._spans:
+            return self._spans[quote]
+        span: Optional[tuple[int, int]] = None
+        quote_norm = normalize_for_evidence(quote)
+        if quote_norm:
+            start = self.normalized.find(quote_norm)
+            if start >= 0:
+                # Normalized quotes never end in whitespace, so the last character lies inside a run.
+                span = (self._to_original(start), self._to_original(start + len(quote_norm) - 1) + 1)
+        if span is None and quote:
+            start = self.text.find(quote)
+            if start >= 0:
+                span = (start, start + len(quote))
+        self._spans[quote] = span
+        return span
+
+    def contains(self, quote: str) -> bool:
+        return self.find(quote) is not None
+
+    def spans(self, quotes: Iterable[str]) -> list[dict]:
+        """One entry per distinct quote: {quote, start, end}; start/end are None when not found."""
+
+        out: list[dict] = []
+        seen: set[str] = set()
+        for quote in quotes:
+            if quote in seen:
+                continue
+            seen.add(quote)
+            span = self.find(quote)
+            out.append({"quote": quote, "start": span[0] if span else None, "end": span[1] if span else None})
+        return out
+
+
+def quotes_in(text: str) -> list[str]:
+    """Evidence quotes in a rendered suggestion, in order of appearance."""
+
+    return [m.group(1).strip() for m in QUOTE_RE.finditer(text or "")]
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from app.workflow_db.db import get_connection
+
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict[str, Any]], None]
+
+# Interactive jobs are always claimed before bulk jobs. Document parsing has its own
+# lane (and workers) so uploads are not stuck behind long LLM generations.
+LANES = ("interactive", "bulk", "parse")
+
+_handlers: dict[str, JobHandler] = {}
+_wakeup = threading.Event()
+
+
+def register_job_handler(kind: str, handler: JobHandler) -> None:
+    _handlers[kind] = handler
+
+
+def enqueue_job(
+    kind: str,
+    payload: dict[str, Any],
+    *,
+    lane: str = "bulk",
+    dedupe_key: Optional[str] = None,
+    max_attempts: int = 3,
+) -> Optional[str]:
+    """Persist a job and wake up the workers.
+
+    Returns the new job id, or None if a queued/running job with the same
+    `dedupe_key` already exists.
+    """
+
+    if lane not in LANES:
+        raise ValueError(f"Unknown job lane: {lane}")
+
+    job_id = str(uuid.uuid4())
+    with get_connection() as conn:
+        # Lookup and insert under one write lock, so a constraint error is a real error
+        # and never mistaken for a duplicate.
+        conn.execute("BEGIN IMMEDIATE")
+        if dedupe_key is not None:
+            active = conn.execute(
+                "SELECT 1 FROM jobs WHERE dedupe_key = ? AND status IN ('queued','running') LIMIT 1",
+                (dedupe_key,),
+            ).fetchone()
+            if active is not None:
+                return None
+        conn.execute(
+            """
+            INSERT INTO jobs (job_id, kind, payload_json, lane, dedupe_key, max_attempts, available_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), lane, dedupe_key, max(1, max_attempts), time.time()),
+        )
+
+    _wakeup.set()
+    return job_id
+
+
+def active_job_count(lane: str) -> int:
+    """Number of queued or running jobs in `lane` (an index lookup; cheap enough for hot endpoints)."""
+
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE lane = ? AND status IN ('queued','running')",
+            (lane,),
+        ).fetchone()
+    return int(row[0])
+
+
+def prune_finished_jobs(retention_days: Optional[float] = None) -> int:
+    """Delete succeeded/failed jobs that finished more than `retention_days` ago.
+
+    Defaults to JOB_RETENTION_DAYS (7); 0 keeps everything. Returns the number of rows removed.
+    """
+
+    days = float(os.getenv("JOB_RETENTION_DAYS", "7")) if retention_days is None else float(retention_days)
+    if days <= 0:
+        return 0
+    with get_connection() as conn:
+        cur = conn.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded','failed') AND finished_at < datetime('now', ?)",
+            (f"-{days} days",),
+        )
+    return int(cur.rowcount)
+
+
+_prune_lock = threading.Lock()
+_last_prune: Optional[float] = None
+
+
+def _maybe_prune_finished_jobs() -> None:
+    # Called from every pool's heartbeat; runs at most once per JOB_PRUNE_INTERVAL_S per process.
+    global _last_prune
+
+    interval_s = float(os.getenv("JOB_PRUNE_INTERVAL_S", "3600"))
+    with _prune_lock:
+        now = time.monotonic()
+        if _last_prune is not None and now - _last_prune < interval_s:
+            return
+        _last_prune = now
+    try:
+        removed = prune_finished_jobs()
+    except Exception:
+        logger.exception("Failed to prune finished jobs")
+        return
+    if removed:
+        logger.info("Pruned %s finished jobs", removed)
+
+
+def job_counts() -> dict[str, dict[str, int]]:
+    """Number of jobs per lane and status (for status/metrics endpoints)."""
+
+    out: dict[str, dict[str, int]] = {lane: {} for lane in LANES}
+    with get_connection() as conn:
+        rows = conn.execute("SELECT lane, status, COUNT(*) AS n FROM jobs GROUP BY lane, status").fetchall()
+    for row in rows:
+        out.setdefault(row["lane"], {})[row["status"]] = int(row["n"])
+    return out
+
+
+def _claim_next_job(owner: str, lease_s: float, lanes: tuple[str, ...] = LANES) -> Optional[dict[str, Any]]:
+    now = time.time()
+    lane_marks = ", ".join("?" for _ in lanes)
+    with get_connection() as conn:
+        # Take the write lock up front so two workers/processes cannot claim the same row.
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            f"""
+            SELECT job_id, kind, payload_json, lane, attempts, max_attempts
+            FROM jobs
+            WHERE lane IN ({lane_marks})
+              AND ((status = 'queued' AND available_at <= ?)
+                   OR (status = 'running' AND lease_expires_at < ?))
+            ORDER BY CASE lane WHEN 'interactive' THEN 0 ELSE 1 END, available_at, created_at
+            LIMIT 1
+            """,
+            (*lanes, now, now),
+        ).fetchone()
+        if row is None:
+            return None
+
+        conn.execute(
+            """
+            UPDATE jobs
+            SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_expires_at = ?
+            WHERE job_id = ?
+            """,
+            (owner, now + lease_s, row["job_id"]),
+        )
+        job = dict(row)
+        job["attempts"] = int(row["attempts"]) + 1
+        return job
+
+
+def _finish_job(job: dict[str, Any], owner: str, error: Optional[str], retry_base_s: float) -> None:
+    with get_connection() as conn:
+        if error is None:
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'succeeded', lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = NULL, finished_at = datetime('now')
+                WHERE job_id = ? AND lease_owner = ?
+                """,
+                (job["job_id"], owner),
+            )
+        elif job["attempts"] < job["max_attempts"]:
+            # Exponential backoff: base, 2*base, 4*base, ...
+            delay = retry_base_s * (2 ** (job["attempts"] - 1))
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = ?, available_at = ?
+                WHERE job_id = ? AND lease_owner = ?
+                """,
+                (error, time.time() + delay, job["job_id"], owner),
+            )
+        else:
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = ?, finished_at = datetime('now')
+                WHERE job_id = ? AND lease_owner = ?
+                """,
+                (error, job["job_id"], owner),
+            )
+
+
+class JobWorkerPool:
+    """Fixed-size pool of worker threads that drain the SQLite `jobs` table.
+
+    Each claimed job holds a lease that a heartbeat thread renews while it runs.
+    If the process dies, the lease expires and another worker (in this or a new
+    process) picks the job up again, so queued work survives restarts/deploys.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        lease_s: float = 120.0,
+        poll_interval_s: float = 1.0,
+        retry_base_s: float = 30.0,
+        lanes: tuple[str, ...] = LANES,
+        name: str = "job",
+    ) -> None:
+        unknown = set(lanes) - set(LANES)
+        if not lanes or unknown:
+            raise ValueError(f"Unknown job lanes: {sorted(unknown) or lanes}")
+        self.workers = max(1, int(workers))
+        self.lanes = tuple(lanes)
+        self.name = name
+        self.lease_s = max(5.0, float(lease_s))
+        self.poll_interval_s = max(0.05, float(poll_interval_s))
+        self.retry_base_s = max(0.0, float(retry_base_s))
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._active_lock = threading.Lock()
+        self._active: set[str] = set()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work_loop, name=f"{self.name}-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name=f"{self.name}-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(
+            "Job worker pool started: name=%s lanes=%s workers=%s owner=%s",
+            self.name,
+            ",".join(self.lanes),
+            self.workers,
+            self.owner,
+        )
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        self._stop.set()
+        _wakeup.set()
+        deadline = time.monotonic() + timeout_s
+        for t in self._threads:
+            # Long LLM calls are not interrupted; their lease simply expires and the job is resumed later.
+            t.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def run_once(self) -> bool:
+        """Claim and run a single job; returns False if nothing was available."""
+
+        try:
+            job = _claim_next_job(self.owner, self.lease_s, self.lanes)
+        except Exception:
+            logger.exception("Failed to claim job")
+            return False
+        if job is None:
+            return False
+
+        with self._active_lock:
+            self._active.add(job["job_id"])
+        error: Optional[str] = None
+        try:
+            handler = _handlers.get(job["kind"])
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind '{job['kind']}'")
+            handler(json.loads(job["payload_json"] or "{}"))
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %s", job["job_id"], job["kind"], job["attempts"])
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            with self._active_lock:
+                self._active.discard(job["job_id"])
+
+        try:
+            _finish_job(job, self.owner, error, self.retry_base_s)
+        except Exception:
+            logger.exception("Failed to record result for job %s", job["job_id"])
+        return True
+
+    def _work_loop(self) -> None:
+        while not self._stop.is_set():
+            if self.run_once():
+                continue
+            _wakeup.wait(self.poll_interval_s)
+            _wakeup.clear()
+
+    def _heartbeat_loop(self) -> None:
+        interval = self.lease_s / 3.0
+        while not self._stop.wait(interval):
+            _maybe_prune_finished_jobs()
+            with self._active_lock:
+                active = list(self._active)
+            if not active:
+                continue
+            try:
+                with get_connection() as conn:
+                    conn.executemany(
+                        "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND lease_owner = ?",
+                        [(time.time() + self.lease_s, job_id, self.owner) for job_id in active],
+                    )
+            except Exception:
+                logger.exception("Failed to renew job leases")
+
+
+_pools: list[JobWorkerPool] = []
+
+
+def start_job_workers() -> list[JobWorkerPool]:
+    """Start the LLM/job workers and the document parsing workers."""
+
+    global _pools
+
+    if not _pools:
+        lease_s = float(os.getenv("JOB_LEASE_S", "120"))
+        _pools = [
+            JobWorkerPool(
+                workers=int(os.getenv("JOB_WORKERS", "2")),
+                lease_s=lease_s,
+                lanes=("interactive", "bulk"),
+            ),
+            # Parse jobs mostly wait on the parser process pool, so one thread per parser process.
+            JobWorkerPool(
+                workers=int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 2))),
+                lease_s=lease_s,
+                lanes=("parse",),
+                name="parse",
+            ),
+        ]
+    for pool in _pools:
+        pool.start()
+    return _pools
+
+
+def stop_job_workers() -> None:
+    global _pools
+
+    for pool in _pools:
+        pool.stop()
+    _pools = []
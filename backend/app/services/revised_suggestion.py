@@ -1,12 +1,33 @@
 from __future__ import annotations
 
+import contextvars
 import json
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
 
 import yaml
 
+from app.ai_services.llm_admission import LlmOverloadedError, get_llm_admission_controller
+from app.document_processing.line_classifier import (
+    BLANK,
+    HEADING,
+    NOISE,
+    NUMBER,
+    PAGE_NUMBER,
+    TOC,
+    TOC_HEADING,
+    classify_line,
+    classify_lines,
+    strip_page_marker,
+)
+from app.services.evidence_index import EvidenceIndex
+
 from app.services.suggestion_postprocess import postprocess_payload_sections as _postprocess_payload_sections
 from app.services.suggestion_rendering import render_markdown_with_frontmatter
 
@@ -14,7 +35,6 @@ _ALLOWED_CATEGORIES = {"Sikkerhet", "Vedlikehold", "Miljø", "Kvalitet", "Prosed
 _MIN_EXTRACTED_WORDS = 40
 
 _JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
-_TOC_HEADING_RE = re.compile(r"^(innhold|innholdsfortegnelse|contents|table\s+of\s+contents)\b", re.IGNORECASE)
 _EVIDENCE_RE = re.compile(r"\(KILDE:\s*\"([^\"]{8,220})\"\)\s*$")
 _MISSING_MARKER = "(ikke oppgitt i utdraget)"
 
@@ -24,51 +44,26 @@ _SECTION_CHAPTER = "Kapittelvis sammendrag"
 _SECTION_DETAILS = "Relevante detaljer"
 _SECTION_ACTIONS = "Eventuelle tiltak / anbefalinger"
 
-def _normalize_for_evidence_match(text: str) -> str:
-    """Normalize text for evidence quote matching.
-
-    Keep conservative: collapse whitespace and normalize a few common Unicode
-    variants (dashes/quotes) that often differ between extraction and LLM output.
-    """
-
-    t = (text or "").replace("\r\n", "\n").replace("\r", "\n")
-    t = t.replace("\u2013", "-").replace("\u2014", "-")  # en/em dash
-    t = t.replace("\u201c", '"').replace("\u201d", '"')  # curly double quotes
-    t = t.replace("\u2018", "'").replace("\u2019", "'")  # curly single quotes
-    t = re.sub(r"\s+", " ", t).strip()
-    t = re.sub(r"\s+([,.;:)])", r"\1", t)
-    return t
-
-
 def _is_toc_line(line: str) -> bool:
-    s = (line or "").strip()
-    if not s:
-        return False
-    # e.g. "1 Helse og sikkerhet i PA-anlegget 2" or "1.2 Farlige stoffer 2"
-    if re.match(r"^\d+(?:\.\d+)*\s+\S+.*\s+\d{1,4}\s*$", s):
-        return True
-    # roman numeral page markers
-    if re.match(r"^\d+(?:\.\d+)*\s+\S+.*\s+[ivxlcdm]{1,6}\s*$", s, flags=re.IGNORECASE):
-        return True
-    return False
+    # e.g. "1 Helse og sikkerhet i PA-anlegget 2", "1.2 Farlige stoffer 2" or a roman page marker
+    return classify_line(line or "") == TOC
 
 
 def _looks_like_table_of_contents(text: str) -> bool:
     raw = (text or "").replace("\r\n", "\n").replace("\r", "\n")
-    lines = [ln for ln in raw.split("\n") if (ln or "").strip()]
-    if not lines:
+    head = [kind for kind, _s in islice(((k, s) for k, s in classify_lines(raw.split("\n")) if k != BLANK), 220)]
+    if not head:
         return False
 
-    head = lines[:220]
     # Strong signal: explicit heading near the start.
-    if any(_TOC_HEADING_RE.match((ln or "").strip()) for ln in head[:40]):
+    if TOC_HEADING in head[:40]:
         return True
 
     # Otherwise, ratio of TOC-like lines in the beginning.
     sample = head[: min(140, len(head))]
     if len(sample) < 10:
         return False
-    toc_like = sum(1 for ln in sample if _is_toc_line(ln))
+    toc_like = sample.count(TOC)
     ratio = toc_like / max(1, len(sample))
     return toc_like >= 8 and ratio >= 0.45
 
@@ -82,8 +77,12 @@ class GenerationPlan:
     num_predict: int
 
 
+_WORD_RE = re.compile(r"\b\w+\b")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
 def word_count(text: str) -> int:
-    return len(re.findall(r"\b\w+\b", text or ""))
+    return len(_WORD_RE.findall(text or ""))
 
 
 def is_effectively_empty(text: str) -> bool:
@@ -92,27 +91,13 @@ def is_effectively_empty(text: str) -> bool:
 
 def strip_pdf_noise_lines(text: str) -> str:
     lines: list[str] = []
-    for line in (text or "").splitlines():
-        s = line.strip()
-        if not s:
-            lines.append("")
-            continue
-
-        lower = s.lower()
-        if "authorized licensed use" in lower:
-            continue
-        if "downloaded on" in lower and "from ieee xplore" in lower:
-            continue
-        if "restrictions apply" in lower:
-            continue
-        if re.fullmatch(r"page\s*\d+", s, flags=re.IGNORECASE):
-            continue
-        if re.fullmatch(r"\d{3,}", s):
+    for kind, s in classify_lines((text or "").splitlines()):
+        if kind in (NOISE, PAGE_NUMBER):
             continue
         lines.append(s)
 
     cleaned = "\n".join(lines)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
+    cleaned = _BLANK_LINES_RE.sub("\n\n", cleaned)
     return cleaned.strip()
 
 
@@ -125,7 +110,7 @@ def strip_leading_table_of_contents(text: str) -> str:
 
     heading_idx: int | None = None
     for i in range(min(len(lines), 220)):
-        if _TOC_HEADING_RE.match((lines[i] or "").strip()):
+        if classify_line(lines[i]) == TOC_HEADING:
             heading_idx = i
             break
 
@@ -178,6 +163,9 @@ def strip_leading_table_of_contents(text: str) -> str:
     return raw.strip()
 
 
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+
+
 def _extract_toc_entries(text: str, *, max_items: int = 70) -> list[str]:
     """Extract chapter-like entries from a TOC snippet.
 
@@ -189,17 +177,14 @@ def _extract_toc_entries(text: str, *, max_items: int = 70) -> list[str]:
     out: list[str] = []
 
     for ln in lines:
-        if _TOC_HEADING_RE.match(ln):
-            continue
-        if not _is_toc_line(ln):
+        if classify_line(ln) != TOC:
             continue
 
         # Remove trailing page number / roman numeral.
-        cleaned = re.sub(r"\s+[0-9]{1,4}\s*$", "", ln).strip()
-        cleaned = re.sub(r"\s+[ivxlcdm]{1,6}\s*$", "", cleaned, flags=re.IGNORECASE).strip()
+        cleaned = strip_page_marker(ln)
 
         # Normalize spacing.
-        cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -\t")
+        cleaned = _MULTI_SPACE_RE.sub(" ", cleaned).strip(" -\t")
         if not cleaned:
             continue
         out.append(cleaned)
@@ -301,6 +286,34 @@ def clean_extracted_text(text: str) -> str:
     return cleaned.strip()
 
 
+# Each pattern starts with a literal (the \b / preceding-letter check is a lookbehind),
+# which lets the regex engine skip ahead instead of trying every position of the text.
+_SPLIT_WORD_RE = re.compile(r"(?m)([A-Za-zÆØÅæøå])\n\s*([a-zæøå])")
+_MISSING_SENTENCE_SPACE_RE = re.compile(r"(?<=[a-zæøå])\.(?=[A-ZÆØÅ])")
+_MISSING_CASE_SPACE_RE = re.compile(r"(?<=[a-zæøå])([A-ZÆØÅ0-9])")
+
+# Common chemistry/unit artifacts from DOCX/PDF extraction, applied in this order.
+# Keep conservative: only normalize well-known patterns.
+_FORMULA_FIXES = tuple(
+    (re.compile(pattern, flags), replacement)
+    for pattern, replacement, flags in (
+        (r"[Cc](?<!\w[Cc])l\s*2\b", "Cl2", 0),
+        (r"[Hh](?<!\w[Hh])\s*2\b", "H2", 0),
+        (r"[Oo](?<!\w[Oo])\s*2\b", "O2", 0),
+        (r"[Hh](?<!\w[Hh])\s*2\s*[Oo]\b", "H2O", 0),
+        (r"[Nn](?<!\w[Nn])a\s*OH\b", "NaOH", 0),
+        (r"[Nn](?<!\w[Nn])a\s*Cl\b", "NaCl", 0),
+        (r"[Nn](?<!\w[Nn])a\s*2\s*SO\s*4\b", "Na2SO4", 0),
+        (r"H(?<!\wH)\s*2\s*SO\s*4\b", "H2SO4", 0),
+        (r"N(?<!\wN)i\s*CO\s*3\b", "NiCO3", 0),
+        (r"p(?<!\wp)\s*H\b", "pH", 0),
+        (r"m(?<!\wm)\s*V\b", "mV", 0),
+        # Spacing glitches like "vedca" -> "ved ca".
+        (r"v(?<!\wv)edca\b", "ved ca", re.IGNORECASE),
+    )
+)
+
+
 def repair_extraction_artifacts(text: str) -> str:
     """Best-effort cleanup of extraction artifacts.
 
@@ -311,35 +324,21 @@ def repair_extraction_artifacts(text: str) -> str:
 
     # Join words that were split by a newline in the middle of a word.
     # Example: "tilgjengeli\ng" -> "tilgjengelig"
-    t = re.sub(r"(?m)([A-Za-zÆØÅæøå])\n\s*([a-zæøå])", r"\1\2", t)
+    t = _SPLIT_WORD_RE.sub(r"\1\2", t)
 
     # Insert missing space after a period when a new sentence starts immediately.
     # Example: "tilgjengelig.Løsningen" -> "tilgjengelig. Løsningen"
-    t = re.sub(r"([a-zæøå])\.([A-ZÆØÅ])", r"\1. \2", t)
+    t = _MISSING_SENTENCE_SPACE_RE.sub(". ", t)
 
     # Insert missing spaces when a lowercase letter is immediately followed by uppercase/digit.
     # Example: "fraCO2" -> "fra CO2"
-    t = re.sub(r"([a-zæøå])([A-ZÆØÅ0-9])", r"\1 \2", t)
-
-    # Common chemistry/unit artifacts from DOCX/PDF extraction.
-    # Keep conservative: only normalize well-known patterns.
-    t = re.sub(r"\b[Cc]l\s*2\b", "Cl2", t)
-    t = re.sub(r"\b[Hh]\s*2\b", "H2", t)
-    t = re.sub(r"\b[Oo]\s*2\b", "O2", t)
-    t = re.sub(r"\b[Hh]\s*2\s*[Oo]\b", "H2O", t)
-    t = re.sub(r"\b[Nn]a\s*OH\b", "NaOH", t)
-    t = re.sub(r"\b[Nn]a\s*Cl\b", "NaCl", t)
-    t = re.sub(r"\b[Nn]a\s*2\s*SO\s*4\b", "Na2SO4", t)
-    t = re.sub(r"\bH\s*2\s*SO\s*4\b", "H2SO4", t)
-    t = re.sub(r"\bNi\s*CO\s*3\b", "NiCO3", t)
-    t = re.sub(r"\bp\s*H\b", "pH", t)
-    t = re.sub(r"\bm\s*V\b", "mV", t)
-
-    # Spacing glitches like "vedca" -> "ved ca".
-    t = re.sub(r"\bvedca\b", "ved ca", t, flags=re.IGNORECASE)
+    t = _MISSING_CASE_SPACE_RE.sub(r" \1", t)
+
+    for pattern, replacement in _FORMULA_FIXES:
+        t = pattern.sub(replacement, t)
 
     # Reduce excessive blank lines.
-    t = re.sub(r"\n{3,}", "\n\n", t)
+    t = _BLANK_LINES_RE.sub("\n\n", t)
     return t.strip()
 
 
@@ -517,6 +516,34 @@ def unreadable_pdf_message(original_filename: str) -> str:
     return render_markdown_with_frontmatter(title=safe_title, body=body)
 
 
+def parsing_in_progress_message(original_filename: str) -> str:
+    title = Path(original_filename).stem.strip() or "Untitled"
+    safe_title = title.replace('"', "'")
+    body = (
+        f"# {title}\n\n"
+        "## Kort sammendrag\n"
+        "- Teksten hentes ut av dokumentet. Et utkast vises her så snart det er ferdig.\n"
+    )
+
+    return render_markdown_with_frontmatter(title=safe_title, body=body)
+
+
+def unparseable_document_message(original_filename: str, error: str) -> str:
+    title = Path(original_filename).stem.strip() or "Untitled"
+    safe_title = title.replace('"', "'")
+    body = (
+        f"# {title}\n\n"
+        "## Kort sammendrag\n"
+        "- Teksten i dokumentet kunne ikke hentes ut, så KI har ikke laget et forslag.\n"
+        f"- Feil: {error}\n\n"
+        "## Hva du kan gjøre\n"
+        "- Sjekk at filen ikke er skadet eller passordbeskyttet, og last den opp på nytt.\n"
+        "- Alternativt: last opp en `.txt`/`.docx`-versjon av dokumentet.\n"
+    )
+
+    return render_markdown_with_frontmatter(title=safe_title, body=body)
+
+
 def build_plan(text: str) -> GenerationPlan:
     words = word_count(text)
 
@@ -684,14 +711,41 @@ JSON-SKJEMA:
 """.strip()
 
 
-_JSON_REPAIR_PROMPT = """
-Du er et verktøy som kun reparerer JSON.
+_MAP_CHUNK_PROMPT = """
+Du får ÉN del av et lengre dokument. Trekk ut det viktigste innholdet i denne delen, basert KUN på teksten.
 
-KRAV:
-- Returner KUN gyldig JSON (ingen tekst rundt).
-- Ikke legg til nye fakta; bruk "(ikke oppgitt i utdraget)".
+ABSOLUTT KRAV:
+- Ikke dikt opp fakta eller tiltak, og ikke bruk generell bransjekunnskap.
 - Skriv på norsk (bokmål).
-- Følg eksakt samme JSON-skjema som oppgitt.
+- HVER bullet MÅ avsluttes med et eksakt sitat fra delen som bevis:
+    (KILDE: "<eksakt sitat fra delen>")
+- Utelat punkter du ikke finner sitat for. Tomme lister er lov.
+
+MÅL FOR DENNE DELEN:
+- "Kort sammendrag": 1–3 bullets.
+- "Viktigste punkter": 2–6 bullets.
+- "Kapittelvis sammendrag": 1–4 bullets (bevar kapittel/underkapittel hvis synlig).
+- "Relevante detaljer": 0–6 bullets (tall, krav, roller, frekvenser, utstyr).
+- "Eventuelle tiltak / anbefalinger": kun tiltak som eksplisitt står i delen.
+
+OUTPUT (STRENGT):
+- Returner KUN gyldig JSON i samme skjema som under. Ingen Markdown eller forklaring.
+
+JSON-SKJEMA:
+{
+    "title": string,
+    "tags": string[],
+    "category": "Sikkerhet"|"Vedlikehold"|"Miljø"|"Kvalitet"|"Prosedyre"|"Annet",
+    "review_status": "pending",
+    "confidence_score": number,
+    "sections": {
+        "Kort sammendrag": string[],
+        "Viktigste punkter": string[],
+        "Kapittelvis sammendrag": string[],
+        "Relevante detaljer": string[],
+        "Eventuelle tiltak / anbefalinger": string[]
+    }
+}
 """.strip()
 
 
@@ -864,11 +918,14 @@ def _payload_is_too_thin(payload: dict) -> bool:
     return False
 
 
-def _validate_evidence(payload: dict, *, source_pack: str) -> str | None:
-    """Reject bullets that don't provide an exact evidence quote (unless it's the explicit missing marker)."""
+def _validate_evidence(payload: dict, *, source_pack: str = "", index: EvidenceIndex | None = None) -> str | None:
+    """Reject bullets that don't provide an exact evidence quote (unless it's the explicit missing marker).
+
+    Pass a prebuilt `index` when validating several payloads against the same source.
+    """
 
-    src = source_pack or ""
-    src_norm = _normalize_for_evidence_match(src)
+    if index is None:
+        index = EvidenceIndex(source_pack)
     sections = payload.get("sections") or {}
     if not isinstance(sections, dict):
         return "invalid:evidence:sections"
@@ -890,49 +947,44 @@ def _validate_evidence(payload: dict, *, source_pack: str) -> str | None:
             quote = (m.group(1) or "").strip()
             if not quote:
                 return f"invalid:evidence:empty_quote:{section_name}"
-            quote_norm = _normalize_for_evidence_match(quote)
-            if quote_norm and quote_norm in src_norm:
-                continue
-            if quote not in src:
+            if not index.contains(quote):
                 return f"invalid:evidence:quote_not_in_source:{section_name}"
 
     return None
 
 
+_EXPANSION_VERB_SIGNAL_RE = re.compile(
+    r"\b(skal|må|bor|bør|kan|ansvar|kontroll|vedlikehold|utslipp|tiltak|"
+    r"vurderes|reduseres|sendes|holdes|sjekk|stopp|start)\b",
+    flags=re.IGNORECASE,
+)
+_CLAUSE_PUNCT_RE = re.compile(r"[,;:]")
+# Not usable as expansion bullets: TOC entries, page/section numbers and bare numbered headings.
+_EXPANSION_SKIP_KINDS = frozenset({NOISE, PAGE_NUMBER, NUMBER, TOC, HEADING})
+
+
 def _collect_source_lines_for_expansion(source_text: str, *, max_items: int = 220) -> list[str]:
     raw = (source_text or "").replace("\r\n", "\n").replace("\r", "\n")
     out: list[str] = []
     seen: set[str] = set()
 
-    verb_signal = re.compile(
-        r"\b(skal|må|bor|bør|kan|ansvar|kontroll|vedlikehold|utslipp|tiltak|"
-        r"vurderes|reduseres|sendes|holdes|sjekk|stopp|start)\b",
-        flags=re.IGNORECASE,
-    )
-
     for ln in raw.split("\n"):
-        s = re.sub(r"\s+", " ", (ln or "").strip())
+        s = " ".join(ln.split())
         if not s:
             continue
-        if _is_toc_line(s):
-            continue
-        if re.fullmatch(r"\d+(?:[./]\d+)*", s):
-            continue
-        s_no_page = re.sub(r"\s+[0-9]{1,4}\s*$", "", s).strip()
-        s_no_page = re.sub(r"\s+[ivxlcdm]{1,6}\s*$", "", s_no_page, flags=re.IGNORECASE).strip()
-        if not s_no_page:
-            continue
-        # Exclude chapter-like headings such as "2.1 Utslippskrav ..." without sentence content.
-        if re.match(r"^\d+(?:\.\d+)*\s+\S+(?:\s+\S+){0,10}$", s_no_page):
+        if classify_line(s) in _EXPANSION_SKIP_KINDS:
             continue
+        s_no_page = strip_page_marker(s)
         if len(s_no_page) < 32:
             continue
         if s_no_page == "(ikke oppgitt i utdraget)":
             continue
         # Prefer lines that look like content sentences, not index labels.
-        words = re.findall(r"\b\w+\b", s_no_page, flags=re.UNICODE)
-        has_sentence_punct = bool(re.search(r"[,;:]", s_no_page))
-        if len(words) < 7 and not has_sentence_punct and not verb_signal.search(s_no_page):
+        if (
+            not _CLAUSE_PUNCT_RE.search(s_no_page)
+            and sum(1 for _ in islice(_WORD_RE.finditer(s_no_page), 7)) < 7
+            and not _EXPANSION_VERB_SIGNAL_RE.search(s_no_page)
+        ):
             continue
 
         key = s_no_page.casefold()
@@ -1039,12 +1091,23 @@ def render_yaml_markdown(payload: dict) -> str:
     return yaml_block + "\n\n".join(body_parts).strip() + "\n"
 
 
-def _build_enrichment_input(*, source_pack: str, payload: dict, last_problem: str | None) -> str:
+def _repair_task(raw: str, last_problem: str | None) -> str:
     return (
-        "KILDEUTDRAG (kun fakta herfra):\n\n"
-        + source_pack[:14000]
-        + "\n\n"
-        + "OPPGAVE: JSON-utkastet under er for tynt. Utvid det med flere konkrete og informative punkter, "
+        "OPPGAVE: Forrige svar var ikke gyldig JSON i skjemaet over. Reparer det.\n"
+        + "KRAV:\n"
+        + "- Returner KUN gyldig JSON (ingen tekst rundt).\n"
+        + "- Ikke legg til nye fakta; bruk '(ikke oppgitt i utdraget)' der informasjon mangler.\n"
+        + "- GYLDIG KATEGORI: Sikkerhet|Vedlikehold|Miljø|Kvalitet|Prosedyre|Annet\n"
+        + "- review_status MÅ være 'pending'.\n\n"
+        + (f"SISTE PROBLEM: {last_problem}\n\n" if last_problem else "")
+        + "Ugyldig output som må repareres til gyldig JSON:\n\n"
+        + (raw or "")[:8000]
+    )
+
+
+def _enrichment_task(payload: dict, last_problem: str | None) -> str:
+    return (
+        "OPPGAVE: JSON-utkastet under er for tynt. Utvid det med flere konkrete og informative punkter, "
         + "uten å finne på noe.\n"
         + "KRAV:\n"
         + "- Hold deg til fakta i kildeteksten.\n"
@@ -1058,18 +1121,9 @@ def _build_enrichment_input(*, source_pack: str, payload: dict, last_problem: st
     )
 
 
-def _build_seeded_rewrite_input(
-    *,
-    source_pack: str,
-    seeded_markdown: str,
-    payload: dict,
-    last_problem: str | None,
-) -> str:
+def _seeded_rewrite_task(*, seeded_markdown: str, payload: dict, last_problem: str | None) -> str:
     return (
-        "KILDEUTDRAG (kun fakta herfra):\n\n"
-        + source_pack[:18000]
-        + "\n\n"
-        + "UTKAST-MAL (deterministisk fallback, bruk som strukturhjelp - ikke som ny faktakilde):\n\n"
+        "UTKAST-MAL (deterministisk fallback, bruk som strukturhjelp - ikke som ny faktakilde):\n\n"
         + seeded_markdown[:18000]
         + "\n\n"
         + "OPPGAVE: Lag et fyldigere JSON-utkast fra kildeteksten. "
@@ -1087,17 +1141,379 @@ def _build_seeded_rewrite_input(
     )
 
 
+def _norwegian_task(payload: dict) -> str:
+    return (
+        "OPPGAVE: Oversett/forbedre følgende JSON til norsk (bokmål) uten å endre fakta.\n"
+        "KRAV: Behold alle (KILDE: \"...\") sitater uendret.\n"
+        "Returner KUN gyldig JSON i samme skjema.\n\n"
+        + json.dumps(payload, ensure_ascii=False)[:12000]
+    )
+
+
+def _parse_payload(raw: str | None, *, original_filename: str) -> tuple[dict | None, str | None]:
+    """Parse, normalize and validate an LLM answer. Returns (payload, None) or (None, problem)."""
+
+    json_text = _extract_json(raw or "")
+    if not json_text:
+        return None, "no_json"
+    try:
+        parsed = json.loads(json_text)
+    except Exception:
+        return None, "json_parse_error"
+    if not isinstance(parsed, dict):
+        return None, "json_not_object"
+    payload = _normalize_json_payload(parsed, original_filename=original_filename)
+    err = _validate_payload(payload)
+    if err is not None:
+        return None, f"validate:{err}"
+    return payload, None
+
+
+# Don't start a stage with less time left than this; it would likely hit the budget mid-call.
+_MIN_STAGE_S = 20.0
+
+
+class _StagedLlm:
+    """Runs the LLM stages for one suggestion within a wall-clock, call and token budget.
+
+    Every stage sends the same prefix (instructions + source excerpts) followed by a short
+    stage-specific task, so Ollama can reuse the KV cache for the prefix instead of
+    processing the whole source pack again for each repair/enrichment step.
+
+    Token use is an estimate: ~4 characters per prompt token (the shared prefix is counted
+    once) plus the `num_predict` reserved for the answer.
+
+    Map-reduce chunk summaries are charged to the same time and token budget through
+    `reserve_map`; their number is capped by SUGGESTION_MAX_CHUNKS instead of the call cap.
+    """
+
+    def __init__(self, agent, *, source_pack: str, llm_options: dict | None) -> None:
+        self.agent = agent
+        self.prefix = "KILDEUTDRAG (kun fakta herfra):\n\n" + (source_pack or "").strip() + "\n\n---\n\n"
+        self.llm_options = llm_options or {}
+        self.budget_s = float(os.getenv("SUGGESTION_BUDGET_S", "600"))
+        self.max_calls = int(os.getenv("SUGGESTION_MAX_LLM_CALLS", "5"))
+        self.token_budget = int(os.getenv("SUGGESTION_TOKEN_BUDGET", "60000"))
+        self.started = time.monotonic()
+        self.calls = 0
+        self.tokens_used = 0
+        self.exhausted: str | None = None
+        self.stages: list[dict] = []
+        self.map_calls = 0
+        self._prefix_sent = False
+        # Map-phase reservations come from worker threads.
+        self._lock = threading.Lock()
+
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started
+
+    def record(self, stage: str, **info) -> None:
+        self.stages.append({"stage": stage, **info})
+
+    def mark(self, outcome: str) -> None:
+        """Set the outcome of the last stage (e.g. after its answer was parsed)."""
+
+        if self.stages:
+            self.stages[-1]["outcome"] = outcome
+
+    def run(self, stage: str, task: str, *, num_predict: int) -> str | None:
+        """Run one stage; returns None without calling the LLM if the budget does not allow it."""
+
+        content = self.prefix + task
+        cost = (len(task) if self._prefix_sent else len(content)) // 4 + int(num_predict)
+        with self._lock:
+            if self.calls >= self.max_calls:
+                self.exhausted = "calls"
+            else:
+                self.exhausted = self._over_budget(cost)
+        if self.exhausted:
+            self.record(stage, outcome=f"skipped:budget_{self.exhausted}")
+            return None
+
+        started = time.monotonic()
+        outcome = "ok"
+        try:
+            return self.agent.process_document(
+                _STRUCTURED_JSON_PROMPT,
+                content,
+                # The task sits at the end, so the prompt must never be trimmed.
+                max_input_chars=len(content),
+                llm_options={"format": "json", "temperature": 0, "num_predict": num_predict, **self.llm_options},
+            )
+        except Exception as exc:
+            outcome = f"error:{type(exc).__name__}"
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.tokens_used += cost
+            self._prefix_sent = True
+            self.record(
+                stage,
+                ms=round(1000.0 * (time.monotonic() - started)),
+                num_predict=int(num_predict),
+                prompt_chars=len(content),
+                outcome=outcome,
+            )
+
+    def _over_budget(self, cost: int) -> str | None:
+        if self.budget_s - self.elapsed_s() < _MIN_STAGE_S:
+            return "time"
+        if self.tokens_used + cost > self.token_budget:
+            return "tokens"
+        return None
+
+    def reserve_map(self, cost: int) -> str | None:
+        """Charge one map-phase call; returns the exhausted budget ("time"/"tokens") instead if it does not fit."""
+
+        with self._lock:
+            reason = self._over_budget(cost)
+            if reason:
+                self.exhausted = reason
+                return reason
+            self.map_calls += 1
+            self.tokens_used += cost
+            return None
+
+    def diagnostics(self) -> dict:
+        return {
+            "elapsed_ms": round(1000.0 * self.elapsed_s()),
+            "llm_calls": self.calls,
+            "map_calls": self.map_calls,
+            "tokens_est": self.tokens_used,
+            "budget": {"seconds": self.budget_s, "calls": self.max_calls, "tokens": self.token_budget},
+            "exhausted": self.exhausted,
+            "stages": self.stages,
+        }
+
+
+_SECTION_HEADING_RE = re.compile(r"^\d+(?:\.\d+)*\.?\s+[A-ZÆØÅ]")
+
+# Per-section caps for the merged map-reduce payload (same ranges as _STRUCTURED_JSON_PROMPT).
+_REDUCE_SECTION_LIMITS = {
+    _SECTION_SHORT: 12,
+    _SECTION_KEY: 22,
+    _SECTION_CHAPTER: 25,
+    _SECTION_DETAILS: 20,
+    _SECTION_ACTIONS: 12,
+}
+
+
+def map_reduce_enabled() -> bool:
+    return os.getenv("SUGGESTION_MAP_REDUCE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def split_into_chunks(cleaned: str, *, chunk_chars: int, max_chunks: int) -> list[str]:
+    """Split text into chunks of at most ~`chunk_chars`, preferably at numbered section headings.
+
+    Paragraphs are never split unless a single paragraph is longer than a chunk. If the
+    text needs more than `max_chunks` chunks, evenly spaced chunks (always including the
+    first and last) are kept so the number of LLM calls stays bounded.
+    """
+
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n|\n(?=\d+(?:\.\d+)*\.?\s+[A-ZÆØÅ])", cleaned or "") if p.strip()]
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for para in paragraphs:
+        pieces = [para[i : i + chunk_chars] for i in range(0, len(para), chunk_chars)] or [para]
+        for piece in pieces:
+            starts_section = bool(_SECTION_HEADING_RE.match(piece))
+            # Close the chunk at a section heading once it is reasonably full, or when it would overflow.
+            if current and (size + len(piece) > chunk_chars or (starts_section and size >= chunk_chars // 2)):
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+
+    if len(chunks) > max_chunks > 1:
+        step = (len(chunks) - 1) / (max_chunks - 1)
+        chunks = [chunks[round(i * step)] for i in range(max_chunks)]
+    return chunks
+
+
+def _map_concurrency(agent) -> int:
+    url = getattr(getattr(agent, "llm_provider", None), "url", None)
+    if not url:
+        return 1
+    # More threads than admission slots would only wait in the controller's queue.
+    return get_llm_admission_controller(url).max_concurrent
+
+
+_MAP_NUM_PREDICT = 1600
+
+
+def _summarize_chunk(agent, chunk: str, *, index: int, total: int, original_filename: str, llm_options: dict) -> dict | None:
+    raw = agent.process_document(
+        _MAP_CHUNK_PROMPT,
+        f"[DEL {index + 1} AV {total}]\n{chunk}",
+        max_input_chars=len(chunk) + 200,
+        llm_options={"format": "json", "temperature": 0, "num_predict": _MAP_NUM_PREDICT, **(llm_options or {})},
+    )
+    json_text = _extract_json(raw or "")
+    if not json_text:
+        return None
+    try:
+        parsed = json.loads(json_text)
+    except Exception:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+
+    fragment = _normalize_json_payload(parsed, original_filename=original_filename)
+    evidence = EvidenceIndex(chunk)
+    # Keep only bullets whose quote really occurs in this chunk.
+    for name, items in fragment["sections"].items():
+        kept: list[str] = []
+        for item in items:
+            m = _EVIDENCE_RE.search(item.strip())
+            quote = (m.group(1) or "").strip() if m else ""
+            if quote and evidence.contains(quote):
+                kept.append(item.strip())
+        fragment["sections"][name] = kept
+    return fragment
+
+
+def _bullet_key(item: str) -> str:
+    m = _EVIDENCE_RE.search(item)
+    text = item[: m.start()] if m else item
+    return re.sub(r"\W+", " ", text).strip().casefold()
+
+
+def reduce_chunk_payloads(fragments: list[dict], *, original_filename: str) -> dict:
+    """Merge per-chunk payloads deterministically.
+
+    Bullets are deduplicated and taken round-robin across chunks (in document order),
+    so every part of the document is represented before any chunk gets a second bullet.
+    """
+
+    sections: dict[str, list[str]] = {}
+    for name, limit in _REDUCE_SECTION_LIMITS.items():
+        queues = [list(f["sections"].get(name) or []) for f in fragments]
+        merged: list[str] = []
+        seen: set[str] = set()
+        while len(merged) < limit and any(queues):
+            for queue in queues:
+                while queue:
+                    item = queue.pop(0)
+                    key = _bullet_key(item)
+                    if key and key not in seen:
+                        seen.add(key)
+                        merged.append(item)
+                        break
+                if len(merged) >= limit:
+                    break
+        sections[name] = merged
+
+    categories = [f["category"] for f in fragments if f["category"] != "Annet"]
+    category = max(sorted(set(categories)), key=categories.count) if categories else "Annet"
+
+    tag_counts: dict[str, int] = {}
+    tag_labels: dict[str, str] = {}
+    for f in fragments:
+        for tag in f["tags"]:
+            key = tag.casefold()
+            tag_counts[key] = tag_counts.get(key, 0) + 1
+            tag_labels.setdefault(key, tag)
+    tags = [tag_labels[k] for k in sorted(tag_counts, key=lambda k: (-tag_counts[k], k))][:24]
+
+    stem = Path(original_filename).stem or "Untitled"
+    title = next((f["title"] for f in fragments if f["title"] and f["title"] != stem), stem)
+    confidence = sum(f["confidence_score"] for f in fragments) / len(fragments) if fragments else 0.6
+
+    return {
+        "title": title,
+        "tags": tags,
+        "category": category,
+        "review_status": "pending",
+        "confidence_score": round(max(0.0, min(1.0, confidence)), 2),
+        "sections": sections,
+    }
+
+
+def _map_reduce_payload(
+    agent,
+    *,
+    original_filename: str,
+    cleaned: str,
+    llm_options: dict,
+    budget: _StagedLlm | None = None,
+) -> tuple[dict | None, dict]:
+    """Summarize every chunk of `cleaned` (concurrently) and merge the results.
+
+    Each chunk call is charged to `budget` when given; once it is exhausted the remaining
+    chunks are skipped (`chunks_skipped` / `budget_exhausted` in the diagnostics).
+
+    Returns (payload or None, diagnostics).
+    """
+
+    chunk_chars = max(2000, int(os.getenv("SUGGESTION_CHUNK_CHARS", "12000")))
+    max_chunks = max(2, int(os.getenv("SUGGESTION_MAX_CHUNKS", "16")))
+    chunks = split_into_chunks(cleaned, chunk_chars=chunk_chars, max_chunks=max_chunks)
+    diag: dict = {"chunks": len(chunks), "chunks_ok": 0}
+    if len(chunks) < 2:
+        return None, diag
+
+    skipped: list[str] = []
+
+    def summarize(index: int) -> dict | None:
+        if budget is not None:
+            # Checked when the chunk is about to run, so chunks queued behind slow calls see the time used.
+            reason = budget.reserve_map((len(chunks[index]) + 200) // 4 + _MAP_NUM_PREDICT)
+            if reason:
+                skipped.append(reason)
+                return None
+        try:
+            return _summarize_chunk(
+                agent,
+                chunks[index],
+                index=index,
+                total=len(chunks),
+                original_filename=original_filename,
+                llm_options=llm_options,
+            )
+        except LlmOverloadedError:
+            raise
+        except Exception:
+            return None
+
+    workers = max(1, min(len(chunks), _map_concurrency(agent)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="suggestion-map") as pool:
+        # copy_context: worker threads must see the caller's LLM priority.
+        futures = [pool.submit(contextvars.copy_context().run, summarize, i) for i in range(len(chunks))]
+        fragments = [f for f in (future.result() for future in futures) if f is not None]
+
+    diag["chunks_ok"] = len(fragments)
+    if skipped:
+        diag["chunks_skipped"] = len(skipped)
+        diag["budget_exhausted"] = skipped[-1]
+    if not fragments:
+        return None, diag
+    return reduce_chunk_payloads(fragments, original_filename=original_filename), diag
+
+
 def generate_revised_suggestion(
     *,
     agent,
     original_filename: str,
     extracted_text: str,
     llm_options: dict,
+    map_reduce: bool | None = None,
 ) -> tuple[str, dict]:
     """Generate a revised suggestion.
 
+    Sources longer than the plan's budget are summarized chunk by chunk (map-reduce)
+    unless `map_reduce` is False (default: SUGGESTION_MAP_REDUCE).
+
+    The LLM stages (initial, repair, retry, enrich, seeded_rewrite, norwegian) share one
+    budget (SUGGESTION_BUDGET_S / SUGGESTION_MAX_LLM_CALLS / SUGGESTION_TOKEN_BUDGET); a
+    stage that does not fit is skipped and the best result so far is used. Map-reduce
+    chunk calls draw on the same time and token budget.
+
     Returns: (suggestion_text, diagnostics)
-    diagnostics: {fallback_used:int, reason:str|None, error:str|None}
+    diagnostics: {fallback_used:int, reason:str|None, error:str|None, pipeline:dict[, map_reduce:dict]}
     """
 
     cleaned = clean_extracted_text(extracted_text)
@@ -1118,177 +1534,132 @@ def generate_revised_suggestion(
             )
 
     plan = build_plan(cleaned)
+    pipeline_started = time.monotonic()
 
+    payload: dict | None = None
+    last_problem: str | None = None
+    map_reduce_diag: dict | None = None
+    evidence_source = cleaned
     # Prefer full cleaned source when it fits budget to avoid overly narrow summaries.
     if len(cleaned) <= plan.max_source_chars:
         source_pack = cleaned
     else:
         windows_out = sample_windows(cleaned, windows=plan.windows, window_chars=plan.window_chars)
         source_pack = format_source_pack(cleaned, windows_out, max_chars=plan.max_source_chars)
-
-    payload: dict | None = None
-    last_problem: str | None = None
-    raw = agent.process_document(
-        _STRUCTURED_JSON_PROMPT,
-        source_pack,
-        max_input_chars=plan.max_source_chars,
-        llm_options={"format": "json", "temperature": 0, "num_predict": plan.num_predict, **(llm_options or {})},
-    )
-
-    for _attempt in range(2):
-        json_text = _extract_json(raw or "")
-        if json_text:
-            try:
-                parsed = json.loads(json_text)
-                if isinstance(parsed, dict):
-                    payload = _normalize_json_payload(parsed, original_filename=original_filename)
-                    err = _validate_payload(payload)
-                    if err is None:
-                        ev = _validate_evidence(payload, source_pack=source_pack)
-                        if ev is None:
-                            break
-                        # Keep the structured draft even if evidence markers are weak.
-                        # This avoids unnecessary fallback for long/noisy documents.
-                        last_problem = f"weak_evidence:{ev}"
-                        break
-                    last_problem = f"validate:{err}"
-                    payload = None
-            except Exception:
-                last_problem = "json_parse_error"
-                payload = None
-
-        # Repair attempt
-        repair_input = (
-            "KILDEUTDRAG (kun fakta herfra):\n\n"
-            + source_pack[:10000]
-            + "\n\nKRAV: Returner KUN gyldig JSON (ingen tekst rundt).\n"
-            + "Bruk '(ikke oppgitt i utdraget)' der informasjon mangler.\n"
-            + "GYLDIG KATEGORI: Sikkerhet|Vedlikehold|Miljø|Kvalitet|Prosedyre|Annet\n"
-            + "review_status MÅ være 'pending'.\n\n"
-            + "JSON-SKJEMA (må følges):\n"
-            + "{\n"
-            + "  \"title\": string,\n"
-            + "  \"tags\": string[],\n"
-            + "  \"category\": \"Sikkerhet\"|\"Vedlikehold\"|\"Miljø\"|\"Kvalitet\"|\"Prosedyre\"|\"Annet\",\n"
-            + "  \"review_status\": \"pending\",\n"
-            + "  \"confidence_score\": number,\n"
-            + "  \"sections\": {\n"
-            + "    \"Kort sammendrag\": string[],\n"
-            + "    \"Viktigste punkter\": string[],\n"
-            + "    \"Kapittelvis sammendrag\": string[],\n"
-            + "    \"Relevante detaljer\": string[],\n"
-            + "    \"Eventuelle tiltak / anbefalinger\": string[]\n"
-            + "  }\n"
-            + "}\n\n"
-            + (f"SISTE PROBLEM: {last_problem}\n\n" if last_problem else "")
-            + "Ugyldig output som må repareres til gyldig JSON:\n\n"
-            + (raw or "")[:8000]
-        )
-        raw = agent.process_document(
-            _JSON_REPAIR_PROMPT,
-            repair_input,
-            max_input_chars=min(plan.max_source_chars, 20000),
-            llm_options={"format": "json", "temperature": 0, "num_predict": min(2400, plan.num_predict), **(llm_options or {})},
+    # Created before map-reduce so the map phase is charged to the same budget.
+    llm = _StagedLlm(agent, source_pack=source_pack, llm_options=llm_options)
+
+    if map_reduce is None:
+        map_reduce = map_reduce_enabled()
+    if map_reduce and len(cleaned) > plan.max_source_chars:
+        # Too long for one prompt: summarize all of it in bounded chunks instead of sampling windows.
+        payload, map_reduce_diag = _map_reduce_payload(
+            agent,
+            original_filename=original_filename,
+            cleaned=cleaned,
+            llm_options=llm_options,
+            budget=llm,
         )
+        map_reduce_diag["ms"] = round(1000.0 * (time.monotonic() - pipeline_started))
+        if payload is not None and _validate_payload(payload) is not None:
+            map_reduce_diag["rejected"] = _validate_payload(payload)
+            payload = None
 
     if payload is None:
-        # One last direct retry with larger budget before we fall back.
-        retry_num_predict = min(16384, max(plan.num_predict + 1200, int(plan.num_predict * 1.35)))
-        retry_max_input = min(240000, max(plan.max_source_chars, int(plan.max_source_chars * 1.25)))
-        retry_source = cleaned[:retry_max_input]
+        # Map-reduce quotes may come from anywhere in the document; single-prompt quotes only from the pack.
+        evidence_source = source_pack
 
-        try:
-            raw_retry = agent.process_document(
-                _STRUCTURED_JSON_PROMPT,
-                retry_source,
-                max_input_chars=retry_max_input,
-                llm_options={"format": "json", "temperature": 0, "num_predict": retry_num_predict, **(llm_options or {})},
-            )
+    # Built once; shared by every evidence check below.
+    evidence = EvidenceIndex(evidence_source)
 
-            json_retry = _extract_json(raw_retry or "")
-            if json_retry:
-                parsed_retry = json.loads(json_retry)
-                if isinstance(parsed_retry, dict):
-                    payload_retry = _normalize_json_payload(parsed_retry, original_filename=original_filename)
-                    err_retry = _validate_payload(payload_retry)
-                    if err_retry is None:
-                        ev_retry = _validate_evidence(payload_retry, source_pack=retry_source)
-                        if ev_retry is None:
-                            payload = payload_retry
-                        else:
-                            last_problem = f"retry:evidence:{ev_retry}"
-                    else:
-                        last_problem = f"retry:validate:{err_retry}"
-            else:
-                last_problem = last_problem or "retry:no_json"
-        except Exception:
-            last_problem = last_problem or "retry:exception"
+    if payload is None:
+        raw = llm.run("initial", "OPPGAVE: Lag JSON-utkastet for kildeutdraget over.", num_predict=plan.num_predict)
+        if raw is not None:
+            payload, last_problem = _parse_payload(raw, original_filename=original_filename)
+            llm.mark(last_problem or "ok")
+
+        if payload is None and raw is not None:
+            raw = llm.run("repair", _repair_task(raw, last_problem), num_predict=min(2400, plan.num_predict))
+            if raw is not None:
+                payload, problem = _parse_payload(raw, original_filename=original_filename)
+                llm.mark(problem or "ok")
+                last_problem = problem or last_problem
+
+        if payload is None:
+            # Same task with a larger answer budget (long documents often get cut off mid-JSON).
+            retry_num_predict = min(16384, max(plan.num_predict + 1200, int(plan.num_predict * 1.35)))
+            try:
+                raw = llm.run("retry", "OPPGAVE: Lag JSON-utkastet for kildeutdraget over.", num_predict=retry_num_predict)
+            except Exception:
+                raw = None
+                last_problem = last_problem or "retry:exception"
+            if raw is not None:
+                payload, problem = _parse_payload(raw, original_filename=original_filename)
+                llm.mark(problem or "ok")
+                if problem:
+                    last_problem = f"retry:{problem}"
+
+        if payload is not None:
+            ev = _validate_evidence(payload, index=evidence)
+            if ev is not None:
+                # Keep the structured draft even if evidence markers are weak.
+                # This avoids unnecessary fallback for long/noisy documents.
+                last_problem = f"weak_evidence:{ev}"
+
+    def diagnostics(**extra) -> dict:
+        out = {**extra, "pipeline": llm.diagnostics()}
+        out["pipeline"]["elapsed_ms"] = round(1000.0 * (time.monotonic() - pipeline_started))
+        if map_reduce_diag:
+            out["map_reduce"] = map_reduce_diag
+        return out
 
     if payload is None:
         return (
             fallback_structured_document_long(original_filename, cleaned),
-            {"fallback_used": 1, "reason": "json_invalid_after_retry", "error": last_problem},
+            diagnostics(
+                fallback_used=1,
+                reason="llm_budget_exhausted" if llm.exhausted else "json_invalid_after_retry",
+                error=last_problem or (f"budget:{llm.exhausted}" if llm.exhausted else None),
+            ),
         )
 
     if _payload_is_too_thin(payload):
         try:
-            enrich_input = _build_enrichment_input(source_pack=source_pack, payload=payload, last_problem=last_problem)
-            raw_enrich = agent.process_document(
-                _JSON_REPAIR_PROMPT,
-                enrich_input,
-                max_input_chars=min(240000, max(plan.max_source_chars, 24000)),
-                llm_options={
-                    "format": "json",
-                    "temperature": 0,
-                    "num_predict": min(5200, max(plan.num_predict, 3200)),
-                    **(llm_options or {}),
-                },
+            raw_enrich = llm.run(
+                "enrich",
+                _enrichment_task(payload, last_problem),
+                num_predict=min(5200, max(plan.num_predict, 3200)),
             )
-
-            json_enrich = _extract_json(raw_enrich or "")
-            if json_enrich:
-                parsed_enrich = json.loads(json_enrich)
-                if isinstance(parsed_enrich, dict):
-                    payload_enrich = _normalize_json_payload(parsed_enrich, original_filename=original_filename)
-                    err_enrich = _validate_payload(payload_enrich)
-                    if err_enrich is None and not _payload_is_too_thin(payload_enrich):
-                        payload = payload_enrich
-                    else:
-                        last_problem = f"enrich:{err_enrich or 'still_thin'}"
+            if raw_enrich is not None:
+                payload_enrich, problem = _parse_payload(raw_enrich, original_filename=original_filename)
+                if payload_enrich is not None and not _payload_is_too_thin(payload_enrich):
+                    payload = payload_enrich
+                    llm.mark("ok")
+                else:
+                    last_problem = f"enrich:{problem or 'still_thin'}"
+                    llm.mark(last_problem)
         except Exception:
             last_problem = last_problem or "enrich:exception"
 
     if _payload_is_too_thin(payload):
         try:
-            seeded_markdown = fallback_structured_document_long(original_filename, cleaned)
-            seeded_input = _build_seeded_rewrite_input(
-                source_pack=source_pack,
-                seeded_markdown=seeded_markdown,
-                payload=payload,
-                last_problem=last_problem,
+            raw_seeded = llm.run(
+                "seeded_rewrite",
+                _seeded_rewrite_task(
+                    seeded_markdown=fallback_structured_document_long(original_filename, cleaned),
+                    payload=payload,
+                    last_problem=last_problem,
+                ),
+                num_predict=min(6200, max(plan.num_predict, 3600)),
             )
-            raw_seeded = agent.process_document(
-                _JSON_REPAIR_PROMPT,
-                seeded_input,
-                max_input_chars=min(240000, max(plan.max_source_chars, 28000)),
-                llm_options={
-                    "format": "json",
-                    "temperature": 0,
-                    "num_predict": min(6200, max(plan.num_predict, 3600)),
-                    **(llm_options or {}),
-                },
-            )
-
-            json_seeded = _extract_json(raw_seeded or "")
-            if json_seeded:
-                parsed_seeded = json.loads(json_seeded)
-                if isinstance(parsed_seeded, dict):
-                    payload_seeded = _normalize_json_payload(parsed_seeded, original_filename=original_filename)
-                    err_seeded = _validate_payload(payload_seeded)
-                    if err_seeded is None and not _payload_is_too_thin(payload_seeded):
-                        payload = payload_seeded
-                    else:
-                        last_problem = f"seeded:{err_seeded or 'still_thin'}"
+            if raw_seeded is not None:
+                payload_seeded, problem = _parse_payload(raw_seeded, original_filename=original_filename)
+                if payload_seeded is not None and not _payload_is_too_thin(payload_seeded):
+                    payload = payload_seeded
+                    llm.mark("ok")
+                else:
+                    last_problem = f"seeded:{problem or 'still_thin'}"
+                    llm.mark(last_problem)
         except Exception:
             last_problem = last_problem or "seeded:exception"
 
@@ -1313,52 +1684,39 @@ def generate_revised_suggestion(
     rendered = render_yaml_markdown(payload)
     if looks_like_non_norwegian(rendered):
         # One more attempt: translate/repair to Norwegian while keeping evidence quotes intact.
-        translate_prompt = (
-            "Du skal oversette/forbedre følgende JSON til norsk (bokmål) uten å endre fakta.\n"
-            "KRAV: Behold alle (KILDE: \"...\") sitater uendret.\n"
-            "Returner KUN gyldig JSON i samme skjema.\n\n"
-            + (json.dumps(payload, ensure_ascii=False)[:12000])
-        )
-        raw2 = agent.process_document(
-            _JSON_REPAIR_PROMPT,
-            translate_prompt,
-            max_input_chars=14000,
-            llm_options={"format": "json", "temperature": 0, "num_predict": min(2200, plan.num_predict), **(llm_options or {})},
-        )
-        json2 = _extract_json(raw2 or "")
-        if json2:
-            try:
-                parsed2 = json.loads(json2)
-                if isinstance(parsed2, dict):
-                    payload2 = _normalize_json_payload(parsed2, original_filename=original_filename)
-                    payload2 = _postprocess_payload_sections(
-                        payload2,
-                        evidence_re=_EVIDENCE_RE,
-                        is_toc_line=_is_toc_line,
-                        missing_marker=_MISSING_MARKER,
-                    )
-                    err2 = _validate_payload(payload2)
-                    if err2 is None and not looks_like_non_norwegian(render_yaml_markdown(payload2)):
-                        ev2 = _validate_evidence(payload2, source_pack=source_pack)
-                        if ev2 is not None:
-                            last_problem = f"weak_evidence:{ev2}"
-                        payload = payload2
-                        rendered = render_yaml_markdown(payload2)
-            except Exception:
-                pass
+        raw2 = llm.run("norwegian", _norwegian_task(payload), num_predict=min(2200, plan.num_predict))
+        payload2, problem = _parse_payload(raw2, original_filename=original_filename) if raw2 is not None else (None, None)
+        if payload2 is not None:
+            payload2 = _postprocess_payload_sections(
+                payload2,
+                evidence_re=_EVIDENCE_RE,
+                is_toc_line=_is_toc_line,
+                missing_marker=_MISSING_MARKER,
+            )
+            if _validate_payload(payload2) is None and not looks_like_non_norwegian(render_yaml_markdown(payload2)):
+                ev2 = _validate_evidence(payload2, index=evidence)
+                if ev2 is not None:
+                    last_problem = f"weak_evidence:{ev2}"
+                payload = payload2
+                rendered = render_yaml_markdown(payload2)
+                llm.mark("ok")
+            else:
+                llm.mark("still_non_norwegian")
+        elif raw2 is not None:
+            llm.mark(problem or "invalid")
 
     if looks_like_non_norwegian(rendered):
         # Last resort: don't ship English. Provide grounded Norwegian deterministic draft.
         return (
             fallback_structured_document_long(original_filename, cleaned),
-            {"fallback_used": 1, "reason": "non_norwegian", "error": "language_check_failed"},
+            diagnostics(fallback_used=1, reason="non_norwegian", error="language_check_failed"),
         )
 
     return (
         rendered,
-        {
-            "fallback_used": 0,
-            "reason": "thin_output" if thin_output else None,
-            "error": last_problem if thin_output else None,
-        },
+        diagnostics(
+            fallback_used=0,
+            reason="thin_output" if thin_output else None,
+            error=last_problem if thin_output else None,
+        ),
     )
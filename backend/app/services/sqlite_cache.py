@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+class SqliteLruCache:
+    """Small persistent key/value cache backed by a single SQLite file.
+
+    Entries are evicted least-recently-used first once `max_entries` is exceeded,
+    and optionally expire after `ttl_s` seconds. Safe to share between threads.
+    """
+
+    def __init__(self, path: Path, *, max_entries: int, ttl_s: Optional[float] = None) -> None:
+        self.path = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._conn.execute("PRAGMA synchronous = NORMAL;")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_last_used ON cache_entries(last_used)")
+        self._conn.commit()
+
+        self._entries = int(self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0])
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        wanted = list(dict.fromkeys(keys))
+        if not wanted:
+            return {}
+
+        now = time.time()
+        found: dict[str, bytes] = {}
+        expired: list[str] = []
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(wanted), 500):
+                part = wanted[start : start + 500]
+                placeholders = ",".join("?" for _ in part)
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM cache_entries WHERE key IN ({placeholders})",
+                    part,
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self.ttl_s is not None and now - float(created_at) > self.ttl_s:
+                        expired.append(key)
+                        continue
+                    found[key] = bytes(value)
+
+            if expired:
+                self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k in expired])
+                self._entries = max(0, self._entries - len(expired))
+            if found:
+                self._conn.executemany(
+                    "UPDATE cache_entries SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+            self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+
+        return found
+
+    def put(self, key: str, value: bytes) -> None:
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[tuple[str, bytes]]) -> None:
+        pairs = list(items)
+        if not pairs:
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, value in pairs:
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO cache_entries (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(value), now, now),
+                )
+                if cur.rowcount == 1:
+                    self._entries += 1
+                else:
+                    self._conn.execute(
+                        "UPDATE cache_entries SET value = ?, created_at = ?, last_used = ? WHERE key = ?",
+                        (sqlite3.Binary(value), now, now, key),
+                    )
+
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    """
+                    DELETE FROM cache_entries
+                    WHERE key IN (SELECT key FROM cache_entries ORDER BY last_used ASC LIMIT ?)
+                    """,
+                    (overflow,),
+                )
+                self._entries -= overflow
+                self.evictions += overflow
+            self._conn.commit()
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete all entries whose key starts with `prefix`; returns the number removed."""
+
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache_entries WHERE key LIKE ? ESCAPE '\\'", (pattern,))
+            self._conn.commit()
+            removed = max(0, cur.rowcount)
+            self._entries = max(0, self._entries - removed)
+        return removed
+
+    def delete_except_prefixes(self, prefixes: Iterable[str]) -> int:
+        """Delete all entries whose key starts with none of `prefixes`; returns the number removed."""
+
+        patterns = [p.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for p in prefixes]
+        where = " AND ".join("key NOT LIKE ? ESCAPE '\\'" for _ in patterns) or "1 = 1"
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM cache_entries WHERE {where}", patterns)
+            self._conn.commit()
+            removed = max(0, cur.rowcount)
+            self._entries = max(0, self._entries - removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+            self._entries = 0
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": str(self.path),
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -19,6 +19,12 @@ _ACTION_SIGNAL_RE = re.compile(
 
 _READMORE_PREFIXES = ("se ", "se også", "informasjon om", "generelle krav", "generelle regler")
 
+_NUMBERED_LABEL_RE = re.compile(r"^\d+(?:\.\d+)*\s+\S+(?:\s+\S+){0,11}$")
+_WORD_RE = re.compile(r"\b\w+\b")
+_SENTENCE_PUNCT_RE = re.compile(r"[.;:]")
+_SENTENCE_PUNCT_OR_PARENS_RE = re.compile(r"[.;:()]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 def postprocess_payload_sections(
     payload: dict,
@@ -51,15 +57,15 @@ def postprocess_payload_sections(
         if has_action_signal(s):
             return False
 
-        if re.match(r"^\d+(?:\.\d+)*\s+\S+(?:\s+\S+){0,11}$", s):
+        if _NUMBERED_LABEL_RE.match(s):
             return True
 
         lower = s.lower()
         if lower.startswith(("se ", "ref", "sop", "hms", "andre sikkerhetsregler", "informasjon om")) and len(s) <= 140:
             return True
 
-        words = re.findall(r"\b\w+\b", s, flags=re.UNICODE)
-        has_sentence_punct = bool(re.search(r"[.;:]", s))
+        words = _WORD_RE.findall(s)
+        has_sentence_punct = bool(_SENTENCE_PUNCT_RE.search(s))
         if len(words) <= 6 and not has_sentence_punct:
             return True
         return False
@@ -73,8 +79,8 @@ def postprocess_payload_sections(
         if is_toc_line(s):
             return True
 
-        words = re.findall(r"\b\w+\b", s, flags=re.UNICODE)
-        has_sentence_punct = bool(re.search(r"[.;:]", s))
+        words = _WORD_RE.findall(s)
+        has_sentence_punct = bool(_SENTENCE_PUNCT_RE.search(s))
         has_parens = "(" in s or ")" in s
         if 2 <= len(words) <= 14 and not has_sentence_punct and not has_parens:
             return True
@@ -90,8 +96,8 @@ def postprocess_payload_sections(
             return False
 
         plain = strip_evidence_suffix(s)
-        words = re.findall(r"\b\w+\b", plain, flags=re.UNICODE)
-        if len(words) <= 12 and not re.search(r"[.;:()]", plain):
+        words = _WORD_RE.findall(plain)
+        if len(words) <= 12 and not _SENTENCE_PUNCT_OR_PARENS_RE.search(plain):
             return True
         return False
 
@@ -124,7 +130,7 @@ def postprocess_payload_sections(
         deduped: list[str] = []
         seen_keys: set[str] = set()
         for x in items:
-            key = re.sub(r"\s+", " ", strip_evidence_suffix(x)).strip().casefold()
+            key = _WHITESPACE_RE.sub(" ", strip_evidence_suffix(x)).strip().casefold()
             if not key or key in seen_keys:
                 continue
             seen_keys.add(key)
@@ -1,23 +1,49 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 
 import chromadb
 from chromadb.errors import InvalidCollectionException
 
 
+T = TypeVar("T")
+
+
 @dataclass
 class ChromaVectorStore:
+    """Thin wrapper around a persistent Chroma collection.
+
+    One instance is meant to be shared process-wide (see `app.vector_store.runtime`).
+    If another process/task drops and recreates the collection, the handle is
+    re-acquired once and the operation retried.
+    """
+
     persist_dir: Path
     collection_name: str
 
     def __post_init__(self) -> None:
         self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
         self._client = chromadb.PersistentClient(path=str(self.persist_dir))
         self._collection = self._client.get_or_create_collection(name=self.collection_name)
 
+    def _reacquire(self, stale: Any) -> Any:
+        with self._lock:
+            # Another thread may already have swapped in a fresh handle.
+            if self._collection is stale:
+                self._collection = self._client.get_or_create_collection(name=self.collection_name)
+            return self._collection
+
+    def _call(self, op: Callable[[Any], T]) -> T:
+        collection = self._collection
+        try:
+            return op(collection)
+        except InvalidCollectionException:
+            return op(self._reacquire(collection))
+
     def reset_collection(self) -> None:
         """Delete and recreate the collection.
 
@@ -25,12 +51,13 @@ class ChromaVectorStore:
         old embeddings must be removed.
         """
 
-        try:
-            self._client.delete_collection(name=self.collection_name)
-        except Exception:
-            # Collection may not exist yet; ignore.
-            pass
-        self._collection = self._client.get_or_create_collection(name=self.collection_name)
+        with self._lock:
+            try:
+                self._client.delete_collection(name=self.collection_name)
+            except Exception:
+                # Collection may not exist yet; ignore.
+                pass
+            self._collection = self._client.get_or_create_collection(name=self.collection_name)
 
     def upsert(
         self,
@@ -43,22 +70,14 @@ class ChromaVectorStore:
         if metadatas is None:
             metadatas = [{} for _ in ids]
 
-        try:
-            self._collection.upsert(
-                ids=ids,
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-            )
-        except InvalidCollectionException:
-            # Another process/task may have recreated the collection.
-            self._collection = self._client.get_or_create_collection(name=self.collection_name)
-            self._collection.upsert(
+        self._call(
+            lambda c: c.upsert(
                 ids=ids,
                 documents=documents,
                 embeddings=embeddings,
                 metadatas=metadatas,
             )
+        )
 
     def query(
         self,
@@ -67,21 +86,14 @@ class ChromaVectorStore:
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        try:
-            return self._collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=where,
-                include=["documents", "metadatas", "distances"],
-            )
-        except InvalidCollectionException:
-            self._collection = self._client.get_or_create_collection(name=self.collection_name)
-            return self._collection.query(
+        return self._call(
+            lambda c: c.query(
                 query_embeddings=[query_embedding],
                 n_results=n_results,
                 where=where,
                 include=["documents", "metadatas", "distances"],
             )
+        )
 
     def get(
         self,
@@ -93,21 +105,14 @@ class ChromaVectorStore:
     ) -> Dict[str, Any]:
         include = include or ["metadatas"]
 
-        try:
-            return self._collection.get(
-                limit=limit,
-                offset=offset,
-                where=where,
-                include=include,
-            )
-        except InvalidCollectionException:
-            self._collection = self._client.get_or_create_collection(name=self.collection_name)
-            return self._collection.get(
+        return self._call(
+            lambda c: c.get(
                 limit=limit,
                 offset=offset,
                 where=where,
                 include=include,
             )
+        )
 
     def delete(
         self,
@@ -115,8 +120,4 @@ class ChromaVectorStore:
         where: Optional[Dict[str, Any]] = None,
         ids: Optional[List[str]] = None,
     ) -> None:
-        try:
-            self._collection.delete(where=where, ids=ids)
-        except InvalidCollectionException:
-            self._collection = self._client.get_or_create_collection(name=self.collection_name)
-            self._collection.delete(where=where, ids=ids)
+        self._call(lambda c: c.delete(where=where, ids=ids))
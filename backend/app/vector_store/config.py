@@ -10,6 +10,10 @@ class VectorStoreConfig:
     ollama_base_url: str
     ollama_embed_model: str
     ollama_embed_timeout_s: float
+    ollama_embed_batch_size: int
+    embed_cache_path: Path
+    embed_cache_max_entries: int
+    index_embed_workers: int
     chroma_collection: str
     persist_dir: Path
 
@@ -22,11 +26,17 @@ def _repo_root_from_here() -> Path:
 def load_vector_store_config() -> VectorStoreConfig:
     repo_root = _repo_root_from_here()
     persist_default = repo_root / "databases" / "vector_store" / "chroma"
+    embed_cache_default = repo_root / "databases" / "vector_store" / "embedding_cache.sqlite3"
 
     return VectorStoreConfig(
         ollama_base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
         ollama_embed_model=os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text"),
         ollama_embed_timeout_s=float(os.getenv("OLLAMA_EMBED_TIMEOUT_S", "180")),
+        ollama_embed_batch_size=max(1, int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", "32"))),
+        embed_cache_path=Path(os.getenv("EMBED_CACHE_PATH", str(embed_cache_default))),
+        # 0 disables the persistent embedding cache.
+        embed_cache_max_entries=max(0, int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))),
+        index_embed_workers=max(1, int(os.getenv("KB_INDEX_EMBED_WORKERS", "4"))),
         chroma_collection=os.getenv("CHROMA_COLLECTION", "kb_chunks"),
         persist_dir=Path(os.getenv("VECTOR_STORE_DIR", str(persist_default))),
     )
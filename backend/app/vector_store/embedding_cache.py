@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from app.services.sqlite_cache import SqliteLruCache
+
+from .config import VectorStoreConfig
+from .ollama_embeddings import OllamaEmbeddingClient
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+def _encode_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class CachedEmbeddingClient:
+    """Embedding client wrapper that reuses vectors across runs.
+
+    Vectors are keyed by (model, sha256(text)), so unchanged KB chunks and repeated
+    queries never hit Ollama twice. Only cache misses are sent to the wrapped client,
+    which keeps its batching behaviour.
+    """
+
+    def __init__(self, inner: OllamaEmbeddingClient, cache: SqliteLruCache) -> None:
+        self.inner = inner
+        self.cache = cache
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    def embed_text(self, text: str) -> List[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        keys, cached, missing = self._lookup(texts)
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            fresh = self._store(missing, self.inner.embed_many(list(missing.values())))
+        return [fresh[key] if key in fresh else _decode_vector(cached[key]) for key in keys]
+
+    async def aembed_text(self, text: str) -> List[float]:
+        return (await self.aembed_many([text]))[0]
+
+    async def aembed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        # The cache is SQLite, so lookups and writes run in a worker thread.
+        keys, cached, missing = await asyncio.to_thread(self._lookup, texts)
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            vectors = await self.inner.aembed_many(list(missing.values()))
+            fresh = await asyncio.to_thread(self._store, missing, vectors)
+        return [fresh[key] if key in fresh else _decode_vector(cached[key]) for key in keys]
+
+    def _lookup(self, texts: Sequence[str]) -> tuple[List[str], Dict[str, bytes], Dict[str, str]]:
+        items = list(texts)
+        keys = [embedding_cache_key(self.model, t) for t in items]
+        cached = self.cache.get_many(keys)
+
+        # De-duplicate misses so identical chunks are embedded once per call.
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, items):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return keys, cached, missing
+
+    def _store(self, missing: Dict[str, str], vectors: List[List[float]]) -> Dict[str, List[float]]:
+        fresh = dict(zip(missing.keys(), vectors))
+        self.cache.put_many((key, _encode_vector(vec)) for key, vec in fresh.items())
+        return fresh
+
+    def stats(self) -> dict:
+        return {"model": self.model, **self.cache.stats()}
+
+    def close(self) -> None:
+        # The cache itself is shared process-wide; only release the HTTP session.
+        self.inner.close()
+
+
+_CACHES: Dict[Path, SqliteLruCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_embedding_cache(cfg: VectorStoreConfig) -> Optional[SqliteLruCache]:
+    """Return the process-wide embedding cache for `cfg`, or None when disabled."""
+
+    if cfg.embed_cache_max_entries <= 0:
+        return None
+
+    path = Path(cfg.embed_cache_path)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = SqliteLruCache(path, max_entries=cfg.embed_cache_max_entries)
+            _CACHES[path] = cache
+        return cache
+
+
+def build_embedder(cfg: VectorStoreConfig) -> Union[CachedEmbeddingClient, OllamaEmbeddingClient]:
+    client = OllamaEmbeddingClient(
+        base_url=cfg.ollama_base_url,
+        model=cfg.ollama_embed_model,
+        timeout_s=cfg.ollama_embed_timeout_s,
+        batch_size=cfg.ollama_embed_batch_size,
+        pool_maxsize=max(8, cfg.index_embed_workers),
+    )
+    cache = get_embedding_cache(cfg)
+    if cache is None:
+        return client
+    return CachedEmbeddingClient(client, cache)
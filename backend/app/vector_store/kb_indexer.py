@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import hashlib
+import queue
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 from yaml import YAMLError
 
 from .chroma_store import ChromaVectorStore
 from .config import _repo_root_from_here
-from .ollama_embeddings import OllamaEmbeddingClient
+from .ollama_embeddings import OllamaEmbeddingClient, embedding_format
+
+
+# Sentinel that tells a pipeline stage to exit.
+_STOP = object()
+_DELETE_BATCH = 5000
 
 
 @dataclass(frozen=True)
@@ -116,17 +123,21 @@ def build_chunks_for_file(path: Path) -> List[Chunk]:
 
     body_chunks = _chunk_markdown(body)
     body_hash = _sha256(body)
+    path_key = str(path.as_posix())
+    # Ids are unique per file: front-matter ids/stems can repeat across folders, and
+    # incremental indexing tracks chunks by path.
+    path_hash = _sha256(path_key)[:12]
 
     chunks: List[Chunk] = []
     for idx, chunk_text in enumerate(body_chunks):
         # Include document title in the embedded text to improve recall.
         chunk_doc = f"# {title}\n\n{chunk_text}".strip()
-        chunk_id = f"{doc_id}:{idx}"
+        chunk_id = f"{doc_id}:{path_hash}:{idx}"
         metadata: Dict[str, Any] = {
             "doc_id": doc_id,
             "title": title,
             "tags": tags_str,
-            "path": str(path.as_posix()),
+            "path": path_key,
             "chunk_index": idx,
             "doc_hash": body_hash,
         }
@@ -135,29 +146,269 @@ def build_chunks_for_file(path: Path) -> List[Chunk]:
     return chunks
 
 
+def _indexed_docs_by_path(store: ChromaVectorStore, *, batch_size: int = 5000) -> Dict[str, Dict[str, Any]]:
+    """Summarize the chunks currently stored in the collection, grouped by `metadata.path`.
+
+    Only metadatas are fetched (no documents/embeddings), so this stays cheap even for
+    large collections.
+    """
+
+    by_path: Dict[str, Dict[str, Any]] = {}
+    cursor = 0
+    while True:
+        res = store.get(limit=batch_size, offset=cursor, include=["metadatas"])
+        ids = res.get("ids") or []
+        metas = res.get("metadatas") or []
+        if not ids:
+            break
+
+        for chunk_id, meta in zip(ids, metas):
+            if not isinstance(meta, dict):
+                continue
+            path = str(meta.get("path") or "").strip()
+            if not path:
+                continue
+
+            rec = by_path.get(path)
+            if rec is None:
+                rec = {
+                    "doc_hash": str(meta.get("doc_hash") or ""),
+                    "embedding_format": str(meta.get("embedding_format") or ""),
+                    "title": str(meta.get("title") or ""),
+                    "tags": str(meta.get("tags") or ""),
+                    "ids": [],
+                }
+                by_path[path] = rec
+            elif rec["doc_hash"] != str(meta.get("doc_hash") or "") or rec["embedding_format"] != str(
+                meta.get("embedding_format") or ""
+            ):
+                # Mixed hashes/formats means a previous run was interrupted; force a re-embed.
+                rec["doc_hash"] = ""
+            rec["ids"].append(str(chunk_id))
+
+        cursor += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    return by_path
+
+
+def _chunks_match_indexed(chunks: List[Chunk], indexed: Optional[Dict[str, Any]], *, fmt: str) -> bool:
+    if not indexed or not chunks or not indexed.get("doc_hash"):
+        return False
+    # Vectors from another model or an older embedding format are not comparable.
+    if indexed.get("embedding_format") != fmt:
+        return False
+
+    meta = chunks[0].metadata
+    if indexed["doc_hash"] != meta.get("doc_hash"):
+        return False
+    # Title and tags are part of the embedded text / metadata even though they are
+    # not covered by the body hash.
+    if indexed["title"] != meta.get("title") or indexed["tags"] != meta.get("tags"):
+        return False
+    return set(indexed["ids"]) == {c.chunk_id for c in chunks}
+
+
+class _IndexProgress:
+    """Thread-safe per-stage counters for the indexing pipeline."""
+
+    def __init__(self, total_files: int, callback: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        self._lock = threading.Lock()
+        self._callback = callback
+        self._stages: Dict[str, Dict[str, int]] = {
+            "read": {"done": 0, "total": total_files},
+            "embed": {"done": 0, "total": 0},
+            "write": {"done": 0, "total": 0},
+        }
+
+    def add(self, stage: str, key: str, amount: int) -> None:
+        with self._lock:
+            self._stages[stage][key] += amount
+            snapshot = {name: dict(counts) for name, counts in self._stages.items()}
+        if self._callback is not None:
+            self._callback(snapshot)
+
+
+def _put_unless_aborted(q: "queue.Queue[Any]", item: Any, abort: threading.Event) -> bool:
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
 def index_kb(
     *,
     store: ChromaVectorStore,
     embedder: OllamaEmbeddingClient,
     kb_raw_dir: Optional[Path] = None,
+    incremental: bool = False,
+    embed_workers: int = 1,
+    embed_unit_chunks: int = 32,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> Dict[str, int]:
-    # Full rebuild so deletions/exclusions in the KB are reflected in the vector store.
-    store.reset_collection()
+    """Index KB Markdown files into the vector store.
+
+    With `incremental=False` the collection is rebuilt from scratch. With
+    `incremental=True` the `doc_hash` stored on each chunk is compared against the
+    current file contents: unchanged files are skipped, changed/new files (and files
+    embedded with another `embedding_format`) are re-embedded and chunks belonging to
+    removed files are deleted.
+
+    Work is pipelined: the calling thread reads and chunks files, `embed_workers`
+    threads embed units of at most `embed_unit_chunks` chunks concurrently, and a
+    single writer thread applies all upserts and then, once every upsert is queued,
+    the deletes of stale chunks. Stages
+    are connected by bounded queues so memory stays flat on large KBs. `progress`
+    receives a per-stage snapshot (`read`/`embed`/`write`, each with `done`/`total`).
+    """
+
+    if not incremental:
+        # Full rebuild so deletions/exclusions in the KB are reflected in the vector store.
+        store.reset_collection()
+        indexed: Dict[str, Dict[str, Any]] = {}
+    else:
+        indexed = _indexed_docs_by_path(store)
 
     files = list(iter_kb_markdown_files(kb_raw_dir))
+    fmt = embedding_format(str(getattr(embedder, "model", "")))
 
-    total_chunks = 0
-    for path in files:
-        chunks = build_chunks_for_file(path)
-        if not chunks:
-            continue
+    workers = max(1, int(embed_workers))
+    unit_size = max(1, int(embed_unit_chunks))
+    tracker = _IndexProgress(len(files), progress)
+
+    embed_q: "queue.Queue[Any]" = queue.Queue(maxsize=workers * 2)
+    write_q: "queue.Queue[Any]" = queue.Queue(maxsize=workers * 2)
+    abort = threading.Event()
+    failures: List[BaseException] = []
+    embedded_chunks = 0
 
-        ids = [c.chunk_id for c in chunks]
-        documents = [c.text for c in chunks]
-        metadatas = [c.metadata for c in chunks]
-        embeddings = [embedder.embed_text(t) for t in documents]
+    def fail(exc: BaseException) -> None:
+        failures.append(exc)
+        abort.set()
 
-        store.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
-        total_chunks += len(chunks)
+    def embed_worker() -> None:
+        while not abort.is_set():
+            try:
+                unit = embed_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if unit is _STOP:
+                return
+            try:
+                embeddings = embedder.embed_many([c.text for c in unit])
+            except BaseException as exc:
+                fail(exc)
+                return
+            tracker.add("embed", "done", len(unit))
+            if not _put_unless_aborted(write_q, ("upsert", unit, embeddings), abort):
+                return
+
+    def writer() -> None:
+        nonlocal embedded_chunks
+        while not abort.is_set():
+            try:
+                op = write_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if op is _STOP:
+                return
+            try:
+                if op[0] == "delete":
+                    store.delete(ids=op[1])
+                else:
+                    _, unit, embeddings = op
+                    store.upsert(
+                        ids=[c.chunk_id for c in unit],
+                        documents=[c.text for c in unit],
+                        embeddings=embeddings,
+                        metadatas=[{**c.metadata, "embedding_format": fmt} for c in unit],
+                    )
+                    embedded_chunks += len(unit)
+                    tracker.add("write", "done", len(unit))
+            except BaseException as exc:
+                fail(exc)
+                return
+
+    embed_threads = [
+        threading.Thread(target=embed_worker, name=f"kb-index-embed-{i}", daemon=True) for i in range(workers)
+    ]
+    writer_thread = threading.Thread(target=writer, name="kb-index-writer", daemon=True)
+    for t in embed_threads:
+        t.start()
+    writer_thread.start()
 
-    return {"files": len(files), "chunks": total_chunks}
+    total_chunks = 0
+    unchanged_files = 0
+    updated_files = 0
+    removed_files = 0
+    seen_paths: set[str] = set()
+    stale_ids: List[str] = []
+    upserted_ids: set[str] = set()
+
+    try:
+        for path in files:
+            if abort.is_set():
+                break
+            path_key = str(path.as_posix())
+            seen_paths.add(path_key)
+            previous = indexed.get(path_key)
+
+            chunks = build_chunks_for_file(path)
+            tracker.add("read", "done", 1)
+            if _chunks_match_indexed(chunks, previous, fmt=fmt):
+                unchanged_files += 1
+                total_chunks += len(chunks)
+                continue
+
+            if previous and previous["ids"]:
+                stale_ids.extend(previous["ids"])
+            if not chunks:
+                continue
+
+            updated_files += 1
+            upserted_ids.update(c.chunk_id for c in chunks)
+            total_chunks += len(chunks)
+            tracker.add("embed", "total", len(chunks))
+            tracker.add("write", "total", len(chunks))
+            for start in range(0, len(chunks), unit_size):
+                if not _put_unless_aborted(embed_q, chunks[start : start + unit_size], abort):
+                    break
+
+        if not abort.is_set():
+            for path_key, rec in indexed.items():
+                if path_key in seen_paths:
+                    continue
+                stale_ids.extend(rec["ids"])
+                removed_files += 1
+    except BaseException as exc:
+        fail(exc)
+    finally:
+        for _ in embed_threads:
+            _put_unless_aborted(embed_q, _STOP, abort)
+        for t in embed_threads:
+            t.join()
+        # Every upsert is on the write queue now, so deletes queued after it are applied
+        # last. Ids rewritten in this run (a document that shrank keeps its first ids)
+        # are not deleted.
+        stale = [chunk_id for chunk_id in dict.fromkeys(stale_ids) if chunk_id not in upserted_ids]
+        for start in range(0, len(stale), _DELETE_BATCH):
+            if not _put_unless_aborted(write_q, ("delete", stale[start : start + _DELETE_BATCH]), abort):
+                break
+        _put_unless_aborted(write_q, _STOP, abort)
+        writer_thread.join()
+
+    if failures:
+        raise failures[0]
+
+    return {
+        "files": len(files),
+        "chunks": total_chunks,
+        "embedded_chunks": embedded_chunks,
+        "unchanged_files": unchanged_files,
+        "updated_files": updated_files,
+        "removed_files": removed_files,
+    }
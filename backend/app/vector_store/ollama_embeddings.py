@@ -1,9 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
+
+
+# Stored with every indexed chunk. Vectors written under another format (older
+# unnormalized vectors, or another model) are re-embedded by the incremental indexer.
+EMBEDDING_FORMAT = "normalized=1"
+
+
+def embedding_format(model: str) -> str:
+    return f"{model}|{EMBEDDING_FORMAT}"
+
+
+def _l2_normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm <= 0.0:
+        return vector
+    return [v / norm for v in vector]
 
 
 @dataclass(frozen=True)
@@ -11,22 +29,130 @@ class OllamaEmbeddingClient:
     base_url: str
     model: str
     timeout_s: float = 60.0
+    batch_size: int = 32
+    # Keep-alive connections kept per host; should cover concurrent indexing workers.
+    pool_maxsize: int = 8
+    # None = unknown, True/False once the batch endpoint has been probed.
+    _batch_supported: Optional[bool] = field(default=None, init=False, repr=False, compare=False)
+    _session: requests.Session = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(self.pool_maxsize)))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        object.__setattr__(self, "_session", session)
+
+    def close(self) -> None:
+        self._session.close()
 
     def embed_text(self, text: str) -> List[float]:
-        if not text or not text.strip():
-            raise ValueError("Cannot embed empty text")
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed several texts, batching requests to Ollama's `/api/embed` endpoint.
+
+        Older Ollama servers only expose the single-prompt `/api/embeddings` endpoint;
+        in that case we fall back to one request per text. Vectors are L2-normalized
+        so both endpoints produce comparable embeddings.
+        """
+
+        items = list(texts)
+        for text in items:
+            if not text or not text.strip():
+                raise ValueError("Cannot embed empty text")
+
+        out: List[List[float]] = []
+        step = max(1, int(self.batch_size))
+        for start in range(0, len(items), step):
+            batch = items[start : start + step]
+            embeddings = self._embed_batch(batch) if self._batch_supported is not False else None
+            if embeddings is None:
+                embeddings = [self._embed_single(t) for t in batch]
+            out.extend(_l2_normalize(e) for e in embeddings)
+
+        return out
+
+    async def aembed_text(self, text: str) -> List[float]:
+        return (await self.aembed_many([text]))[0]
+
+    async def aembed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Async variant of `embed_many` on the shared async HTTP client."""
 
-        # Ollama embeddings endpoint
-        # https://github.com/ollama/ollama/blob/main/docs/api.md
+        from app.services.async_http import get_async_http_client
+
+        items = list(texts)
+        for text in items:
+            if not text or not text.strip():
+                raise ValueError("Cannot embed empty text")
+
+        client = get_async_http_client()
+        base = self.base_url.rstrip("/")
+        out: List[List[float]] = []
+        step = max(1, int(self.batch_size))
+        for start in range(0, len(items), step):
+            batch = items[start : start + step]
+            embeddings = None
+            if self._batch_supported is not False:
+                resp = await client.post(base + "/api/embed", json={"model": self.model, "input": batch}, timeout=self.timeout_s)
+                embeddings = self._parse_batch_response(resp, len(batch))
+            if embeddings is None:
+                embeddings = []
+                for text in batch:
+                    resp = await client.post(
+                        base + "/api/embeddings",
+                        json={"model": self.model, "prompt": text},
+                        timeout=self.timeout_s,
+                    )
+                    resp.raise_for_status()
+                    embeddings.append(self._parse_single_response(resp.json()))
+            out.extend(_l2_normalize(e) for e in embeddings)
+
+        return out
+
+    def _embed_batch(self, batch: List[str]) -> Optional[List[List[float]]]:
+        # Ollama batch embeddings endpoint
+        # https://github.com/ollama/ollama/blob/main/docs/api.md#generate-embeddings
+        url = self.base_url.rstrip("/") + "/api/embed"
+        resp = self._session.post(
+            url,
+            json={"model": self.model, "input": batch},
+            timeout=self.timeout_s,
+        )
+        return self._parse_batch_response(resp, len(batch))
+
+    def _parse_batch_response(self, resp, expected: int) -> Optional[List[List[float]]]:
+        # `resp` is a requests or httpx response; both expose the same accessors used here.
+        if resp.status_code in {404, 405, 501}:
+            object.__setattr__(self, "_batch_supported", False)
+            return None
+        resp.raise_for_status()
+        payload = resp.json()
+
+        embeddings = payload.get("embeddings")
+        if (
+            not isinstance(embeddings, list)
+            or len(embeddings) != expected
+            or not all(isinstance(e, list) and e for e in embeddings)
+        ):
+            raise RuntimeError(f"Unexpected Ollama embed response: {str(payload)[:500]}")
+
+        object.__setattr__(self, "_batch_supported", True)
+        return embeddings
+
+    def _embed_single(self, text: str) -> List[float]:
+        # Legacy single-prompt endpoint (Ollama < 0.3).
         url = self.base_url.rstrip("/") + "/api/embeddings"
-        resp = requests.post(
+        resp = self._session.post(
             url,
             json={"model": self.model, "prompt": text},
             timeout=self.timeout_s,
         )
         resp.raise_for_status()
-        payload = resp.json()
+        return self._parse_single_response(resp.json())
 
+    @staticmethod
+    def _parse_single_response(payload: dict) -> List[float]:
         embedding = payload.get("embedding")
         if not isinstance(embedding, list) or not embedding:
             raise RuntimeError(f"Unexpected Ollama embeddings response: {payload}")
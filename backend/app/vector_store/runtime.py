@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+from .config import VectorStoreConfig, load_vector_store_config
+from .embedding_cache import CachedEmbeddingClient, build_embedder
+from .ollama_embeddings import OllamaEmbeddingClient
+
+if TYPE_CHECKING:
+    from .chroma_store import ChromaVectorStore
+
+
+logger = logging.getLogger(__name__)
+
+Embedder = Union[CachedEmbeddingClient, OllamaEmbeddingClient]
+
+_lock = threading.Lock()
+_store: Optional["ChromaVectorStore"] = None
+_store_key: Optional[Tuple[str, str]] = None
+_embedder: Optional[Embedder] = None
+_embedder_key: Optional[VectorStoreConfig] = None
+
+
+def get_vector_store() -> "ChromaVectorStore":
+    """Return the shared Chroma store, creating it on first use.
+
+    The instance is rebuilt if the configured persist dir/collection changes (tests
+    switch these via env vars). Raises ImportError when chromadb is unavailable.
+    """
+
+    global _store, _store_key
+
+    cfg = load_vector_store_config()
+    key = (str(cfg.persist_dir), cfg.chroma_collection)
+    with _lock:
+        if _store is None or _store_key != key:
+            from .chroma_store import ChromaVectorStore
+
+            _store = ChromaVectorStore(persist_dir=cfg.persist_dir, collection_name=cfg.chroma_collection)
+            _store_key = key
+        return _store
+
+
+def get_embedder() -> Embedder:
+    """Return the shared embedding client (keep-alive HTTP session + embedding cache)."""
+
+    global _embedder, _embedder_key
+
+    cfg = load_vector_store_config()
+    with _lock:
+        if _embedder is None or _embedder_key != cfg:
+            # Not closed: other threads may still be embedding with it. Its HTTP session
+            # is released when the last reference goes away.
+            _embedder = build_embedder(cfg)
+            _embedder_key = cfg
+        return _embedder
+
+
+def init_vector_runtime() -> None:
+    """Warm up the shared store/embedder at startup (best-effort)."""
+
+    get_embedder()
+    try:
+        get_vector_store()
+    except Exception as exc:
+        logger.info("Vector store not initialized at startup: %s", exc)
+
+
+def close_vector_runtime() -> None:
+    global _store, _store_key, _embedder, _embedder_key
+
+    with _lock:
+        if _embedder is not None:
+            _embedder.close()
+        _store = None
+        _store_key = None
+        _embedder = None
+        _embedder_key = None
@@ -8,6 +8,12 @@ from pathlib import Path
 @dataclass(frozen=True)
 class WorkflowDbConfig:
     db_path: Path
+    # Connection pool (see db.get_connection).
+    pool_size: int = 8
+    pool_wait_s: float = 30.0
+    busy_timeout_ms: int = 10000
+    mmap_bytes: int = 64 * 1024 * 1024
+    cache_kib: int = 16 * 1024
 
 
 def _repo_root_from_here() -> Path:
@@ -25,4 +31,9 @@ def load_workflow_db_config() -> WorkflowDbConfig:
 
     return WorkflowDbConfig(
         db_path=Path(os.getenv("WORKFLOW_DB_PATH", str(default_path))),
+        pool_size=max(1, int(os.getenv("WORKFLOW_DB_POOL_SIZE", "8"))),
+        pool_wait_s=max(0.0, float(os.getenv("WORKFLOW_DB_POOL_WAIT_S", "30"))),
+        busy_timeout_ms=max(0, int(os.getenv("WORKFLOW_DB_BUSY_TIMEOUT_MS", "10000"))),
+        mmap_bytes=max(0, int(os.getenv("WORKFLOW_DB_MMAP_BYTES", str(64 * 1024 * 1024)))),
+        cache_kib=max(0, int(os.getenv("WORKFLOW_DB_CACHE_KIB", str(16 * 1024)))),
     )
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import os
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterator
+from typing import Iterator, Optional
 
-from .config import load_workflow_db_config
+from .config import WorkflowDbConfig, load_workflow_db_config
 
 
 def _read_schema_sql() -> str:
@@ -13,22 +16,217 @@ def _read_schema_sql() -> str:
     return schema_path.read_text(encoding="utf-8")
 
 
+class _ConnectionPool:
+    """Reusable connections to one workflow DB file.
+
+    Connections are opened lazily up to `pool_size` and handed out LIFO, so a warm
+    connection (page cache, mmap, prepared statements) is reused. When all are busy the
+    caller waits up to `pool_wait_s`, then gets a one-off overflow connection instead of
+    an error. A thread that already holds a connection from the pool (nested
+    `get_connection`) never waits, so nesting cannot deadlock the pool.
+    """
+
+    def __init__(self, cfg: WorkflowDbConfig) -> None:
+        self.cfg = cfg
+        self.path = cfg.db_path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._cond = threading.Condition()
+        self._idle: list[sqlite3.Connection] = []
+        self._open = 0
+        self._in_use = 0
+        self._closed = False
+        self._local = threading.local()
+
+        self.acquisitions = 0
+        self.opened = 0
+        self.overflow = 0
+        self.discarded = 0
+        self.waits = 0
+        self.wait_s_total = 0.0
+        self.wait_s_max = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        cfg = self.cfg
+        conn = sqlite3.connect(
+            str(self.path),
+            timeout=cfg.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers run next to the single writer; NORMAL only syncs at checkpoints.
+        conn.execute("PRAGMA journal_mode = WAL;").fetchone()
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute(f"PRAGMA busy_timeout = {int(cfg.busy_timeout_ms)};")
+        conn.execute(f"PRAGMA mmap_size = {int(cfg.mmap_bytes)};").fetchone()
+        conn.execute(f"PRAGMA cache_size = -{int(cfg.cache_kib)};")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    def acquire(self) -> tuple[sqlite3.Connection, bool]:
+        """A connection and whether it is an overflow connection (closed on release)."""
+
+        nested = getattr(self._local, "held", 0) > 0
+        start = time.monotonic()
+        deadline = start + self.cfg.pool_wait_s
+        conn: Optional[sqlite3.Connection] = None
+        overflow = False
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.cfg.pool_size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if nested or self._closed or remaining <= 0:
+                    overflow = True
+                    break
+                waited = True
+                self._cond.wait(remaining)
+
+            wait_s = time.monotonic() - start
+            self.acquisitions += 1
+            if waited:
+                self.waits += 1
+                self.wait_s_total += wait_s
+                self.wait_s_max = max(self.wait_s_max, wait_s)
+            if overflow:
+                self.overflow += 1
+            else:
+                self._in_use += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                if not overflow:
+                    with self._cond:
+                        self._open -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                raise
+            with self._cond:
+                self.opened += 1
+        self._local.held = getattr(self._local, "held", 0) + 1
+        return conn, overflow
+
+    def release(self, conn: sqlite3.Connection, *, overflow: bool) -> None:
+        self._local.held = max(0, getattr(self._local, "held", 0) - 1)
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            # Callers may switch foreign keys off for a migration; the next one expects them on.
+            conn.execute("PRAGMA foreign_keys = ON;")
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            healthy = False
+
+        if overflow:
+            conn.close()
+            return
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append(conn)
+                conn = None
+            else:
+                self._open -= 1
+                if not healthy:
+                    self.discarded += 1
+            self._cond.notify()
+        if conn is not None:
+            conn.close()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "path": str(self.path),
+                "size": self.cfg.pool_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "acquisitions": self.acquisitions,
+                "opened": self.opened,
+                "overflow": self.overflow,
+                "discarded": self.discarded,
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_s_total * 1000, 1),
+                "wait_ms_max": round(self.wait_s_max * 1000, 1),
+            }
+
+
+_POOLS: dict[str, _ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+_POOLS_PID = os.getpid()
+
+
+def _current_pool() -> _ConnectionPool:
+    global _POOLS_PID
+    # WORKFLOW_DB_PATH is read on every call (tests point it at a fresh file per case);
+    # the rest of the config is only loaded when a pool is created.
+    key = os.getenv("WORKFLOW_DB_PATH") or ""
+    pool = _POOLS.get(key)
+    if pool is not None and _POOLS_PID == os.getpid():
+        return pool
+    with _POOLS_LOCK:
+        if _POOLS_PID != os.getpid():
+            # Forked child: SQLite connections must not cross fork(); start over.
+            _POOLS.clear()
+            _POOLS_PID = os.getpid()
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _ConnectionPool(load_workflow_db_config())
+            _POOLS[key] = pool
+        return pool
+
+
 @contextmanager
 def get_connection() -> Iterator[sqlite3.Connection]:
-    cfg = load_workflow_db_config()
-    cfg.db_path.parent.mkdir(parents=True, exist_ok=True)
+    """Pooled connection; commits on success and rolls back on error."""
 
-    conn = sqlite3.connect(str(cfg.db_path))
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+    pool = _current_pool()
+    conn, overflow = pool.acquire()
     try:
         yield conn
         conn.commit()
     except Exception:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
         raise
     finally:
-        conn.close()
+        pool.release(conn, overflow=overflow)
+
+
+def connection_pool_stats() -> list[dict]:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return [pool.stats() for pool in pools]
+
+
+def close_connection_pools() -> None:
+    """Close idle pooled connections; connections still in use are closed when released."""
+
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
 
 
 def _migrate_users_table_for_expert_role(conn: sqlite3.Connection) -> None:
@@ -71,6 +269,58 @@ def _migrate_users_table_for_expert_role(conn: sqlite3.Connection) -> None:
     conn.execute("PRAGMA foreign_keys = ON;")
 
 
+def _migrate_jobs_table_for_parse_lane(conn: sqlite3.Connection) -> None:
+    # The lane CHECK cannot be altered in place, so older databases get the table rebuilt.
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name='jobs'"
+    ).fetchone()
+
+    if row is None:
+        return
+
+    create_sql = (row["sql"] or "").lower()
+    if "'parse'" in create_sql:
+        return
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs_new (
+          job_id TEXT PRIMARY KEY,
+          kind TEXT NOT NULL,
+          payload_json TEXT NOT NULL,
+          lane TEXT NOT NULL DEFAULT 'bulk' CHECK (lane IN ('interactive','bulk','parse')),
+          status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued','running','succeeded','failed')),
+          dedupe_key TEXT,
+          attempts INTEGER NOT NULL DEFAULT 0,
+          max_attempts INTEGER NOT NULL DEFAULT 3,
+          available_at REAL NOT NULL,
+          lease_owner TEXT,
+          lease_expires_at REAL,
+          last_error TEXT,
+          created_at TEXT NOT NULL DEFAULT (datetime('now')),
+          finished_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO jobs_new (job_id, kind, payload_json, lane, status, dedupe_key, attempts, max_attempts,
+                              available_at, lease_owner, lease_expires_at, last_error, created_at, finished_at)
+        SELECT job_id, kind, payload_json, lane, status, dedupe_key, attempts, max_attempts,
+               available_at, lease_owner, lease_expires_at, last_error, created_at, finished_at
+        FROM jobs
+        """
+    )
+    conn.execute("DROP TABLE jobs")
+    conn.execute("ALTER TABLE jobs_new RENAME TO jobs")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, lane, available_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lane_status ON jobs(lane, status)")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe ON jobs(dedupe_key) "
+        "WHERE dedupe_key IS NOT NULL AND status IN ('queued','running')"
+    )
+
+
 def _ensure_suggestions_generation_columns(conn: sqlite3.Connection) -> None:
     # SQLite supports ADD COLUMN, but not adding CHECK constraints post-hoc.
     # We keep this as best-effort to enable explicit generation status/diagnostics.
@@ -89,6 +339,7 @@ def _ensure_suggestions_generation_columns(conn: sqlite3.Connection) -> None:
     add("generation_finished_at", "generation_finished_at TEXT")
     add("generation_reason", "generation_reason TEXT")
     add("generation_error", "generation_error TEXT")
+    add("generation_diagnostics", "generation_diagnostics TEXT")
 
     # Index is optional; create if missing.
     conn.execute(
@@ -101,4 +352,5 @@ def init_db() -> None:
     with get_connection() as conn:
         conn.executescript(schema_sql)
         _migrate_users_table_for_expert_role(conn)
+        _migrate_jobs_table_for_parse_lane(conn)
         _ensure_suggestions_generation_columns(conn)
@@ -109,6 +109,7 @@ CREATE TABLE IF NOT EXISTS suggestions (
   generation_finished_at TEXT,
   generation_reason TEXT,
   generation_error TEXT,
+  generation_diagnostics TEXT,
   created_at TEXT NOT NULL DEFAULT (datetime('now')),
   FOREIGN KEY (upload_id) REFERENCES uploads(upload_id) ON DELETE CASCADE
 );
@@ -132,6 +133,34 @@ CREATE TABLE IF NOT EXISTS applied_changes (
   FOREIGN KEY (suggestion_id) REFERENCES suggestions(suggestion_id) ON DELETE CASCADE
 );
 
+CREATE TABLE IF NOT EXISTS jobs (
+  job_id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  payload_json TEXT NOT NULL,
+  lane TEXT NOT NULL DEFAULT 'bulk' CHECK (lane IN ('interactive','bulk','parse')),
+  status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued','running','succeeded','failed')),
+  dedupe_key TEXT,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 3,
+  available_at REAL NOT NULL,
+  lease_owner TEXT,
+  lease_expires_at REAL,
+  last_error TEXT,
+  created_at TEXT NOT NULL DEFAULT (datetime('now')),
+  finished_at TEXT
+);
+
+-- Successful structuring results keyed by normalized text, so duplicate uploads skip the LLM.
+CREATE TABLE IF NOT EXISTS suggestion_generation_cache (
+  normalized_sha256 TEXT NOT NULL,
+  prompt_version TEXT NOT NULL,
+  model TEXT NOT NULL,
+  suggestion_text TEXT NOT NULL,
+  source_suggestion_id TEXT,
+  created_at TEXT NOT NULL DEFAULT (datetime('now')),
+  PRIMARY KEY (normalized_sha256, prompt_version, model)
+);
+
 CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(sha256);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
 CREATE INDEX IF NOT EXISTS idx_documents_category ON documents(category);
@@ -145,3 +174,6 @@ CREATE INDEX IF NOT EXISTS idx_auth_sessions_revoked_at ON auth_sessions(revoked
 CREATE INDEX IF NOT EXISTS idx_suggestions_upload_id ON suggestions(upload_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_suggestion_id ON reviews(suggestion_id);
 CREATE INDEX IF NOT EXISTS idx_kb_issue_reports_kb_path ON kb_issue_reports(kb_path);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, lane, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lane_status ON jobs(lane, status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe ON jobs(dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued','running');
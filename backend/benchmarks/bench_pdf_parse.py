@@ -0,0 +1,70 @@
+"""Wall-clock benchmark for PDF text extraction.
+
+Run from the backend folder:
+
+    python -m benchmarks.bench_pdf_parse [file.pdf ...] [--pages N] [--workers N]
+
+Without files a synthetic PDF with `--pages` pages is generated. Each file is parsed
+sequentially in this process (`parse_document`) and through the parser process pool
+(`parse_document_in_pool`), which splits long PDFs into page ranges.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.document_processing.document_parsing import parse_document
+from app.document_processing.parse_pool import parse_document_in_pool, run_in_parse_pool, shutdown_parse_pool
+
+
+def _synthetic_pdf(path: Path, pages: int) -> None:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=10)
+    line = "Kontroller pumpe, ventil og tetning. Noter trykk, temperatur og avvik i loggen. "
+    for i in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 5, f"Side {i + 1}\n\n" + line * 30)
+    pdf.output(str(path))
+
+
+def _timed(fn) -> tuple[float, str]:
+    start = time.perf_counter()
+    text = fn()
+    return time.perf_counter() - start, text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    os.environ["PARSE_WORKERS"] = str(args.workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = list(args.files)
+        if not files:
+            files = [Path(tmp) / f"synthetic-{args.pages}p.pdf"]
+            _synthetic_pdf(files[0], args.pages)
+
+        # Start the worker processes before timing anything.
+        run_in_parse_pool(abs, 0, timeout_s=120)
+        for path in files:
+            sequential_s, sequential = _timed(lambda: parse_document(path.name, path))
+            pooled_s, pooled = _timed(lambda: parse_document_in_pool(path.name, path, timeout_s=3600))
+            print(f"{path.name}: {len(sequential)} chars")
+            print(f"  sequential {sequential_s:8.2f} s")
+            print(f"  pool x{args.workers:<3d} {pooled_s:8.2f} s  speedup {sequential_s / pooled_s:.1f}x")
+            if pooled != sequential:
+                print("  WARNING: pooled output differs from sequential output")
+    shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Throughput benchmark for similarity shingle hashing.
+
+Run from the backend folder:
+
+    python -m benchmarks.bench_shingles [file.pdf|file.docx|file.txt ...] [--repeat N]
+
+Without files a synthetic ~100k-token Norwegian-like text is used. PDFs/DOCX are
+run through the same parsers as uploads, so the numbers reflect normalized text.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+from app.document_processing.document_parsing import parse_document
+from app.kb.similarity import shingle_hashes, tokenize_for_similarity
+
+
+def _synthetic_text(n_tokens: int = 100_000) -> str:
+    rng = random.Random(42)
+    words = (
+        "pumpe ventil tetning lager smøring kontroll rutine operatør skift anlegg nikkel raffineri "
+        "elektrolyse celle anode katode strøm spenning temperatur trykk alarm logg vernerunde og i på til av"
+    ).split()
+    return " ".join(rng.choice(words) + (str(rng.randint(0, 50)) if rng.random() < 0.2 else "") for _ in range(n_tokens))
+
+
+def _load(path: Path) -> str:
+    return parse_document(path.name, path)
+
+
+def _bench(label: str, tokens: list[str], mode: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = shingle_hashes(tokens, mode=mode, max_shingles=len(tokens))
+        best = min(best, time.perf_counter() - start)
+    windows = max(0, len(tokens) - 4)
+    rate = windows / best if best > 0 else float("inf")
+    print(f"  {mode:8s} {best * 1000:9.2f} ms  {rate / 1e6:7.2f} M windows/s  ({out.size} unique)  [{label}]")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [(p.name, _load(p)) for p in args.files] or [("synthetic", _synthetic_text())]
+    for label, text in texts:
+        # No max_tokens cap here: we want to measure the hashing loop on large inputs.
+        tokens = tokenize_for_similarity(text, max_tokens=len(text))
+        print(f"{label}: {len(tokens)} tokens")
+        legacy = _bench(label, tokens, "blake2b", args.repeat)
+        rolling = _bench(label, tokens, "rolling", args.repeat)
+        print(f"  speedup: {legacy / rolling:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Wall-clock benchmark for cleanup of extracted text.
+
+Run from the backend folder:
+
+    python -m benchmarks.bench_text_cleanup [file.pdf|file.docx|file.txt|folder ...] [--repeat N]
+
+Without arguments the uploaded originals in `databases/data/uploads/blobs` are used.
+PDF pages are extracted once up front; the timed stages are what runs on the text
+afterwards: page-text normalization (PDF only), `clean_extracted_text`, TOC detection,
+expansion-line selection and the deterministic fallback draft. Line-classification and
+cleanup caches are cleared before every run, so the numbers are for a cold document.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.document_processing.document_parsing import parse_document
+from app.document_processing.line_classifier import classify_line
+from app.document_processing.pdf_parser import extract_pdf_pages, join_pdf_pages
+from app.services import revised_suggestion as rs
+from app.workflow_db.config import get_repo_root
+
+
+_SUFFIXES = {".pdf", ".docx", ".txt"}
+
+
+def _files(args: list[Path]) -> list[Path]:
+    roots = args or [get_repo_root() / "databases" / "data" / "uploads" / "blobs"]
+    out: list[Path] = []
+    for root in roots:
+        if root.is_dir():
+            out.extend(sorted(p for p in root.rglob("*") if p.suffix.lower() in _SUFFIXES))
+        elif root.is_file():
+            out.append(root)
+    return out
+
+
+def _clear_caches() -> None:
+    classify_line.cache_clear()
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _stages(path: Path) -> list[tuple[str, Callable[[], object]]]:
+    stages: list[tuple[str, Callable[[], object]]] = []
+    if path.suffix.lower() == ".pdf":
+        pages = extract_pdf_pages(path)
+        stages.append(("normalize_pdf", lambda: join_pdf_pages(pages)))
+        text = join_pdf_pages(pages)
+    else:
+        text = parse_document(path.name, path)
+    cleaned = rs.clean_extracted_text(text)
+
+    def generation() -> None:
+        # The cleanup calls one suggestion generation makes before/around the LLM.
+        c = rs.clean_extracted_text(text)
+        rs._looks_like_table_of_contents(c)
+        rs.fallback_structured_document_long(path.name, c)
+        rs._collect_source_lines_for_expansion(c)
+        rs.fallback_structured_document_long(path.name, c)
+
+    stages += [
+        ("clean_extracted_text", lambda: rs.clean_extracted_text(text)),
+        ("toc_detection", lambda: (rs._looks_like_table_of_contents(cleaned), rs._extract_toc_entries(cleaned))),
+        ("expansion_lines", lambda: rs._collect_source_lines_for_expansion(cleaned)),
+        ("fallback_draft", lambda: rs.fallback_structured_document_long(path.name, cleaned)),
+        ("generation_total", generation),
+    ]
+    return stages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    files = _files(args.paths)
+    if not files:
+        print("No .pdf/.docx/.txt files found; pass files or folders to benchmark.")
+        return
+
+    totals: dict[str, float] = {}
+    for path in files:
+        stages = _stages(path)
+        print(f"{path.name}")
+        for name, fn in stages:
+            ms = _best_ms(fn, args.repeat)
+            totals[name] = totals.get(name, 0.0) + ms
+            print(f"  {name:22s} {ms:9.2f} ms")
+    print(f"total ({len(files)} files)")
+    for name, ms in totals.items():
+        print(f"  {name:22s} {ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.services.sqlite_cache import SqliteLruCache
+from app.vector_store.embedding_cache import CachedEmbeddingClient
+
+
+class _CountingClient:
+    model = "test-embed"
+
+    def __init__(self) -> None:
+        self.embedded: list[str] = []
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.embedded.extend(texts)
+        return [[float(len(t)), 0.5] for t in texts]
+
+
+def test_cached_client_only_embeds_misses_and_survives_restart(tmp_path: Path) -> None:
+    path = tmp_path / "emb.sqlite3"
+    inner = _CountingClient()
+    client = CachedEmbeddingClient(inner, SqliteLruCache(path, max_entries=100))
+
+    first = client.embed_many(["alpha", "beta", "alpha"])
+    assert inner.embedded == ["alpha", "beta"]
+    assert first[0] == first[2] == [5.0, 0.5]
+
+    second = client.embed_many(["beta", "gamma"])
+    assert inner.embedded == ["alpha", "beta", "gamma"]
+    assert second == [[4.0, 0.5], [5.0, 0.5]]
+
+    client.cache.close()
+    reopened = CachedEmbeddingClient(inner, SqliteLruCache(path, max_entries=100))
+    assert reopened.embed_text("alpha") == pytest.approx([5.0, 0.5])
+    assert inner.embedded == ["alpha", "beta", "gamma"]
+    assert reopened.stats()["hits"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = SqliteLruCache(tmp_path / "lru.sqlite3", max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"  # "b" is now the oldest entry
+
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c"]) == {"a": b"1", "c": b"3"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_async_embedding_uses_the_cache_off_the_event_loop(tmp_path: Path, monkeypatch) -> None:
+    import asyncio
+    import threading
+
+    class _AsyncClient(_CountingClient):
+        async def aembed_many(self, texts: list[str]) -> list[list[float]]:
+            return self.embed_many(texts)
+
+    inner = _AsyncClient()
+    client = CachedEmbeddingClient(inner, SqliteLruCache(tmp_path / "emb.sqlite3", max_entries=100))
+    cache_threads: list[int] = []
+    for name in ("get_many", "put_many"):
+
+        def recorded(*args, _original=getattr(client.cache, name), **kwargs):
+            cache_threads.append(threading.get_ident())
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(client.cache, name, recorded)
+
+    assert asyncio.run(client.aembed_many(["alpha", "alpha"])) == [[5.0, 0.5], [5.0, 0.5]]
+    assert asyncio.run(client.aembed_text("alpha")) == pytest.approx([5.0, 0.5])
+    assert inner.embedded == ["alpha"]
+    assert len(cache_threads) == 3
+    assert threading.get_ident() not in cache_threads
+
+
+def test_config_change_swaps_the_shared_embedder_without_closing_it(tmp_path: Path, monkeypatch) -> None:
+    from app.vector_store import runtime
+
+    closed: list[object] = []
+    monkeypatch.setattr(runtime, "_embedder", None)
+    monkeypatch.setattr(runtime, "_embedder_key", None)
+    monkeypatch.setenv("EMBED_CACHE_PATH", str(tmp_path / "emb.sqlite3"))
+    monkeypatch.setenv("OLLAMA_EMBED_MODEL", "model-a")
+    first = runtime.get_embedder()
+    monkeypatch.setattr(type(first), "close", lambda self: closed.append(self))
+
+    monkeypatch.setenv("OLLAMA_EMBED_MODEL", "model-b")
+    second = runtime.get_embedder()
+
+    assert second is not first
+    assert runtime.get_embedder() is second
+    # Requests still running on the old client keep their HTTP session.
+    assert closed == []
+
+    runtime.close_vector_runtime()
+    assert closed == [second]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import re
+
+from app.services.evidence_index import EvidenceIndex, normalize_for_evidence, quotes_in
+
+
+def _regex_normalize(text: str) -> str:
+    # The previous regex-based normalization; the index must stay equivalent to it.
+    t = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    t = t.replace("–", "-").replace("—", "-")
+    t = t.replace("“", '"').replace("”", '"')
+    t = t.replace("‘", "'").replace("’", "'")
+    t = re.sub(r"\s+", " ", t).strip()
+    t = re.sub(r"\s+([,.;:)])", r"\1", t)
+    return t
+
+
+SOURCE = (
+    "  Kapittel 2 – Vedlikehold\r\n\r\n"
+    "Pumpen skal kontrolleres  hver uke ,\n og avvik i trykk\tføres i “loggen” .\n"
+    "Ansvarlig (skiftleder ) godkjenner.\n"
+)
+
+
+def test_normalization_matches_regex_version() -> None:
+    for text in (SOURCE, "", "   ", " ,start", "a ) b ;c", "x  y\n\n"):
+        assert normalize_for_evidence(text) == _regex_normalize(text)
+        assert EvidenceIndex(text).normalized == _regex_normalize(text)
+
+
+def test_find_maps_normalized_match_back_to_original_offsets() -> None:
+    index = EvidenceIndex(SOURCE)
+
+    span = index.find('hver uke, og avvik i trykk føres i "loggen".')
+
+    assert span is not None
+    start, end = span
+    assert SOURCE[start:end] == "hver uke ,\n og avvik i trykk\tføres i “loggen” ."
+    assert index.find("Kapittel 2 - Vedlikehold") == (2, 2 + len("Kapittel 2 – Vedlikehold"))
+    assert index.find("står ikke i kilden") is None
+
+
+def test_spans_for_rendered_suggestion() -> None:
+    markdown = (
+        "## Viktigste punkter\n"
+        "- Pumpen kontrolleres ukentlig (KILDE: \"Pumpen skal kontrolleres hver uke\")\n"
+        "- Skiftleder godkjenner (KILDE: \"Ansvarlig (skiftleder) godkjenner.\")\n"
+        "- Oppdiktet (KILDE: \"finnes ikke i teksten\")\n"
+        "- Gjentatt (KILDE: \"Pumpen skal kontrolleres hver uke\")\n"
+    )
+
+    spans = EvidenceIndex(SOURCE).spans(quotes_in(markdown))
+
+    assert [s["quote"] for s in spans] == [
+        "Pumpen skal kontrolleres hver uke",
+        "Ansvarlig (skiftleder) godkjenner.",
+        "finnes ikke i teksten",
+    ]
+    assert SOURCE[spans[0]["start"] : spans[0]["end"]] == "Pumpen skal kontrolleres  hver uke"
+    assert SOURCE[spans[1]["start"] : spans[1]["end"]] == "Ansvarlig (skiftleder ) godkjenner."
+    assert spans[2]["start"] is None and spans[2]["end"] is None
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.services import job_queue
+from app.services.job_queue import (
+    JobWorkerPool,
+    active_job_count,
+    enqueue_job,
+    job_counts,
+    prune_finished_jobs,
+    register_job_handler,
+)
+from app.workflow_db.db import get_connection, init_db
+
+
+@pytest.fixture()
+def workflow_db(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("WORKFLOW_DB_PATH", str(tmp_path / "workflow.sqlite3"))
+    monkeypatch.setattr(job_queue, "_handlers", {})
+    init_db()
+
+
+def _job_row(job_id: str):
+    with get_connection() as conn:
+        return conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+
+def test_interactive_lane_runs_first_and_dedupe_skips_active_jobs(workflow_db) -> None:
+    ran: list[str] = []
+    register_job_handler("test", lambda payload: ran.append(payload["name"]))
+
+    bulk = enqueue_job("test", {"name": "bulk"}, lane="bulk", dedupe_key="s:1")
+    assert bulk is not None
+    assert enqueue_job("test", {"name": "dup"}, lane="interactive", dedupe_key="s:1") is None
+    enqueue_job("test", {"name": "interactive"}, lane="interactive", dedupe_key="s:2")
+
+    pool = JobWorkerPool(workers=1)
+    assert pool.run_once() and pool.run_once()
+    assert not pool.run_once()
+    assert ran == ["interactive", "bulk"]
+    assert _job_row(bulk)["status"] == "succeeded"
+
+    # Finished jobs no longer block new work for the same key.
+    assert enqueue_job("test", {"name": "again"}, dedupe_key="s:1") is not None
+
+
+def test_failed_jobs_are_retried_with_backoff_then_marked_failed(workflow_db) -> None:
+    def boom(payload):
+        raise RuntimeError("ollama down")
+
+    register_job_handler("test", boom)
+    job_id = enqueue_job("test", {}, max_attempts=2)
+
+    pool = JobWorkerPool(workers=1, retry_base_s=60)
+    assert pool.run_once()
+    row = _job_row(job_id)
+    assert row["status"] == "queued"
+    assert row["attempts"] == 1
+    assert "ollama down" in row["last_error"]
+    # Not yet available because of the backoff.
+    assert not pool.run_once()
+
+    with get_connection() as conn:
+        conn.execute("UPDATE jobs SET available_at = 0 WHERE job_id = ?", (job_id,))
+    assert pool.run_once()
+    assert _job_row(job_id)["status"] == "failed"
+    assert job_counts()["bulk"] == {"failed": 1}
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(workflow_db) -> None:
+    ran: list[dict] = []
+    register_job_handler("test", ran.append)
+    job_id = enqueue_job("test", {"n": 1})
+
+    # Simulate a process that claimed the job and then died.
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = 1, lease_owner = 'dead', lease_expires_at = 0 WHERE job_id = ?",
+            (job_id,),
+        )
+
+    pool = JobWorkerPool(workers=1)
+    assert pool.run_once()
+    assert ran == [{"n": 1}]
+    row = _job_row(job_id)
+    assert row["status"] == "succeeded"
+    assert row["attempts"] == 2
+
+
+def test_parse_lane_jobs_are_stored_and_claimed_by_parse_workers(workflow_db) -> None:
+    ran: list[dict] = []
+    register_job_handler("parse", ran.append)
+
+    job_id = enqueue_job("parse", {"n": 1}, lane="parse", dedupe_key="parse:u1")
+    assert job_id is not None
+    assert _job_row(job_id)["lane"] == "parse"
+    assert enqueue_job("parse", {"n": 2}, lane="parse", dedupe_key="parse:u1") is None
+
+    assert not JobWorkerPool(workers=1, lanes=("interactive", "bulk")).run_once()
+    assert JobWorkerPool(workers=1, lanes=("parse",)).run_once()
+    assert ran == [{"n": 1}]
+
+
+def test_old_jobs_table_is_rebuilt_to_accept_parse_lane(workflow_db) -> None:
+    with get_connection() as conn:
+        conn.execute("DROP TABLE jobs")
+        conn.execute(
+            """
+            CREATE TABLE jobs (
+              job_id TEXT PRIMARY KEY,
+              kind TEXT NOT NULL,
+              payload_json TEXT NOT NULL,
+              lane TEXT NOT NULL DEFAULT 'bulk' CHECK (lane IN ('interactive','bulk')),
+              status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued','running','succeeded','failed')),
+              dedupe_key TEXT,
+              attempts INTEGER NOT NULL DEFAULT 0,
+              max_attempts INTEGER NOT NULL DEFAULT 3,
+              available_at REAL NOT NULL,
+              lease_owner TEXT,
+              lease_expires_at REAL,
+              last_error TEXT,
+              created_at TEXT NOT NULL DEFAULT (datetime('now')),
+              finished_at TEXT
+            )
+            """
+        )
+        conn.execute("INSERT INTO jobs (job_id, kind, payload_json, available_at) VALUES ('old', 'test', '{}', 0)")
+
+    init_db()
+
+    assert _job_row("old")["lane"] == "bulk"
+    assert enqueue_job("parse", {}, lane="parse") is not None
+    with get_connection() as conn:
+        indexes = {row["name"] for row in conn.execute("PRAGMA index_list('jobs')")}
+    assert {"idx_jobs_claim", "idx_jobs_active_dedupe"} <= indexes
+
+
+def test_constraint_errors_raise_instead_of_looking_deduplicated(workflow_db, monkeypatch) -> None:
+    monkeypatch.setattr(job_queue, "LANES", (*job_queue.LANES, "nightly"))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        enqueue_job("test", {}, lane="nightly")
+
+
+def test_old_finished_jobs_are_pruned_and_active_jobs_are_kept(workflow_db) -> None:
+    old_done = enqueue_job("test", {}, lane="interactive")
+    old_failed = enqueue_job("test", {})
+    recent = enqueue_job("test", {})
+    queued = enqueue_job("test", {}, lane="interactive")
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'succeeded', finished_at = datetime('now', '-30 days') WHERE job_id = ?",
+            (old_done,),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = datetime('now', '-8 days') WHERE job_id = ?",
+            (old_failed,),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'succeeded', finished_at = datetime('now', '-1 days') WHERE job_id = ?",
+            (recent,),
+        )
+
+    assert prune_finished_jobs(0) == 0
+    assert prune_finished_jobs(7) == 2
+    assert _job_row(old_done) is None and _job_row(old_failed) is None
+    assert _job_row(recent)["status"] == "succeeded"
+    assert _job_row(queued)["status"] == "queued"
+    assert active_job_count("interactive") == 1
+    assert active_job_count("bulk") == 0
+
+
+def test_active_job_count_uses_lane_status_index(workflow_db) -> None:
+    with get_connection() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM jobs WHERE lane = ? AND status IN ('queued','running')",
+            ("interactive",),
+        ).fetchall()
+    assert any("idx_jobs_lane_status" in row[-1] for row in plan)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from app.kb import kb_catalog
+from app.kb.kb_catalog import KbCatalog
+
+
+def _write(root: Path, rel: str, front: str, body: str) -> Path:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"---\n{front}\n---\n\n{body}\n", encoding="utf-8")
+    return path
+
+
+def test_catalog_only_rereads_changed_files(tmp_path: Path, monkeypatch) -> None:
+    _write(tmp_path, "sikkerhet/a.md", 'title: "A"\ncategory: "sikkerhet"', "# A\n\nTekst.")
+    b = _write(tmp_path, "b.md", 'title: "B"\ncategory: "Kvalitet"', "# B\n\nTekst.")
+    _write(tmp_path, "README.md", 'title: "Readme"', "Ignoreres.")
+
+    loads: list[str] = []
+    original = kb_catalog._load_entry
+
+    def counting_load(path: Path, **kwargs):
+        loads.append(kwargs["kb_path"])
+        return original(path, **kwargs)
+
+    monkeypatch.setattr(kb_catalog, "_load_entry", counting_load)
+    catalog = KbCatalog(root=lambda: tmp_path, refresh_interval_s=0)
+
+    entries = catalog.entries()
+    assert [e.kb_path for e in entries] == ["b.md", "sikkerhet/a.md"]
+    assert [e.kb_path for e in catalog.entries(category="Sikkerhet")] == ["sikkerhet/a.md"]
+    assert sorted(loads) == ["b.md", "sikkerhet/a.md"]
+    version = catalog.version
+
+    loads.clear()
+    catalog.entries()
+    assert loads == []
+    assert catalog.version == version
+
+    _write(tmp_path, "b.md", 'title: "B2"\ncategory: "Kvalitet"', "# B\n\nNy tekst.")
+    st = b.stat()
+    os.utime(b, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    (tmp_path / "sikkerhet" / "a.md").unlink()
+
+    entries = catalog.entries()
+    assert loads == ["b.md"]
+    assert [(e.kb_path, e.title) for e in entries] == [("b.md", "B2")]
+    assert catalog.version > version
+
+
+def test_catalog_throttles_refresh_until_invalidated(tmp_path: Path) -> None:
+    catalog = KbCatalog(root=lambda: tmp_path, refresh_interval_s=3600)
+    assert catalog.entries() == []
+
+    _write(tmp_path, "c.md", 'title: "C"', "# C")
+    assert catalog.entries() == []
+
+    catalog.invalidate()
+    assert [e.title for e in catalog.entries()] == ["C"]
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from app.vector_store import kb_indexer
+
+
+class _FakeStore:
+    def __init__(self) -> None:
+        self.rows: dict[str, dict] = {}
+        self.resets = 0
+
+    def reset_collection(self) -> None:
+        self.resets += 1
+        self.rows.clear()
+
+    def upsert(self, *, ids, documents, embeddings, metadatas=None) -> None:
+        for i, chunk_id in enumerate(ids):
+            self.rows[chunk_id] = {"document": documents[i], "metadata": dict((metadatas or [{}])[i])}
+
+    def get(self, *, limit=100, offset=0, where=None, include=None) -> dict:
+        keys = sorted(self.rows)[offset : offset + limit]
+        return {"ids": keys, "metadatas": [self.rows[k]["metadata"] for k in keys]}
+
+    def delete(self, *, where=None, ids=None) -> None:
+        for chunk_id in ids or []:
+            self.rows.pop(chunk_id, None)
+
+
+class _CountingEmbedder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.calls += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def _write(root: Path, rel: str, title: str, body: str) -> Path:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f'---\ntitle: "{title}"\n---\n\n{body}\n', encoding="utf-8")
+    return path
+
+
+def test_incremental_index_skips_unchanged_and_removes_deleted(tmp_path: Path) -> None:
+    _write(tmp_path, "a.md", "A", "# A\n\nFørste dokument.")
+    _write(tmp_path, "sub/b.md", "B", "# B\n\nAndre dokument.")
+    store = _FakeStore()
+    embedder = _CountingEmbedder()
+
+    first = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path)
+    assert first["files"] == 2
+    assert first["embedded_chunks"] == 2
+    assert store.resets == 1
+
+    embedder.calls = 0
+    unchanged = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+    assert embedder.calls == 0
+    assert unchanged["unchanged_files"] == 2
+    assert unchanged["chunks"] == 2
+
+    _write(tmp_path, "a.md", "A", "# A\n\nFørste dokument, nå endret.")
+    (tmp_path / "sub" / "b.md").unlink()
+    _write(tmp_path, "c.md", "C", "# C\n\nTredje dokument.")
+
+    changed = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+    assert store.resets == 1
+    assert embedder.calls == 2
+    assert changed["updated_files"] == 2
+    assert changed["removed_files"] == 1
+    paths = {row["metadata"]["path"] for row in store.rows.values()}
+    assert paths == {(tmp_path / "a.md").as_posix(), (tmp_path / "c.md").as_posix()}
+
+
+def test_incremental_index_reembeds_when_title_changes(tmp_path: Path) -> None:
+    _write(tmp_path, "a.md", "Gammel tittel", "# A\n\nSamme innhold.")
+    store = _FakeStore()
+    embedder = _CountingEmbedder()
+    kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+
+    _write(tmp_path, "a.md", "Ny tittel", "# A\n\nSamme innhold.")
+    embedder.calls = 0
+    stats = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+
+    assert stats["updated_files"] == 1
+    assert embedder.calls == 1
+    assert all(row["metadata"]["title"] == "Ny tittel" for row in store.rows.values())
+
+
+class _FailingEmbedder:
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        raise RuntimeError("ollama down")
+
+
+def test_pipelined_index_reports_progress_with_multiple_workers(tmp_path: Path) -> None:
+    for i in range(12):
+        _write(tmp_path, f"doc{i}.md", f"Doc {i}", f"# D{i}\n\nInnhold {i}.")
+    store = _FakeStore()
+    embedder = _CountingEmbedder()
+    snapshots: list[dict] = []
+
+    stats = kb_indexer.index_kb(
+        store=store,
+        embedder=embedder,
+        kb_raw_dir=tmp_path,
+        embed_workers=4,
+        embed_unit_chunks=1,
+        progress=snapshots.append,
+    )
+
+    assert stats["embedded_chunks"] == 12
+    assert len(store.rows) == 12
+    final = snapshots[-1]
+    assert final["read"] == {"done": 12, "total": 12}
+    assert final["write"] == {"done": 12, "total": 12}
+
+
+def test_pipelined_index_propagates_embedding_errors(tmp_path: Path) -> None:
+    _write(tmp_path, "a.md", "A", "# A\n\nTekst.")
+    store = _FakeStore()
+
+    with pytest.raises(RuntimeError, match="ollama down"):
+        kb_indexer.index_kb(store=store, embedder=_FailingEmbedder(), kb_raw_dir=tmp_path, embed_workers=2)
+    assert store.rows == {}
+
+
+def test_moved_file_and_repeated_stems_keep_their_chunks(tmp_path: Path) -> None:
+    _write(tmp_path, "a/x.md", "X", "# X\n\nFlyttet dokument.")
+    _write(tmp_path, "c/y.md", "Y1", "# Y\n\nFørste y.")
+    _write(tmp_path, "d/y.md", "Y2", "# Y\n\nAndre y.")
+    store = _FakeStore()
+    embedder = _CountingEmbedder()
+    kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path)
+    assert len(store.rows) == 3
+
+    embedder.calls = 0
+    stats = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+    assert stats["unchanged_files"] == 3
+    assert embedder.calls == 0
+
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "x.md").rename(tmp_path / "b" / "x.md")
+    stats = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+
+    assert stats["removed_files"] == 1
+    paths = sorted(row["metadata"]["path"] for row in store.rows.values())
+    assert paths == sorted((tmp_path / rel).as_posix() for rel in ("b/x.md", "c/y.md", "d/y.md"))
+
+
+class _LoggingStore(_FakeStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.ops: list[tuple[str, list[str]]] = []
+
+    def upsert(self, *, ids, documents, embeddings, metadatas=None) -> None:
+        self.ops.append(("upsert", list(ids)))
+        super().upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+
+    def delete(self, *, where=None, ids=None) -> None:
+        self.ops.append(("delete", list(ids or [])))
+        super().delete(where=where, ids=ids)
+
+
+class _SlowEmbedder(_CountingEmbedder):
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(0.01)
+        return super().embed_many(texts)
+
+
+def test_reused_chunk_ids_survive_parallel_embedding(tmp_path: Path) -> None:
+    _write(tmp_path, "a.md", "A", "\n\n".join(f"# Del {i}\n\nGammel tekst {i}." for i in range(4)))
+    _write(tmp_path, "gone.md", "G", "# G\n\nSkal bort.")
+    store = _LoggingStore()
+    kb_indexer.index_kb(store=store, embedder=_CountingEmbedder(), kb_raw_dir=tmp_path)
+
+    _write(tmp_path, "a.md", "A", "# Del 0\n\nNy tekst 0.\n\n# Del 1\n\nNy tekst 1.")
+    (tmp_path / "gone.md").unlink()
+    for i in range(6):
+        _write(tmp_path, f"ny{i}.md", f"N{i}", f"# N{i}\n\nNytt dokument {i}.")
+    store.ops.clear()
+
+    kb_indexer.index_kb(
+        store=store,
+        embedder=_SlowEmbedder(),
+        kb_raw_dir=tmp_path,
+        incremental=True,
+        embed_workers=3,
+        embed_unit_chunks=1,
+    )
+
+    a_rows = {k: v for k, v in store.rows.items() if v["metadata"]["path"] == (tmp_path / "a.md").as_posix()}
+    assert sorted(row["metadata"]["chunk_index"] for row in a_rows.values()) == [0, 1]
+    assert all("Ny tekst" in row["document"] for row in a_rows.values())
+    assert len(store.rows) == 8
+
+    kinds = [kind for kind, _ in store.ops]
+    assert "delete" in kinds
+    assert kinds.index("delete") > max(i for i, kind in enumerate(kinds) if kind == "upsert")
+    deleted = {chunk_id for kind, ids in store.ops if kind == "delete" for chunk_id in ids}
+    assert not deleted & set(a_rows)
+
+
+def test_chunks_from_older_embedding_format_are_reembedded(tmp_path: Path) -> None:
+    _write(tmp_path, "a.md", "A", "# A\n\nInnhold.")
+    store = _FakeStore()
+    embedder = _CountingEmbedder()
+    kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path)
+    assert {row["metadata"]["embedding_format"] for row in store.rows.values()} == {"|normalized=1"}
+
+    # Chunks written before vectors were normalized carry no format.
+    for row in store.rows.values():
+        row["metadata"].pop("embedding_format")
+    embedder.calls = 0
+    stats = kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+    assert stats["updated_files"] == 1
+    assert embedder.calls == 1
+
+    embedder.model = "annen-modell"
+    embedder.calls = 0
+    kb_indexer.index_kb(store=store, embedder=embedder, kb_raw_dir=tmp_path, incremental=True)
+    assert embedder.calls == 1
+    assert {row["metadata"]["embedding_format"] for row in store.rows.values()} == {"annen-modell|normalized=1"}
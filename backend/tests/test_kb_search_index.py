@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.kb import kb_search_index
+from app.kb.kb_catalog import KbCatalog
+from app.kb.kb_search_index import KbSearchIndex
+
+
+def _write(root: Path, rel: str, title: str, category: str, body: str) -> None:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f'---\ntitle: "{title}"\ncategory: "{category}"\n---\n\n{body}\n', encoding="utf-8")
+
+
+def _kb(root: Path) -> None:
+    _write(root, "pumpe.md", "Pumpe vedlikehold", "Vedlikehold", "Smør pumpe lager hver uke. Sjekk pumpe tetning.")
+    _write(root, "verneutstyr.md", "Verneutstyr", "Sikkerhet", "Bruk hjelm og vernebriller. Pumpe området er merket.")
+    _write(root, "avfall.md", "Avfall", "Miljø", "Sorter avfall i riktige containere.")
+
+
+def test_bm25_ranks_and_filters_by_category(tmp_path: Path) -> None:
+    kb = tmp_path / "kb"
+    _kb(kb)
+    index = KbSearchIndex(tmp_path / "idx.sqlite3", catalog=KbCatalog(root=lambda: kb, refresh_interval_s=0))
+
+    hits = index.search("pumpe tetning", limit=5)
+    assert [h.kb_path for h in hits] == ["pumpe.md", "verneutstyr.md"]
+    assert hits[0].score > hits[1].score
+
+    filtered = index.search("pumpe", category="Sikkerhet", limit=5)
+    assert [h.kb_path for h in filtered] == ["verneutstyr.md"]
+    assert index.search("ukjentord") == []
+
+
+def test_index_updates_incrementally_and_persists(tmp_path: Path, monkeypatch) -> None:
+    kb = tmp_path / "kb"
+    _kb(kb)
+    catalog = KbCatalog(root=lambda: kb, refresh_interval_s=0)
+    index = KbSearchIndex(tmp_path / "idx.sqlite3", catalog=catalog)
+    assert index.search("avfall")
+
+    tokenized: list[str] = []
+    original = kb_search_index._doc_terms
+
+    def counting(entry):
+        tokenized.append(entry.kb_path)
+        return original(entry)
+
+    monkeypatch.setattr(kb_search_index, "_doc_terms", counting)
+
+    _write(kb, "avfall.md", "Avfall", "Miljø", "Kildesortering av spesialavfall.")
+    (kb / "verneutstyr.md").unlink()
+    catalog.invalidate()
+
+    assert [h.kb_path for h in index.search("kildesortering")] == ["avfall.md"]
+    assert index.search("hjelm") == []
+    assert tokenized == ["avfall.md"]
+
+    tokenized.clear()
+    reloaded = KbSearchIndex(tmp_path / "idx.sqlite3", catalog=KbCatalog(root=lambda: kb, refresh_interval_s=0))
+    assert [h.kb_path for h in reloaded.search("kildesortering")] == ["avfall.md"]
+    assert tokenized == []
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from app.kb.kb_catalog import KbCatalog
+from app.kb.similarity import minhash_signature, shingle_hashes, shingles, tokenize_for_similarity
+from app.kb.similarity_index import KbSimilarityIndex
+
+
+_WORDS = (
+    "pumpe ventil tetning lager smøring kontroll rutine operatør skift anlegg nikkel raffineri "
+    "elektrolyse celle anode katode strøm spenning temperatur trykk alarm logg vernerunde"
+).split()
+
+
+def _text(seed: int, n: int = 400) -> str:
+    rng = np.random.default_rng(seed)
+    return " ".join(rng.choice(_WORDS, size=n))
+
+
+def _write(root: Path, rel: str, title: str, body: str) -> None:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f'---\ntitle: "{title}"\n---\n\n{body}\n', encoding="utf-8")
+
+
+def test_rolling_shingles_match_legacy_blake2b_structure() -> None:
+    import hashlib
+
+    tokens = tokenize_for_similarity(_text(5, n=3000))
+    legacy = shingle_hashes(tokens, mode="blake2b")
+    rolling = shingle_hashes(tokens, mode="rolling")
+    assert rolling.dtype == np.uint64
+    assert rolling.size == legacy.size == len({" ".join(tokens[i : i + 5]) for i in range(len(tokens) - 4)})
+
+    first = int.from_bytes(hashlib.blake2b(" ".join(tokens[:5]).encode("utf-8"), digest_size=8).digest(), "big")
+    assert first in set(legacy.tolist())
+
+    capped = shingle_hashes(tokens, mode="rolling", max_shingles=10)
+    assert set(capped.tolist()) == set(shingle_hashes(tokens[:14], mode="rolling").tolist())
+    assert shingle_hashes(tokens[:4]).size == 0
+
+
+def test_minhash_estimates_jaccard() -> None:
+    a = shingles(tokenize_for_similarity(_text(1)))
+    b = set(list(a)[: len(a) // 2]) | shingles(tokenize_for_similarity(_text(2)))
+    exact = len(a & b) / len(a | b)
+    estimate = float(np.mean(minhash_signature(a) == minhash_signature(b)))
+    assert abs(exact - estimate) < 0.12
+
+
+def test_lsh_finds_near_duplicates_and_skips_unrelated(tmp_path: Path) -> None:
+    kb = tmp_path / "kb"
+    base = _text(10)
+    _write(kb, "original.md", "Original", base)
+    for i in range(20):
+        _write(kb, f"other-{i}.md", f"Annet {i}", _text(100 + i))
+
+    catalog = KbCatalog(root=lambda: kb, refresh_interval_s=0)
+    index = KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog, exact_max_docs=0)
+
+    draft = "Original\n\n" + base + " ny setning på slutten"
+    index.sync()
+    candidates = index.candidates(minhash_signature(shingles(tokenize_for_similarity(draft))))
+    assert "original.md" in candidates
+    assert len(candidates) < 5
+
+    matches = index.find_similar(draft, limit=3)
+    assert matches[0].kb_path == "original.md"
+    assert matches[0].title == "Original"
+    assert matches[0].coverage_new > 0.9
+
+    assert index.find_similar(draft, exclude_kb_path="original.md") == []
+
+
+def test_index_follows_kb_changes(tmp_path: Path) -> None:
+    kb = tmp_path / "kb"
+    text = _text(7)
+    _write(kb, "a.md", "A", text)
+    catalog = KbCatalog(root=lambda: kb, refresh_interval_s=0)
+    index = KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog, exact_max_docs=0)
+    assert [m.kb_path for m in index.find_similar(text)] == ["a.md"]
+
+    (kb / "a.md").unlink()
+    _write(kb, "b.md", "B", text)
+    catalog.invalidate()
+    assert [m.kb_path for m in index.find_similar(text)] == ["b.md"]
+
+    reloaded = KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog, exact_max_docs=0)
+    assert [m.kb_path for m in reloaded.find_similar(text)] == ["b.md"]
+
+
+def test_exact_comparison_uses_cached_shingles(tmp_path: Path, monkeypatch) -> None:
+    from app.kb import similarity_index
+
+    kb = tmp_path / "kb"
+    text = _text(3)
+    _write(kb, "a.md", "A", text)
+    _write(kb, "b.md", "B", _text(4))
+    catalog = KbCatalog(root=lambda: kb, refresh_interval_s=0)
+    KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog).sync()
+
+    def fail(entry):
+        raise AssertionError(f"{entry.kb_path} should not be re-tokenized")
+
+    monkeypatch.setattr(similarity_index, "_shingles_for_entry", fail)
+    reloaded = KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog)
+    matches = reloaded.find_similar(text)
+    assert matches[0].kb_path == "a.md"
+    assert matches[0].coverage_new == 1.0
+
+
+def test_short_text_contained_in_long_document_is_found(tmp_path: Path) -> None:
+    kb = tmp_path / "kb"
+    short = _text(20, n=150)
+    long_body = _text(21, n=1500) + " " + short + " " + _text(22, n=1500)
+    _write(kb, "handbok.md", "Håndbok", long_body)
+    for i in range(20):
+        _write(kb, f"other-{i}.md", f"Annet {i}", _text(200 + i))
+
+    catalog = KbCatalog(root=lambda: kb, refresh_interval_s=0)
+    index = KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog, exact_max_docs=0)
+    index.sync()
+
+    # Jaccard is ~0.05, too low for the MinHash bands alone.
+    signature = minhash_signature(shingles(tokenize_for_similarity(short)))
+    assert "handbok.md" not in index.candidates(signature)
+
+    matches = index.find_similar(short)
+    assert [m.kb_path for m in matches] == ["handbok.md"]
+    assert matches[0].coverage_new == 1.0
+    assert matches[0].jaccard < 0.1
+
+    reloaded = KbSimilarityIndex(tmp_path / "sim.sqlite3", catalog=catalog, exact_max_docs=0)
+    assert [m.kb_path for m in reloaded.find_similar(short)] == ["handbok.md"]
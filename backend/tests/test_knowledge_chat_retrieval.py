@@ -4,7 +4,7 @@ import os
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 from fastapi.testclient import TestClient
 
@@ -47,7 +47,7 @@ class KnowledgeChatRetrievalTests(unittest.TestCase):
         with (
             patch("app.routers.ai_agent._vector_retrieve", return_value=([], [], "Vector disabled")),
             patch("app.kb.kb_reader.search_kb", return_value=lexical_docs),
-            patch("app.routers.ai_agent.llm.generate", return_value="Svar fra testmodell"),
+            patch("app.routers.ai_agent.llm.agenerate", new=AsyncMock(return_value="Svar fra testmodell")),
         ):
             response = self.client.post(
                 "/agent/knowledge-chat",
@@ -80,7 +80,7 @@ class KnowledgeChatRetrievalTests(unittest.TestCase):
         with (
             patch("app.routers.ai_agent._vector_retrieve", return_value=(vector_sources, vector_excerpts, None)),
             patch("app.kb.kb_reader.search_kb", return_value=[]),
-            patch("app.routers.ai_agent.llm.generate", return_value="Svar med vector-kilde"),
+            patch("app.routers.ai_agent.llm.agenerate", new=AsyncMock(return_value="Svar med vector-kilde")),
         ):
             response = self.client.post(
                 "/agent/knowledge-chat",
@@ -93,6 +93,133 @@ class KnowledgeChatRetrievalTests(unittest.TestCase):
         self.assertGreaterEqual(len(body["sources"]), 1)
         self.assertEqual(body["sources"][0]["retrievalMethod"], "vector")
 
+    def test_knowledge_chat_stream_emits_sources_tokens_and_final_answer(self) -> None:
+        import json
+
+        from app.kb.kb_reader import KbDoc
+
+        login = self.client.post("/api/auth/login", json={"email": "viewer@glencore.com", "password": "viewer123"})
+        self.assertEqual(login.status_code, 200, login.text)
+        headers = {"Authorization": f"Bearer {login.json()['accessToken']}"}
+
+        lexical_docs = [
+            KbDoc(
+                kb_path="test-artifacts/stream.md",
+                title="Stream Test",
+                category="Sikkerhet",
+                author="Test",
+                date="2026-03-31",
+                content="# Stream Test\n\nInnhold.",
+            )
+        ]
+
+        async def fake_stream(prompt: str):
+            for fragment in ["Svar ", "fra ", "strøm"]:
+                yield fragment
+
+        with (
+            patch("app.routers.ai_agent._vector_retrieve", return_value=([], [], "Vector disabled")),
+            patch("app.kb.kb_reader.search_kb", return_value=lexical_docs),
+            patch("app.routers.ai_agent.llm.agenerate_stream", new=fake_stream),
+        ):
+            response = self.client.post(
+                "/agent/knowledge-chat/stream",
+                headers=headers,
+                json={"message": "Hva sier strømmen?", "category": "Sikkerhet"},
+            )
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = []
+        for block in response.text.strip().split("\n\n"):
+            name_line, data_line = block.split("\n", 1)
+            events.append((name_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+
+        self.assertEqual([name for name, _ in events], ["sources", "token", "token", "token", "done"])
+        self.assertEqual(events[0][1][0]["id"], "test-artifacts/stream.md")
+        self.assertEqual(events[-1][1]["answer"], "Svar fra strøm")
+
+    def test_vector_clients_are_created_off_the_event_loop(self) -> None:
+        import asyncio
+
+        created: list[str] = []
+
+        def off_loop(name: str):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                created.append(name)
+            else:
+                raise AssertionError(f"{name} was created on the event loop")
+
+        class _Store:
+            def query(self, *, query_embedding, n_results):
+                return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+        class _Embedder:
+            def embed_text(self, text):
+                raise AssertionError("the async routes must embed with aembed_text")
+
+            async def aembed_text(self, text):
+                return [1.0, 0.0]
+
+        def get_store():
+            off_loop("store")
+            return _Store()
+
+        def get_embedder():
+            off_loop("embedder")
+            return _Embedder()
+
+        login = self.client.post("/api/auth/login", json={"email": "expert@glencore.com", "password": "admin123"})
+        headers = {"Authorization": f"Bearer {login.json()['accessToken']}"}
+        with (
+            patch("app.vector_store.runtime.get_vector_store", new=get_store),
+            patch("app.vector_store.runtime.get_embedder", new=get_embedder),
+            patch("app.kb.kb_reader.search_kb", return_value=[]),
+            patch("app.routers.ai_agent.llm.agenerate", new=AsyncMock(return_value="Svar")),
+        ):
+            search = self.client.get("/vector/search", params={"q": "pumpe"}, headers=headers)
+            chat = self.client.post(
+                "/agent/knowledge-chat",
+                json={"message": "Hva sier rutinen om pumper?"},
+                headers=headers,
+            )
+
+        self.assertEqual(search.status_code, 200, search.text)
+        self.assertEqual(chat.status_code, 200, chat.text)
+        self.assertEqual(created, ["store", "embedder", "embedder", "store"])
+
+    def test_auth_runs_off_the_event_loop_in_async_routes(self) -> None:
+        import asyncio
+
+        from app.routers import ai_agent, vector_search
+
+        checked: list[str] = []
+
+        def off_loop(name: str, result):
+            def check(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    checked.append(name)
+                    return result
+                raise AssertionError(f"{name} ran on the event loop")
+
+            return check
+
+        with (
+            patch.object(ai_agent, "_require_expert_user", new=off_loop("revise", "expert")),
+            patch.object(ai_agent, "_require_authenticated_user", new=off_loop("chat", ("expert", "expert"))),
+            patch.object(vector_search, "_require_expert_user", new=off_loop("search", "expert")),
+            patch("app.routers.ai_agent.llm.agenerate", new=AsyncMock(return_value="Ingen endringer.")),
+        ):
+            self.client.post("/agent/revise", json={"document": "# A\n\nTekst.", "instruction": "Kort"})
+            self.client.post("/agent/knowledge-chat", json={"message": ""})
+            self.client.get("/vector/search", params={"q": " "})
+
+        self.assertEqual(checked, ["revise", "chat", "search"])
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
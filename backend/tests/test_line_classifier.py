@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from app.document_processing import line_classifier as lc
+from app.services import revised_suggestion as rs
+
+
+def test_classify_line_kinds() -> None:
+    cases = {
+        "": lc.BLANK,
+        "   ": lc.BLANK,
+        "Authorized licensed use limited to: NTNU. Downloaded on May 01,2023": lc.NOISE,
+        "Page 12": lc.PAGE_NUMBER,
+        "  1234 ": lc.PAGE_NUMBER,
+        "12": lc.NUMBER,
+        "3.2": lc.NUMBER,
+        "Innholdsfortegnelse": lc.TOC_HEADING,
+        "Table of contents": lc.TOC_HEADING,
+        "1 Helse og sikkerhet i PA-anlegget 2": lc.TOC,
+        "1.2 Farlige stoffer iv": lc.TOC,
+        "2.1 Utslippskrav for anlegget": lc.HEADING,
+        "Pumpen skal kontrolleres hver uke.": lc.CONTENT,
+    }
+    for line, kind in cases.items():
+        assert lc.classify_line(line) == kind, line
+
+
+def test_strip_page_marker() -> None:
+    assert lc.strip_page_marker("1.2 Farlige stoffer  12 ") == "1.2 Farlige stoffer"
+    assert lc.strip_page_marker("3 Innledning iv") == "3 Innledning"
+    assert lc.strip_page_marker("  Ingen sidetall her ") == "Ingen sidetall her"
+
+
+def test_repair_extraction_artifacts_formula_fixes_keep_order() -> None:
+    text = "Tilsett H 2 SO 4 og Na OH. Mål p H ved ca 25 m V, vedca 2 min.fraCO2 og H 2 O 2."
+
+    assert rs.repair_extraction_artifacts(text) == (
+        "Tilsett H2SO4 og NaOH. Mål pH ved ca 25 mV, ved ca 2 min.fra CO2 og H2 O2."
+    )
+
+
+def test_strip_pdf_noise_lines_uses_line_kinds() -> None:
+    text = "Innledning\n\n\n\nPage 3\nRestrictions apply.\n1234\n12\nPumpen skal kontrolleres."
+
+    assert rs.strip_pdf_noise_lines(text) == "Innledning\n\n12\nPumpen skal kontrolleres."
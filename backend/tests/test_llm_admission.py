@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.ai_services.llm_admission import LlmAdmissionController, LlmOverloadedError
+
+
+def _wait_for(predicate, timeout_s: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_waiters_are_admitted_by_priority_and_queue_is_bounded() -> None:
+    controller = LlmAdmissionController(max_concurrent=1, max_queue=2)
+    release = threading.Event()
+    order: list[str] = []
+
+    def call(name: str, priority: int) -> None:
+        with controller.slot(priority):
+            order.append(name)
+            if name == "first":
+                release.wait(2)
+
+    threads = [threading.Thread(target=call, args=("first", 10))]
+    threads[0].start()
+    _wait_for(lambda: controller.stats()["in_flight"] == 1)
+
+    for name, priority in (("bulk", 10), ("interactive", 0)):
+        t = threading.Thread(target=call, args=(name, priority))
+        t.start()
+        threads.append(t)
+    _wait_for(lambda: controller.stats()["queued"] == 2)
+
+    with pytest.raises(LlmOverloadedError):
+        with controller.slot(0):
+            pass
+
+    release.set()
+    for t in threads:
+        t.join(2)
+    assert order == ["first", "interactive", "bulk"]
+
+    stats = controller.stats()
+    assert stats["rejected"] == 1
+    assert stats["admitted"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_queue_timeout_raises_overloaded() -> None:
+    controller = LlmAdmissionController(max_concurrent=1, queue_timeout_s=0.05)
+    with controller.slot():
+        with pytest.raises(LlmOverloadedError):
+            with controller.slot():
+                pass
+    assert controller.stats()["timed_out"] == 1
+
+
+def test_identical_requests_are_coalesced() -> None:
+    controller = LlmAdmissionController(max_concurrent=4)
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[int] = []
+    results: list[str] = []
+
+    def generate() -> str:
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return "svar"
+
+    leader = threading.Thread(target=lambda: results.append(controller.run("k", generate)))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(controller.run("k", generate))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    _wait_for(lambda: controller.stats()["coalesced"] == 3)
+
+    release.set()
+    for t in [leader, *followers]:
+        t.join(2)
+    assert calls == [1]
+    assert results == ["svar"] * 4
+
+
+def test_async_waiters_share_slots_with_threads() -> None:
+    import asyncio
+
+    controller = LlmAdmissionController(max_concurrent=1)
+    release = threading.Event()
+
+    def hold() -> None:
+        with controller.slot():
+            release.wait(2)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    _wait_for(lambda: controller.stats()["in_flight"] == 1)
+
+    async def main() -> list[str]:
+        calls: list[int] = []
+
+        async def generate() -> str:
+            calls.append(1)
+            return "ok"
+
+        tasks = [asyncio.create_task(controller.arun("k", generate)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        stats = controller.stats()
+        assert stats["queued"] == 1
+        assert stats["coalesced"] == 1
+
+        # The thread's slot is handed straight to the waiting task.
+        release.set()
+        results = await asyncio.gather(*tasks)
+        assert calls == [1]
+        return results
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == ["ok", "ok"]
+    holder.join(2)
+    assert controller.stats()["in_flight"] == 0
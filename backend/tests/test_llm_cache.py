@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.ai_services.ollama_provider import OllamaProvider
+
+
+@pytest.fixture()
+def provider(tmp_path: Path, monkeypatch) -> OllamaProvider:
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    return OllamaProvider()
+
+
+def test_deterministic_generations_are_cached(provider: OllamaProvider, monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fake(prompt: str, options):
+        calls.append(prompt)
+        return f"svar {len(calls)}"
+
+    monkeypatch.setattr(provider, "_generate_uncoordinated", fake)
+
+    assert provider.generate("spørsmål") == "svar 1"
+    assert provider.generate("spørsmål") == "svar 1"
+    assert provider.generate("spørsmål", options={"num_predict": 256}) == "svar 2"
+    # Opt-out and sampling (temperature > 0) always reach the model.
+    assert provider.generate("spørsmål", cache=False) == "svar 3"
+    assert provider.generate("spørsmål", options={"temperature": 0.7}) == "svar 4"
+    assert provider.generate("spørsmål", options={"temperature": 0.7}) == "svar 5"
+    assert len(calls) == 5
+
+
+def test_duplicate_upload_reuses_previous_generation(tmp_path: Path, monkeypatch) -> None:
+    from app.routers import documents
+    from app.workflow_db.db import get_connection, init_db
+
+    monkeypatch.setenv("WORKFLOW_DB_PATH", str(tmp_path / "workflow.sqlite3"))
+    init_db()
+
+    runs: list[str] = []
+
+    seen_options: list[dict] = []
+
+    def fake_generate(*, agent, original_filename, extracted_text, llm_options):
+        runs.append(original_filename)
+        seen_options.append(llm_options)
+        return '---\ntitle: "Pumpe"\n---\n\n# Pumpe\n', {"fallback_used": 0, "reason": None, "error": None}
+
+    monkeypatch.setattr(documents, "generate_revised_suggestion", fake_generate)
+
+    with get_connection() as conn:
+        for sid in ("s1", "s2"):
+            conn.execute(
+                "INSERT INTO uploads (upload_id, original_filename, content_type, size_bytes, sha256, stored_path) "
+                "VALUES (?, 'pumpe.txt', 'text/plain', 1, 'x', 'x')",
+                (f"u-{sid}",),
+            )
+            conn.execute(
+                "INSERT INTO suggestions (suggestion_id, upload_id, suggestion_json) VALUES (?, ?, 'fallback')",
+                (sid, f"u-{sid}"),
+            )
+
+    documents._generate_suggestion_async("s1", "pumpe.txt", "samme tekst")
+    documents._generate_suggestion_async("s2", "pumpe-kopi.txt", "samme tekst")
+
+    assert runs == ["pumpe.txt"]
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT suggestion_json, generation_status, generation_reason FROM suggestions WHERE suggestion_id = 's2'"
+        ).fetchone()
+    assert "# Pumpe" in row["suggestion_json"]
+    assert row["generation_status"] == "succeeded"
+    assert row["generation_reason"] == "cached_generation"
+
+    documents._generate_suggestion_async("s2", "pumpe-kopi.txt", "samme tekst", use_cache=False)
+    assert runs == ["pumpe.txt", "pumpe-kopi.txt"]
+    # Regeneration also bypasses cached LLM responses.
+    assert seen_options == [{}, {"cache": False}]
+
+
+def test_agent_cache_opt_out_is_not_sent_as_ollama_option(provider: OllamaProvider, monkeypatch) -> None:
+    from app.ai_services.agent_service import AgentService
+
+    calls: list[dict] = []
+
+    def fake(prompt: str, options):
+        calls.append(dict(options or {}))
+        return f"svar {len(calls)}"
+
+    monkeypatch.setattr(provider, "_generate_uncoordinated", fake)
+    agent = AgentService(provider)
+
+    assert agent.process_document("Strukturer", "tekst", llm_options={"temperature": 0}) == "svar 1"
+    assert agent.process_document("Strukturer", "tekst", llm_options={"temperature": 0}) == "svar 1"
+    assert agent.process_document("Strukturer", "tekst", llm_options={"temperature": 0, "cache": False}) == "svar 2"
+    assert calls == [{"temperature": 0}, {"temperature": 0}]
+
+
+def test_fallback_regeneration_job_skips_caches(monkeypatch) -> None:
+    from app.routers import workflow
+
+    queued: list[dict] = []
+    monkeypatch.setattr(workflow, "active_job_count", lambda lane: 0)
+    monkeypatch.setattr(workflow, "enqueue_job", lambda kind, payload, **kw: queued.append(payload))
+
+    workflow._schedule_fallback_regeneration(suggestion_id="s1", upload_id="u1", original_filename="a.txt")
+
+    assert queued and queued[0]["use_cache"] is False
+
+
+def test_async_generation_reads_and_writes_the_cache_off_the_event_loop(provider: OllamaProvider, monkeypatch) -> None:
+    import asyncio
+    import threading
+
+    from app.ai_services.llm_cache import get_llm_response_cache
+
+    cache = get_llm_response_cache()
+    cache_threads: list[int] = []
+    for name in ("get", "put"):
+
+        def recorded(*args, _original=getattr(cache, name), **kwargs):
+            cache_threads.append(threading.get_ident())
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(cache, name, recorded)
+
+    calls: list[str] = []
+
+    async def fake(prompt: str, options):
+        calls.append(prompt)
+        return "svar"
+
+    monkeypatch.setattr(provider, "_agenerate_uncoordinated", fake)
+
+    async def run():
+        first = await provider.agenerate("spørsmål")
+        streamed = [fragment async for fragment in provider.agenerate_stream("spørsmål")]
+        return first, streamed
+
+    assert asyncio.run(run()) == ("svar", ["svar"])
+    assert calls == ["spørsmål"]
+    # get (miss), put, get (hit) - none of them on the thread running the event loop.
+    assert len(cache_threads) == 3
+    assert threading.get_ident() not in cache_threads
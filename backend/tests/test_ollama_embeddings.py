@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.vector_store.ollama_embeddings import OllamaEmbeddingClient
+
+
+class _StubOllama:
+    """Minimal local stand-in for the Ollama embedding endpoints."""
+
+    def __init__(self, *, batch_supported: bool) -> None:
+        self.batch_supported = batch_supported
+        self.requests: list[tuple[str, dict]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_args) -> None:
+                pass
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append((self.path, body))
+
+                if self.path == "/api/embed" and stub.batch_supported:
+                    self._reply(200, {"embeddings": [[float(len(t)), 0.0] for t in body["input"]]})
+                elif self.path == "/api/embeddings":
+                    self._reply(200, {"embedding": [0.0, float(len(body["prompt"]))]})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def _reply(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "_StubOllama":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_embed_many_uses_batch_endpoint() -> None:
+    with _StubOllama(batch_supported=True) as stub:
+        client = OllamaEmbeddingClient(base_url=stub.base_url, model="m", batch_size=2)
+        out = client.embed_many(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert [path for path, _ in stub.requests] == ["/api/embed"] * 3
+    assert [body["input"] for _, body in stub.requests] == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert out == [[1.0, 0.0]] * 5
+
+
+def test_embed_many_falls_back_to_legacy_endpoint() -> None:
+    with _StubOllama(batch_supported=False) as stub:
+        client = OllamaEmbeddingClient(base_url=stub.base_url, model="m", batch_size=8)
+        out = client.embed_many(["a", "bb", "ccc"])
+        again = client.embed_text("dddd")
+
+    paths = [path for path, _ in stub.requests]
+    # The batch endpoint is probed once, then every item goes to /api/embeddings.
+    assert paths == ["/api/embed", "/api/embeddings", "/api/embeddings", "/api/embeddings", "/api/embeddings"]
+    assert out == [[0.0, 1.0]] * 3
+    assert again == [0.0, 1.0]
+
+
+def test_embed_many_rejects_empty_text() -> None:
+    client = OllamaEmbeddingClient(base_url="http://127.0.0.1:9", model="m")
+    with pytest.raises(ValueError):
+        client.embed_many(["ok", "  "])
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.document_processing import parse_cache, parse_pool
+from app.document_processing.document_parsing import parse_document
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("PARSE_CACHE_PATH", str(tmp_path / "parsed_pages.sqlite3"))
+    monkeypatch.setenv("PARSE_WORKERS", "1")
+    parse_pool.shutdown_parse_pool()
+    yield
+    parse_pool.shutdown_parse_pool()
+
+
+def _write_pdf(path: Path) -> None:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=11)
+    for i in range(3):
+        pdf.add_page()
+        pdf.multi_cell(0, 6, f"Side {i + 1}: bytt filter og kontroller tetning.")
+    pdf.output(str(path))
+
+
+def test_second_parse_of_same_bytes_uses_cached_pages(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "filter.pdf"
+    _write_pdf(path)
+
+    first = parse_pool.parse_document_in_pool("filter.pdf", path, content_sha256="a" * 64, timeout_s=60)
+    assert first == parse_document("filter.pdf", path)
+    assert len(parse_cache.cached_pages(".pdf", "a" * 64)) == 3
+
+    def no_worker(*args, **kwargs):
+        raise AssertionError("cached document was parsed again")
+
+    monkeypatch.setattr(parse_pool, "run_in_parse_pool", no_worker)
+    monkeypatch.setattr(parse_pool, "_run_calls", no_worker)
+    assert parse_pool.parse_document_in_pool("kopi.pdf", path, content_sha256="a" * 64) == first
+
+
+def test_purge_removes_only_old_extractor_versions() -> None:
+    cache = parse_cache.get_parse_cache()
+    parse_cache.store_pages(".docx", "b" * 64, ["Avsnitt"])
+    cache.put("pdf:0:" + "c" * 64, b"old")
+
+    assert parse_cache.purge_stale_parse_cache() == 1
+    assert parse_cache.cached_pages(".docx", "b" * 64) == ["Avsnitt"]
+    assert cache.get("pdf:0:" + "c" * 64) is None
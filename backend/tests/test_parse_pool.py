@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from app.document_processing import parse_pool
+from app.document_processing.parse_pool import ParseTimeoutError, parse_document_in_pool, run_in_parse_pool
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool(monkeypatch):
+    monkeypatch.setenv("PARSE_WORKERS", "1")
+    parse_pool.shutdown_parse_pool()
+    yield
+    parse_pool.shutdown_parse_pool()
+
+
+def test_parses_file_in_worker_process(tmp_path: Path) -> None:
+    path = tmp_path / "notat.txt"
+    path.write_bytes("Første   linje\n\nandre linje".encode("utf-8"))
+
+    assert parse_document_in_pool("notat.txt", path, timeout_s=60) == "Første linje andre linje"
+
+
+def test_timeout_restarts_pool() -> None:
+    # Warm up so the timeout below measures the call, not process start-up.
+    assert run_in_parse_pool(abs, -1, timeout_s=60) == 1
+
+    with pytest.raises(ParseTimeoutError):
+        run_in_parse_pool(time.sleep, 30, timeout_s=0.5)
+
+    assert run_in_parse_pool(abs, -2, timeout_s=60) == 2
+
+
+def _write_pdf(path: Path, pages: int) -> None:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=11)
+    for i in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 6, f"Side {i + 1}. Kontroller pumpe {i} og noter trykk og temperatur i loggen.")
+    pdf.output(str(path))
+
+
+def test_long_pdf_is_split_into_page_ranges(tmp_path: Path, monkeypatch) -> None:
+    from app.document_processing.document_parsing import parse_document
+
+    monkeypatch.setenv("PARSE_WORKERS", "2")
+    monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "10")
+    path = tmp_path / "manual.pdf"
+    _write_pdf(path, 20)
+
+    assert parse_pool._page_ranges(20) == [(0, 8), (8, 16), (16, 20)]
+    text = parse_document_in_pool("manual.pdf", path, timeout_s=120)
+    assert text == parse_document("manual.pdf", path)
+    assert text.index("Side 1.") < text.index("Side 9.") < text.index("Side 20.")
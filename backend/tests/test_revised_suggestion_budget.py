@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import re
+
+from app.services import revised_suggestion as rs
+
+
+def _document() -> str:
+    return "\n\n".join(
+        f"Pumpe {n} skal kontrolleres hver uke av operatøren, og avvik i trykk eller temperatur skal føres i loggen."
+        for n in range(1, 40)
+    )
+
+
+def _thick_payload(source: str) -> str:
+    sentences = re.findall(r"Pumpe \d+ skal kontrolleres[^.]*\.", source)
+
+    def bullets(start: int, count: int) -> list[str]:
+        return [f"{s} (KILDE: \"{s[:60]}\")" for s in sentences[start : start + count]]
+
+    return json.dumps(
+        {
+            "title": "Kontroll av pumper",
+            "tags": ["vedlikehold", "pumper"],
+            "category": "Vedlikehold",
+            "review_status": "pending",
+            "confidence_score": 0.8,
+            "sections": {
+                "Kort sammendrag": bullets(0, 4),
+                "Viktigste punkter": bullets(4, 8),
+                "Kapittelvis sammendrag": bullets(12, 4),
+                "Relevante detaljer": bullets(16, 4),
+                "Eventuelle tiltak / anbefalinger": bullets(20, 2),
+            },
+        },
+        ensure_ascii=False,
+    )
+
+
+class _Agent:
+    def __init__(self, answer) -> None:
+        self.answer = answer
+        self.calls: list[tuple[str, str, dict]] = []
+
+    def process_document(self, system_prompt, content, *, max_input_chars=None, llm_options=None):
+        self.calls.append((system_prompt, content, dict(llm_options or {})))
+        return self.answer(content)
+
+
+def test_valid_payload_exits_after_first_call() -> None:
+    agent = _Agent(_thick_payload)
+
+    _text, diag = rs.generate_revised_suggestion(
+        agent=agent, original_filename="pumper.txt", extracted_text=_document(), llm_options={}
+    )
+
+    assert diag["fallback_used"] == 0
+    assert len(agent.calls) == 1
+    stages = diag["pipeline"]["stages"]
+    assert [s["stage"] for s in stages] == ["initial"]
+    assert stages[0]["outcome"] == "ok"
+    assert stages[0]["ms"] >= 0
+
+
+def test_stages_share_source_prefix_and_repair_is_parsed() -> None:
+    answers = iter(["ikke json", None])
+
+    def answer(content: str) -> str:
+        value = next(answers, None)
+        return value if value is not None else _thick_payload(content)
+
+    agent = _Agent(answer)
+
+    _text, diag = rs.generate_revised_suggestion(
+        agent=agent, original_filename="pumper.txt", extracted_text=_document(), llm_options={}
+    )
+
+    assert diag["fallback_used"] == 0
+    assert [s["stage"] for s in diag["pipeline"]["stages"]] == ["initial", "repair"]
+    assert {call[0] for call in agent.calls} == {rs._STRUCTURED_JSON_PROMPT}
+    prefix = agent.calls[0][1].split("---\n\n")[0]
+    assert "Pumpe 1 skal kontrolleres" in prefix
+    assert all(call[1].startswith(prefix) for call in agent.calls)
+    assert "ikke json" in agent.calls[1][1]
+
+
+def test_call_budget_stops_pipeline_with_fallback(monkeypatch) -> None:
+    monkeypatch.setenv("SUGGESTION_MAX_LLM_CALLS", "2")
+    agent = _Agent(lambda _content: "ikke json")
+
+    _text, diag = rs.generate_revised_suggestion(
+        agent=agent, original_filename="pumper.txt", extracted_text=_document(), llm_options={}
+    )
+
+    assert len(agent.calls) == 2
+    assert diag["fallback_used"] == 1
+    assert diag["reason"] == "llm_budget_exhausted"
+    pipeline = diag["pipeline"]
+    assert pipeline["exhausted"] == "calls"
+    assert pipeline["stages"][-1] == {"stage": "retry", "outcome": "skipped:budget_calls"}
+
+
+def test_token_budget_skips_stage_that_does_not_fit(monkeypatch) -> None:
+    monkeypatch.setenv("SUGGESTION_TOKEN_BUDGET", "100")
+    agent = _Agent(_thick_payload)
+
+    _text, diag = rs.generate_revised_suggestion(
+        agent=agent, original_filename="pumper.txt", extracted_text=_document(), llm_options={}
+    )
+
+    assert agent.calls == []
+    assert diag["reason"] == "llm_budget_exhausted"
+    assert diag["pipeline"]["exhausted"] == "tokens"
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+
+from app.services import revised_suggestion as rs
+
+
+def _long_document(sections: int = 10) -> str:
+    parts = []
+    for n in range(1, sections + 1):
+        parts.append(f"{n} Vedlikehold av anlegg {n}")
+        for k in range(60):
+            parts.append(
+                f"Pumpe {n}-{k} skal kontrolleres hver uke av operatøren på skiftlag {n}, "
+                f"og avvik i trykk eller temperatur skal føres i loggen for anlegg {n}."
+            )
+    return "\n\n".join(parts)
+
+
+class _ChunkAgent:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, int]] = []
+        self._lock = threading.Lock()
+
+    def process_document(self, system_prompt, content, *, max_input_chars=None, llm_options=None):
+        with self._lock:
+            self.calls.append((system_prompt, len(content)))
+        if system_prompt is not rs._MAP_CHUNK_PROMPT:
+            return "{}"
+
+        sentences = re.findall(r"Pumpe \d+-\d+ skal kontrolleres[^.]*\.", content)
+
+        def bullet(sentence: str) -> str:
+            return f"{sentence} (KILDE: \"{sentence[:120]}\")"
+
+        return json.dumps(
+            {
+                "title": "Vedlikeholdshåndbok",
+                "tags": ["vedlikehold", "pumper"],
+                "category": "Vedlikehold",
+                "review_status": "pending",
+                "confidence_score": 0.8,
+                "sections": {
+                    "Kort sammendrag": [bullet(sentences[0])],
+                    "Viktigste punkter": [bullet(s) for s in sentences[1:3]],
+                    "Kapittelvis sammendrag": [bullet(sentences[3])],
+                    "Relevante detaljer": [bullet(sentences[4]), "Oppdiktet krav (KILDE: \"finnes ikke i teksten\")"],
+                    "Eventuelle tiltak / anbefalinger": [],
+                },
+            },
+            ensure_ascii=False,
+        )
+
+
+def test_split_into_chunks_prefers_section_headings_and_is_bounded() -> None:
+    text = _long_document(6)
+
+    chunks = rs.split_into_chunks(text, chunk_chars=12000, max_chunks=16)
+    assert all(len(c) <= 12000 for c in chunks)
+    assert sum(1 for c in chunks if re.match(r"^\d+ Vedlikehold av anlegg", c)) >= len(chunks) - 1
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+    limited = rs.split_into_chunks(text, chunk_chars=2000, max_chunks=4)
+    assert len(limited) == 4
+    assert limited[0].startswith("1 Vedlikehold av anlegg 1")
+    assert "anlegg 6." in limited[-1]
+
+
+def test_long_source_is_summarized_chunk_by_chunk() -> None:
+    agent = _ChunkAgent()
+    text = _long_document(12)
+
+    out, diag = rs.generate_revised_suggestion(
+        agent=agent,
+        original_filename="håndbok.pdf",
+        extracted_text=text,
+        llm_options={},
+    )
+
+    map_calls = [size for prompt, size in agent.calls if prompt is rs._MAP_CHUNK_PROMPT]
+    assert diag["fallback_used"] == 0
+    assert diag["map_reduce"]["chunks"] == diag["map_reduce"]["chunks_ok"] == len(map_calls) >= 8
+    assert max(map_calls) <= 12100
+    assert not any(prompt is rs._STRUCTURED_JSON_PROMPT for prompt, _size in agent.calls)
+
+    # Every part of the document is represented, and unsupported bullets are dropped.
+    assert "Pumpe 1-0 skal kontrolleres" in out
+    assert "Pumpe 12-" in out
+    assert "Oppdiktet krav" not in out
+    assert "category: Vedlikehold" in out
+
+
+def test_map_reduce_can_be_disabled() -> None:
+    agent = _ChunkAgent()
+
+    rs.generate_revised_suggestion(
+        agent=agent,
+        original_filename="håndbok.pdf",
+        extracted_text=_long_document(12),
+        llm_options={},
+        map_reduce=False,
+    )
+
+    assert agent.calls[0][0] is rs._STRUCTURED_JSON_PROMPT
+    assert not any(prompt is rs._MAP_CHUNK_PROMPT for prompt, _size in agent.calls)
+
+
+def test_map_phase_is_charged_to_the_suggestion_budget(monkeypatch) -> None:
+    # Room for only a few chunk summaries (each ~4-5k estimated tokens).
+    monkeypatch.setenv("SUGGESTION_TOKEN_BUDGET", "15000")
+    agent = _ChunkAgent()
+
+    _out, diag = rs.generate_revised_suggestion(
+        agent=agent,
+        original_filename="håndbok.pdf",
+        extracted_text=_long_document(12),
+        llm_options={},
+    )
+
+    map_calls = [size for prompt, size in agent.calls if prompt is rs._MAP_CHUNK_PROMPT]
+    mr = diag["map_reduce"]
+    assert 0 < len(map_calls) == diag["pipeline"]["map_calls"] < mr["chunks"]
+    assert mr["chunks_skipped"] == mr["chunks"] - len(map_calls)
+    assert mr["budget_exhausted"] == "tokens"
+    assert diag["pipeline"]["tokens_est"] <= 15000
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+
+class UploadDedupTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp_dir = tempfile.TemporaryDirectory(prefix="workflow-db-")
+        cls._db_path = Path(cls._tmp_dir.name) / "workflow.sqlite3"
+        os.environ["WORKFLOW_DB_PATH"] = str(cls._db_path)
+
+        from app.main import app
+
+        cls._client_cm = TestClient(app)
+        cls.client = cls._client_cm.__enter__()
+
+        login = cls.client.post("/api/auth/login", json={"email": "expert@glencore.com", "password": "admin123"})
+        cls.headers = {"Authorization": f"Bearer {login.json()['accessToken']}"}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._client_cm.__exit__(None, None, None)
+        try:
+            cls._tmp_dir.cleanup()
+        except PermissionError:
+            pass
+
+    def _upload(self, content: bytes, filename: str) -> dict:
+        response = self.client.post(
+            "/documents/upload",
+            headers=self.headers,
+            files={"file": (filename, content, "text/plain")},
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_reupload_shares_blob_text_and_finished_suggestion(self) -> None:
+        from app.routers import documents
+        from app.workflow_db.db import get_connection
+
+        content = f"Prosedyre for smøring av pumpe {uuid.uuid4()}. ".encode("utf-8") * 20
+        with (
+            patch("app.routers.documents.enqueue_job") as enqueue,
+            patch("app.routers.documents.parse_document", wraps=documents.parse_document) as parse,
+        ):
+            first = self._upload(content, "pumpe.txt")
+            self.assertTrue(first["processing"])
+
+            with get_connection() as conn:
+                normalized_sha256 = conn.execute(
+                    "SELECT sha256 FROM normalized_documents WHERE upload_id = ?",
+                    (first["upload_id"],),
+                ).fetchone()["sha256"]
+            documents._store_generation(normalized_sha256, documents.llm_provider.model, "# Ferdig forslag\n", first["suggestion_id"])
+
+            second = self._upload(content, "pumpe-kopi.txt")
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(enqueue.call_count, 1)
+        self.assertFalse(second["processing"])
+        self.assertEqual(second["generation_status"], "succeeded")
+        self.assertIn("# Ferdig forslag", second["structured_draft"])
+
+        with get_connection() as conn:
+            paths = {
+                row["stored_path"]
+                for row in conn.execute(
+                    "SELECT stored_path FROM uploads WHERE upload_id IN (?, ?)",
+                    (first["upload_id"], second["upload_id"]),
+                )
+            }
+        self.assertEqual(len(paths), 1)
+        blob = Path(paths.pop())
+        self.assertEqual(blob.read_bytes(), content)
+        self.assertEqual(blob.suffix, ".txt")
+
+        original = self.client.get(f"/workflow/suggestions/{second['suggestion_id']}/file", headers=self.headers)
+        self.assertEqual(original.status_code, 200, original.text)
+        self.assertEqual(original.content, content)
+
+    def test_pdf_is_parsed_by_background_job(self) -> None:
+        from app.routers import documents
+        from app.workflow_db.db import get_connection
+
+        text = f"Prosedyre for kalibrering av måler {uuid.uuid4()}. " * 20
+        with patch("app.routers.documents.enqueue_job") as enqueue:
+            upload = self._upload(f"%PDF-1.4 {uuid.uuid4()}".encode("utf-8"), "kalibrering.pdf")
+
+            self.assertTrue(upload["processing"])
+            self.assertEqual(upload["generation_status"], "parsing")
+            kind, payload = enqueue.call_args.args
+            self.assertEqual(kind, documents.PARSE_DOCUMENT_JOB)
+            self.assertEqual(enqueue.call_args.kwargs["lane"], "parse")
+
+            with patch("app.routers.documents.parse_document_in_pool", return_value=text):
+                documents._run_parse_document_job(payload)
+
+            self.assertEqual(enqueue.call_args.args[0], documents.GENERATE_SUGGESTION_JOB)
+
+        suggestion = self.client.get(f"/workflow/suggestions/{upload['suggestion_id']}", headers=self.headers).json()
+        self.assertEqual(suggestion["generation_status"], "queued")
+        with get_connection() as conn:
+            stored = conn.execute(
+                "SELECT text FROM normalized_documents WHERE upload_id = ?",
+                (upload["upload_id"],),
+            ).fetchone()
+        self.assertEqual(stored["text"], text)
+
+    def test_pdf_upload_persists_parse_job(self) -> None:
+        from app.document_processing.parse_pool import ParseTimeoutError
+        from app.workflow_db.db import get_connection
+
+        # Real job queue: the parse job must be written to the jobs table.
+        with patch("app.routers.documents.parse_document_in_pool", side_effect=ParseTimeoutError("too slow")):
+            upload = self._upload(f"%PDF-1.4 {uuid.uuid4()}".encode("utf-8"), "ekte-ko.pdf")
+
+        self.assertEqual(upload["generation_status"], "parsing")
+        with get_connection() as conn:
+            job = conn.execute(
+                "SELECT kind, lane FROM jobs WHERE dedupe_key = ?",
+                (f"parse:{upload['upload_id']}",),
+            ).fetchone()
+        self.assertIsNotNone(job)
+        self.assertEqual(job["lane"], "parse")
+
+    def test_pdf_parse_timeout_marks_suggestion_failed(self) -> None:
+        from app.document_processing.parse_pool import ParseTimeoutError
+        from app.routers import documents
+
+        with patch("app.routers.documents.enqueue_job") as enqueue:
+            upload = self._upload(f"%PDF-1.4 {uuid.uuid4()}".encode("utf-8"), "treg.pdf")
+            payload = enqueue.call_args.args[1]
+            with patch("app.routers.documents.parse_document_in_pool", side_effect=ParseTimeoutError("too slow")):
+                documents._run_parse_document_job(payload)
+            self.assertEqual(enqueue.call_count, 1)
+
+        suggestion = self.client.get(f"/workflow/suggestions/{upload['suggestion_id']}", headers=self.headers).json()
+        self.assertEqual(suggestion["generation_status"], "failed")
+        self.assertEqual(suggestion["generation_reason"], "parse_timeout")
+        self.assertIsNotNone(suggestion["generation_finished_at"])
+
+    def test_upload_disk_and_db_work_runs_off_the_event_loop(self) -> None:
+        import asyncio
+
+        from app.routers import documents
+
+        checked: list[str] = []
+
+        def off_loop(name: str, func):
+            def check(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    checked.append(name)
+                    return func(*args, **kwargs)
+                raise AssertionError(f"{name} ran on the event loop")
+
+            return check
+
+        content = f"Prosedyre for spyling av rør {uuid.uuid4()}. ".encode("utf-8") * 20
+        with (
+            patch("app.routers.documents.enqueue_job"),
+            patch.object(documents, "_write_spool_chunk", new=off_loop("spool", documents._write_spool_chunk)),
+            patch.object(documents, "_store_upload_blob", new=off_loop("blob", documents._store_upload_blob)),
+            patch.object(documents, "parse_document", new=off_loop("parse", documents.parse_document)),
+            patch.object(documents, "get_connection", new=off_loop("db", documents.get_connection)),
+        ):
+            self._upload(content, "spyling.txt")
+
+        self.assertEqual(set(checked), {"spool", "blob", "parse", "db"})
+
+    def test_upload_over_size_limit_is_rejected_without_storing(self) -> None:
+        from app.routers import documents
+
+        before = {p for p in documents._blobs_root().rglob("*") if p.is_file()}
+        with patch.dict(os.environ, {"UPLOAD_MAX_BYTES": "1024"}):
+            response = self.client.post(
+                "/documents/upload",
+                headers=self.headers,
+                files={"file": ("stor.txt", b"x" * 4096, "text/plain")},
+            )
+        self.assertEqual(response.status_code, 413, response.text)
+        self.assertEqual(response.json()["error"]["code"], "PAYLOAD_TOO_LARGE")
+        after = {p for p in documents._blobs_root().rglob("*") if p.is_file()}
+        self.assertEqual(after, before)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
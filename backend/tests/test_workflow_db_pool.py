@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.workflow_db import db
+from app.workflow_db.db import close_connection_pools, get_connection, init_db
+
+
+@pytest.fixture()
+def workflow_db(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("WORKFLOW_DB_PATH", str(tmp_path / "workflow.sqlite3"))
+    monkeypatch.setenv("WORKFLOW_DB_POOL_SIZE", "2")
+    init_db()
+    yield
+    close_connection_pools()
+
+
+def _pool_stats() -> dict:
+    return db._current_pool().stats()
+
+
+def test_connections_are_reused_with_wal_and_pragmas(workflow_db) -> None:
+    with get_connection() as conn:
+        first = id(conn)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 10000
+    with get_connection() as conn:
+        assert id(conn) == first
+
+    stats = _pool_stats()
+    assert stats["opened"] == 1
+    assert stats["idle"] == 1 and stats["in_use"] == 0
+
+
+def test_error_rolls_back_and_connection_state_is_reset(workflow_db) -> None:
+    with pytest.raises(RuntimeError):
+        with get_connection() as conn:
+            conn.execute("PRAGMA foreign_keys = OFF;")
+            conn.execute(
+                "INSERT INTO users (id, username, password_hash, display_name) VALUES ('u-x', 'x', 'h', 'X')"
+            )
+            raise RuntimeError("boom")
+
+    with get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users WHERE id = 'u-x'").fetchone()[0] == 0
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_nested_use_overflows_instead_of_waiting(workflow_db) -> None:
+    with get_connection() as a, get_connection() as b, get_connection() as c:
+        assert len({id(a), id(b), id(c)}) == 3
+
+    stats = _pool_stats()
+    assert stats["overflow"] == 1
+    assert stats["waits"] == 0
+    assert stats["open"] == 2 and stats["in_use"] == 0
+
+
+def test_concurrent_writers_do_not_hit_database_locked(workflow_db) -> None:
+    errors: list[Exception] = []
+
+    def writer(n: int) -> None:
+        try:
+            for i in range(25):
+                with get_connection() as conn:
+                    conn.execute(
+                        "INSERT INTO users (id, username, password_hash, display_name) VALUES (?, ?, 'h', 'W')",
+                        (f"u-{n}-{i}", f"w{n}-{i}"),
+                    )
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users WHERE display_name = 'W'").fetchone()[0] == 150
+    stats = _pool_stats()
+    assert stats["open"] <= 2
+    assert stats["acquisitions"] >= 150
@@ -103,7 +103,7 @@ export function toDocumentFromSuggestion(
     fileName,
     category,
     status,
-    isProcessing: ["queued", "running"].includes((detail.generation_status || "").toLowerCase()),
+    isProcessing: ["parsing", "queued", "running"].includes((detail.generation_status || "").toLowerCase()),
     generationMode: fallbackUsed ? "fallback" : "ai",
     generationReason: (detail.generation_reason || "").trim() || undefined,
     uploadedBy: "System",
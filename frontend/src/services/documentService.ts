@@ -49,6 +49,7 @@ type SuggestionOriginal = {
   upload_id: string;
   original_filename?: string | null;
   text: string;
+  evidence?: { quote: string; start: number | null; end: number | null }[];
 };
 
 type SimilarityMatch = {